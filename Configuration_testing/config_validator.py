@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Command line / importable version of Python_configuration_tester.ipynb.
+
+Checks, in parallel:
+
+    1. the required and optional modules; each import is timed in its own
+       interpreter so the reported times are cold start times
+    2. the GPT (SNAP) executable and the training data directories
+    3. the cartopy Natural Earth land/coastline shapefiles used by the
+       notebooks, downloading them once (pre-warm) so the first map of a
+       session does not stall on a download
+
+Module results are cached per interpreter and reused while the installed
+module files are unchanged, so repeated checks on shared JupyterHub nodes
+only pay for the (cheap) path checks. Heavy modules (cartopy) are only
+imported when needed.
+
+Usage:
+
+    python config_validator.py --gpt /opt/snap/bin/gpt --data ~/OLCI_test_data
+    python config_validator.py --prewarm 50m 10m --refresh
+
+or, in a notebook:
+
+    from config_validator import validate
+    validate()
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+REQUIRED_MODULES = ['os', 'sys', 'shutil', 'warnings', 'fnmatch', 'datetime', 'logging', \
+                    're', 'requests', 'lxml', 'glob', 'tempfile', 'configparser', \
+                    'fileinput', 'subprocess', 'numpy', 'netCDF4', 'xarray', 'matplotlib', \
+                    'cartopy', 'math', 'pandas', 'shapely']
+
+OPTIONAL_MODULES = ['plotly', 'scipy', 'rasterio', 'earthpy', 'sklearn']
+
+# Natural Earth layers drawn by the notebooks (land polygons and coastlines)
+NATURAL_EARTH_LAYERS = [('physical', 'land'), ('physical', 'coastline')]
+
+DEFAULT_RESOLUTIONS = ['50m']
+DEFAULT_WORKERS = 8
+IMPORT_TIMEOUT = 120
+CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'eumetsat_marine', \
+                          'config_check.json')
+
+TIMER = "import time; t = time.perf_counter(); import %s; print(time.perf_counter() - t)"
+
+# ------------------------------------------------------------------------------
+def module_stamp(module):
+    """ location and modification time of a module, without importing it """
+    try:
+        spec = importlib.util.find_spec(module)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None:
+        return None
+    origin = spec.origin if spec.origin not in (None, 'built-in', 'frozen') else None
+    if origin is None:
+        return [str(spec.origin), 0]
+    return [origin, os.path.getmtime(origin)]
+
+# ------------------------------------------------------------------------------
+def time_import(module):
+    """ imports a module in a fresh interpreter
+
+        output:
+        (ok, seconds, error message)
+    """
+    start = time.perf_counter()
+    try:
+        result = subprocess.run([sys.executable, '-c', TIMER % module], \
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, \
+                                universal_newlines=True, timeout=IMPORT_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return False, time.perf_counter() - start, 'import timed out'
+    if result.returncode != 0:
+        lines = result.stderr.strip().split('\n')
+        return False, time.perf_counter() - start, lines[-1] if lines else ''
+    return True, float(result.stdout.strip().split('\n')[-1]), ''
+
+# ------------------------------------------------------------------------------
+def check_path(path, executable=False):
+    """ checks that a path exists (and is executable, for GPT) """
+    if not os.path.exists(path):
+        return False, 'not found'
+    if executable and not os.access(path, os.X_OK):
+        return False, 'not executable'
+    if os.path.isdir(path):
+        try:
+            with os.scandir(path) as entries:
+                count = sum(1 for entry in entries)
+        except OSError as error:
+            return False, str(error)
+        return True, '%i entries' % count
+    return True, ''
+
+# ------------------------------------------------------------------------------
+def natural_earth_files(resolutions=DEFAULT_RESOLUTIONS):
+    """ downloads (once) the Natural Earth shapefiles used by the notebooks
+
+        output:
+        list of (resolution, name, shapefile path or None, message)
+    """
+    try:
+        import cartopy.io.shapereader as shapereader
+    except ImportError:
+        # reported with the module checks, the layers are only listed here
+        return [(resolution, name, None, 'cartopy not installed') \
+                for resolution in resolutions for _, name in NATURAL_EARTH_LAYERS]
+
+    files = []
+    for resolution in resolutions:
+        for category, name in NATURAL_EARTH_LAYERS:
+            try:
+                path = shapereader.natural_earth(resolution=resolution, \
+                                                 category=category, name=name)
+                files.append((resolution, name, path, ''))
+            except Exception as error:
+                files.append((resolution, name, None, str(error)))
+    return files
+
+# ------------------------------------------------------------------------------
+def _load_cache(cache_file):
+    """ reads the cached results, empty if missing or unreadable """
+    try:
+        with open(cache_file) as cache:
+            results = json.load(cache)
+    except (IOError, ValueError):
+        return {}
+    if results.get('python') != sys.executable:
+        return {}
+    return results
+
+# ------------------------------------------------------------------------------
+def _save_cache(results, cache_file):
+    """ writes the results atomically """
+    folder = os.path.dirname(cache_file)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(cache_file + '.part', 'w') as cache:
+        json.dump(results, cache, indent=1)
+    os.replace(cache_file + '.part', cache_file)
+
+# ------------------------------------------------------------------------------
+def validate(gpt=None, data_dirs=(), prewarm=(), modules=None, \
+             workers=DEFAULT_WORKERS, cache_file=CACHE_FILE, refresh=False, verbose=True):
+    """ checks modules, GPT, data directories and Natural Earth data
+
+        input:
+        gpt        : path of the SNAP gpt executable (optional)
+        data_dirs  : training data directories to check
+        prewarm    : Natural Earth resolutions to download if needed ('50m', ...)
+        modules    : (required, optional) module lists, defaults to the notebook's
+        cache_file : results cache, None to disable
+        refresh    : ignore cached module results
+
+        output:
+        results dictionary; results['ok'] is False if a required module or a
+        given path is missing
+    """
+    required, optional = modules if modules is not None \
+                         else (REQUIRED_MODULES, OPTIONAL_MODULES)
+    cache = {} if (cache_file is None or refresh) else _load_cache(cache_file)
+    cached_modules = cache.get('modules', {})
+
+    # module checks are only rerun when the installed module changed
+    results = {'python': sys.executable, 'version': sys.version, 'modules': {}}
+    stamps = {module: module_stamp(module) for module in required + optional}
+    to_time = []
+    for module in required + optional:
+        previous = cached_modules.get(module)
+        if previous is not None and stamps[module] is not None \
+           and previous['stamp'] == stamps[module] and previous['ok']:
+            results['modules'][module] = previous
+        else:
+            to_time.append(module)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        timings = executor.map(time_import, to_time)
+        paths = [(gpt, True)] if gpt else []
+        paths = paths + [(os.path.expanduser(path), False) for path in data_dirs]
+        path_checks = executor.map(lambda item: check_path(*item), paths)
+
+        for module, (ok, seconds, error) in zip(to_time, timings):
+            results['modules'][module] = {'ok': ok, 'seconds': seconds, \
+                                          'error': error, 'stamp': stamps[module]}
+        results['paths'] = {path: {'ok': ok, 'message': message, \
+                                   'kind': 'GPTPATH' if executable else 'MYPATH'} \
+                            for (path, executable), (ok, message) \
+                            in zip(paths, path_checks)}
+
+    if prewarm:
+        results['natural_earth'] = [{'resolution': resolution, 'name': name, \
+                                     'path': path, 'error': error} \
+                                    for resolution, name, path, error \
+                                    in natural_earth_files(prewarm)]
+
+    results['ok'] = all(results['modules'][module]['ok'] for module in required) \
+                    and all(check['ok'] for check in results['paths'].values())
+    if cache_file is not None:
+        _save_cache(results, cache_file)
+    if verbose:
+        report(results, required, optional, cached=len(to_time) < len(required + optional))
+    return results
+
+# ------------------------------------------------------------------------------
+def report(results, required=REQUIRED_MODULES, optional=OPTIONAL_MODULES, cached=False):
+    """ prints the results as the configuration tester notebook does """
+    modules = results['modules']
+    missing = False
+    print('%-14s %-9s %10s' % ('Module', 'Status', 'Import (s)'))
+    for module in sorted(required + optional, key=lambda name: (not modules[name]['ok'], \
+                                                       -modules[name]['seconds'])):
+        check = modules[module]
+        status = 'ok' if check['ok'] else 'MISSING'
+        seconds = '%10.3f' % check['seconds'] if check['ok'] else '%10s' % '-'
+        print('%-14s %-9s %s %s' % (module, status, seconds, \
+              '' if module in required else '(optional)'))
+
+    for module in required:
+        if not modules[module]['ok']:
+            missing = True
+            print('Required module ' + module + ' not installed (' \
+                  + modules[module]['error'] + ')')
+    for module in optional:
+        if not modules[module]['ok']:
+            missing = True
+            print('Optional module ' + module + ' not installed')
+
+    for path, check in results['paths'].items():
+        if check['ok']:
+            print('Found ' + check['kind'] + ': ' + path + ' ' + check['message'])
+        else:
+            print('Not found ' + check['kind'] + ': ' + path + ' (' + check['message'] \
+                  + '). Please check it is correct')
+
+    for layer in results.get('natural_earth', []):
+        if layer['path'] is None:
+            print('Natural Earth ' + layer['resolution'] + ' ' + layer['name'] \
+                  + ' not available (' + layer['error'] + ')')
+        else:
+            print('Natural Earth ' + layer['resolution'] + ' ' + layer['name'] \
+                  + ': ' + layer['path'])
+
+    if cached:
+        print('(unchanged modules taken from the cache, use --refresh to recheck)')
+    print('------------------------------------------------------')
+    if missing:
+        print('To install a package, please run the following in your conda prompt:')
+        print(' ')
+        print('conda install <replace-with-missing-module-name>')
+        print(' ')
+        print(' -------- or --------')
+        print(' ')
+        print('conda install -c conda-forge <replace-with-missing-module-name>')
+    else:
+        print('Everything required is installed - you are good to go!')
+    print('------------------------------------------------------')
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Check the training environment")
+    parser.add_argument("--gpt", type=str, default=None, \
+                        help="path of the SNAP gpt executable")
+    parser.add_argument("--data", type=str, nargs='*', default=[], \
+                        help="training data directories")
+    parser.add_argument("--prewarm", type=str, nargs='*', default=None, \
+                        help="Natural Earth resolutions to download (default 50m)")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, \
+                        help="number of parallel checks")
+    parser.add_argument("--refresh", action='store_true', \
+                        help="ignore cached results")
+    parser.add_argument("--no-cache", action='store_true', \
+                        help="do not read or write the results cache")
+    args = parser.parse_args()
+
+    prewarm = () if args.prewarm is None else (args.prewarm or DEFAULT_RESOLUTIONS)
+    results = validate(gpt=args.gpt, data_dirs=args.data, prewarm=prewarm, \
+                       workers=args.workers, refresh=args.refresh, \
+                       cache_file=None if args.no_cache else CACHE_FILE)
+    sys.exit(0 if results['ok'] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -88,12 +88,39 @@ import sys
 import shutil
 import argparse
 import configparser
+import json
+import time
+import socket
+import sqlite3
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import netCDF4 as nc
 import shapely.wkt
+import shapely.ops
 from lxml import etree
 import requests
 
+# flag masking is shared with the notebooks (eumetsat_marine package in the
+# repository root, or installed with pip install -e .)
+try:
+    from eumetsat_marine.flags import flag_data_fast
+    from eumetsat_marine.crop import crop_product, in_box
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from eumetsat_marine.flags import flag_data_fast
+    from eumetsat_marine.crop import crop_product, in_box
+
+# optional search result fields: (xml element type, name)
+OPTIONAL_FIELDS = [("date", "ingestiondate"), ("str", "size"), ("str", "timeliness")]
+
+# download priority of the timeliness codes (unknown: last)
+TIMELINESS_RANK = {"NR": 0, "ST": 1, "NT": 2}
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3, "TB": 1024**4}
+
+HUB_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
 # ------------------------------------------------------------------------------
 class MyParser(configparser.ConfigParser):
     """ Define config parser """
@@ -107,34 +134,104 @@ class MyParser(configparser.ConfigParser):
 
 # ------------------------------------------------------------------------------
 def check_overlap(search_polygon, found_polygon):
-    """ check overlap of target (search) and found polygons """
+    """ check overlap of target (search) and found polygons
+
+        the search footprint may hold several polygons joined by OR (boxes
+        split at the Greenwich meridian or the antimeridian), their union
+        is used
+    """
     overlap_percentage = 0
-    poly_1 = shapely.wkt.loads(search_polygon.replace('"Intersects(', '').replace(')"', ''))
+    poly_1 = shapely.ops.unary_union([shapely.wkt.loads(polygon) for polygon \
+                                      in re.findall(r'POLYGON\(\([^)]*\)\)', search_polygon)])
     poly_2 = shapely.wkt.loads(found_polygon)
     overlap_percentage = poly_1.intersection(poly_2).area/poly_1.area*100.0
     return overlap_percentage
 
 # ------------------------------------------------------------------------------
-def flag_data_fast(flags_we_want, flag_names, flag_values, \
-                   flag_data, flag_type='WQSF'):
-    """ Implement flag masking processor """
+def parse_manifest_summary(xml_file):
+    """ reads the classification summary percentages of a xfdumanifest.xml
+
+        e.g. {'cloudyPixels': 42.0, 'salineWaterPixels': 55.0, ...}. When a
+        summary is given for several grids (SLSTR) the largest value is kept.
+    """
+    summary = {}
+    root = etree.parse(xml_file).getroot()
+    for element in root.iter():
+        if not isinstance(element.tag, str) \
+          or etree.QName(element).localname != "classificationSummary":
+            continue
+        for child in element.iter():
+            if child is element or not isinstance(child.tag, str) \
+              or child.get("percentage") is None:
+                continue
+            name = etree.QName(child).localname
+            try:
+                value = float(child.get("percentage"))
+            except ValueError:
+                continue
+            summary[name] = max(value, summary.get(name, value))
+    return summary
 
-    flag_bits = np.uint64()
-    if flag_type == 'SST':
-        flag_bits = np.uint8()
-    elif flag_type == 'WQSF_lsb' or flag_type == 'quality_flags'\
-      or flag_type == 'c2rcc_flags':
-        flag_bits = np.uint32()
-    elif flag_type == 'pixel_classif_flags':
-        flag_bits = np.uint16()
+# ------------------------------------------------------------------------------
+def parse_manifest_thresholds(threshold_str):
+    """ parses 'cloudyPixels<70,salineWaterPixels>10' into (name, op, limit) """
+    thresholds = []
+    for item in threshold_str.split(","):
+        item = item.strip()
+        if item == "":
+            continue
+        match = re.match(r"^(\w+)\s*([<>])\s*([-+0-9.eE]+)$", item)
+        if not match:
+            raise Exception("Incorrect manifest threshold: " + item)
+        thresholds.append((match.group(1), match.group(2), float(match.group(3))))
+    return thresholds
 
-    for flag in flags_we_want:
-        try:
-            flag_bits = flag_bits | flag_values[flag_names.index(flag)]
-        except:
-            print(flag + " not present")
+# ------------------------------------------------------------------------------
+def manifest_filter(summary, thresholds, margin=0.0):
+    """ applies the manifest thresholds to a classification summary
+
+        returns 'pass', 'reject' or 'borderline' (within margin percent of a
+        threshold, or field missing from the manifest), with a message.
+    """
+    status = "pass"
+    messages = []
+    for name, operator, limit in thresholds:
+        if name not in summary:
+            status = "borderline"
+            messages.append(name + " missing")
+            continue
+        value = summary[name]
+        # distance to the limit, positive on the accepted side
+        distance = limit - value if operator == "<" else value - limit
+        messages.append("%s=%g (%s%g)" % (name, value, operator, limit))
+        if distance < -margin:
+            return "reject", ", ".join(messages)
+        if distance <= margin:
+            status = "borderline"
+    return status, ", ".join(messages)
+
+# ------------------------------------------------------------------------------
+class TokenBucket(object):
+    """ bandwidth cap (bytes per second) shared by all download threads """
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.last = time.time()
+        self.lock = threading.Lock()
+
+    def consume(self, nbytes):
+        """ waits until nbytes may be transferred """
+        with self.lock:
+            now = time.time()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # the balance may go negative: the caller sleeps off its debt
+            self.tokens = self.tokens - nbytes
+            wait = -self.tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
 
-    return (flag_data & flag_bits) > 0
 # ------------------------------------------------------------------------------
 def download_file(req_ses, url_str, req_config, arc_dir):
     """ downloads full file or fragment of a file """
@@ -173,8 +270,11 @@ def download_file(req_ses, url_str, req_config, arc_dir):
     chunk_size = 1024
     iters = np.arange(0, 110, 10)
     niter = 0
+    limiter = req_config.get("bandwidth_limiter")
     with open(temp_fname, "wb") as the_file:
         for chunk in req_ret.iter_content(chunk_size=chunk_size):
+            if limiter is not None:
+                limiter.consume(len(chunk))
             chunk_count = chunk_count + chunk_size
             if chunk: # filter out keep-alive new chunks
                 percent_done = float(chunk_count)/float(file_size)*100.
@@ -186,8 +286,8 @@ def download_file(req_ses, url_str, req_config, arc_dir):
         the_file.flush()
 
     # copy from temp to archive
-    if not os.path.exists(arc_dir):
-        os.makedirs(arc_dir)
+    # (parallel downloads may create it at the same time)
+    os.makedirs(arc_dir, exist_ok=True)
 
     try:
         shutil.move(temp_fname, arc_dir)
@@ -217,7 +317,11 @@ def Define_request(req_config, url_hub):
                 url_str += " AND "
             url_str += "%s:%s"%(key, req_config["search"][key])
 
-    url_str += "&rows=%i&start=0"%req_config["max_rows"]
+    url_str += "&rows=%i&start=%i"%(req_config["max_rows"], req_config.get("start_row", 0))
+
+    if req_config.get("paged", False):
+        # oldest first, so paging (or a watermark) never skips products
+        url_str += "&orderby=ingestiondate asc"
 
     return url_str
 
@@ -251,6 +355,10 @@ def parse_xml(xml_text):
                 "beginposition": entry.xpath("date[@name='beginposition']/text()")[0],
                 "endposition": entry.xpath("date[@name='endposition']/text()")[0],
                 }
+        for field_type, name in OPTIONAL_FIELDS:
+            value = entry.xpath("%s[@name='%s']/text()" % (field_type, name))
+            if value:
+                this_entry[name] = value[0]
         res.append(this_entry)
 
     return res
@@ -298,7 +406,12 @@ def process_request(config, logging):
             # parse xml code: extract image names and UUID
             entries = parse_xml(req_ret.content)
 
-            if len(entries) >= config["max_rows"]:
+            if len(entries) >= config["max_rows"] and config.get("paged", False):
+                # watch/publish modes: the rest is fetched with the next
+                # page or poll
+                logging.warning("Number of scenes >= maximum (%s), fetching the rest next", \
+                                str(config["max_rows"]))
+            elif len(entries) >= config["max_rows"]:
                 logging.error("Number of scenes (%(string1)s) > than maximum (%(string2)s)",\
                     dict(string1=str(len(entries)), string2=str(config["max_rows"])))
                 logging.error("Increase max_rows!")
@@ -314,11 +427,330 @@ def process_request(config, logging):
     return entries
 
 # ------------------------------------------------------------------------------
-def download_files(config, entries, logging):
-    """ downloads the files """
+def hub_range(start, end):
+    """ hub date range (both ends included, millisecond resolution) """
+    return "[" + start.strftime(HUB_DATE_FORMAT) + start.strftime(".%f")[:4] + "Z TO " \
+           + end.strftime(HUB_DATE_FORMAT) + end.strftime(".%f")[:4] + "Z]"
+
+# ------------------------------------------------------------------------------
+def slice_window(window, hours):
+    """ splits a (start, end) window into consecutive, non overlapping slices """
+    start, end = window
+    slices = []
+    while start <= end:
+        slice_end = min(end, start + timedelta(hours=hours) - timedelta(milliseconds=1))
+        slices.append((start, slice_end))
+        start = slice_end + timedelta(milliseconds=1)
+    return slices
+
+# ------------------------------------------------------------------------------
+def split_window(window):
+    """ splits a (start, end) window in two halves """
+    start, end = window
+    middle = start + (end - start) // 2
+    middle = middle.replace(microsecond=middle.microsecond // 1000 * 1000)
+    return (start, middle), (middle + timedelta(milliseconds=1), end)
+
+# ------------------------------------------------------------------------------
+def merge_windows(windows):
+    """ merges overlapping or adjacent (start, end) windows """
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1] + timedelta(milliseconds=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+# ------------------------------------------------------------------------------
+def plan_footprints(lon1, lat1, lon2, lat2):
+    """ search polygons covering a lon1,lat1:lon2,lat2 box
+
+        longitudes are wrapped to -180..180; lon1 > lon2 is a box across the
+        antimeridian, split in two. Boxes across the Greenwich meridian are
+        also split, as CODA can't search across it.
+    """
+    lon1, lon2 = [lon - 360.0 if lon > 180.0 else lon + 360.0 if lon < -180.0 else lon \
+                  for lon in (float(lon1), float(lon2))]
+    if lon1 > lon2:
+        spans = [(lon1, 180.0), (-180.0, lon2)]
+    else:
+        spans = [(lon1, lon2)]
+    polygons = []
+    for west, east in spans:
+        for west, east in ([(west, 0.0), (0.0, east)] if west < 0.0 < east else [(west, east)]):
+            polygons.append('"Intersects(POLYGON((%(w)s %(s)s,%(e)s %(s)s,%(e)s %(n)s,' \
+                            '%(w)s %(n)s,%(w)s %(s)s)))"' % {"w": "%g" % west, \
+                            "e": "%g" % east, "s": lat1, "n": lat2})
+    return polygons
+
+# ------------------------------------------------------------------------------
+def plan_request(config, logging):
+    """ runs the search as a plan of sub-queries, de-duplicated by uuid
+
+        the footprint is split into normalised polygons, the time window
+        (plus any [plan_options] time_windows, merged) into slices of
+        slice_hours, and a slice returning max_rows results is split in
+        two until min_slice_minutes (then paged). Products found by
+        several sub-queries are kept once, so their manifests are only
+        fetched once.
+    """
+    plan_options = config.get("plan_options", {})
+    slice_hours = float(plan_options.get("slice_hours") or 24)
+    min_slice = timedelta(minutes=float(plan_options.get("min_slice_minutes") or 10))
+
+    # time windows
+    download_options = config["download_options"]
+    if download_options["sensing_date_start"] != "" \
+      and download_options["sensing_date_end"] != "":
+        time_key = "beginPosition"
+        windows = [(parse_date(download_options["sensing_date_start"]), \
+                    parse_date(download_options["sensing_date_end"], midnight=True))]
+    elif download_options["ingestion_date_start"] != "" \
+      and download_options["ingestion_date_end"] != "":
+        time_key = "ingestionDate"
+        windows = [(parse_date(download_options["ingestion_date_start"]), \
+                    parse_date(download_options["ingestion_date_end"], midnight=True))]
+    else:
+        time_key = "beginPosition"
+        windows = []
+    for time_window in (plan_options.get("time_windows") or "").split(","):
+        if time_window.strip() != "":
+            start, end = time_window.strip().split("-")
+            windows.append((parse_date(start), parse_date(end, midnight=True)))
+    windows = [part for window in merge_windows(windows) \
+               for part in slice_window(window, slice_hours)] or [None]
+
+    if config["global_search"]:
+        footprints = [None]
+    else:
+        footprints = plan_footprints(config["lon1"], config["lat1"], \
+                                     config["lon2"], config["lat2"])
+
+    original_search = dict(config["search"])
+    original_paged = config.get("paged", False)
+    # full pages are split (or paged) below instead of raising an error
+    config["paged"] = True
+    queue = [(footprint, window) for window in windows for footprint in footprints]
+    found = {}
+    nqueries, nresults = 0, 0
+    try:
+        while queue:
+            footprint, window = queue.pop(0)
+            if footprint is not None:
+                config["search"]["footprint"] = footprint
+            if window is not None:
+                config["search"][time_key] = hub_range(window[0], window[1])
+
+            config["start_row"] = 0
+            entries = process_request(config, logging) or []
+            nqueries = nqueries + 1
+            if len(entries) >= config["max_rows"]:
+                if window is not None and window[1] - window[0] > min_slice:
+                    queue[0:0] = [(footprint, half) for half in split_window(window)]
+                    continue
+                while True:
+                    config["start_row"] = config["start_row"] + config["max_rows"]
+                    page = process_request(config, logging) or []
+                    nqueries = nqueries + 1
+                    entries = entries + page
+                    if len(page) < config["max_rows"]:
+                        break
+
+            nresults = nresults + len(entries)
+            for entry in entries:
+                if entry["uuid"] not in found:
+                    found[entry["uuid"]] = entry
+    finally:
+        config["search"] = original_search
+        config["paged"] = original_paged
+        config["start_row"] = 0
+
+    message = "Query plan: %i sub-queries, %i results, %i products " \
+              "(%i duplicate manifest checks avoided)" \
+              % (nqueries, nresults, len(found), nresults - len(found))
+    logging.info(message)
+    print(message)
+    if not found:
+        return False
+    return list(found.values())
+
+# ------------------------------------------------------------------------------
+def parse_size(size_str):
+    """ parses a hub size string (e.g. '512.34 MB') into bytes """
+    value, unit = size_str.split()
+    return int(float(value) * SIZE_UNITS[unit.upper()])
+
+# ------------------------------------------------------------------------------
+def entry_size(entry, req_ses=None, config=None):
+    """ product size (bytes) from the search metadata, or a HEAD probe
+
+        returns None if unknown
+    """
+    if "size_bytes" not in entry:
+        entry["size_bytes"] = None
+        if "size" in entry:
+            try:
+                entry["size_bytes"] = parse_size(entry["size"])
+            except (ValueError, KeyError):
+                pass
+        if entry["size_bytes"] is None and req_ses is not None:
+            url_str = config["download_options"]["url"] \
+                      + "/odata/v1/Products('%s')/$value"%entry['uuid']
+            try:
+                req_ret = req_ses.head(url_str, auth=(config["account_options"]["username"], \
+                                       config["account_options"]["password"]), \
+                                       allow_redirects=True, timeout=60)
+                entry["size_bytes"] = int(req_ret.headers["content-length"])
+            except:
+                logging.info("Size probe failed: %s", entry["identifier"])
+    return entry["size_bytes"]
+
+# ------------------------------------------------------------------------------
+def entry_timeliness(entry):
+    """ NR, ST or NT, from the search metadata or the product name """
+    if entry.get("timeliness"):
+        # "Near Real Time" -> NR, "Short Time Critical" -> ST, ...
+        return "".join(word[0] for word in entry["timeliness"].split()[:2]).upper()
+    match = re.search("_(NR|ST|NT)_[0-9]{3}$", entry["identifier"])
+    if match:
+        return match.group(1)
+    return None
+
+# ------------------------------------------------------------------------------
+def schedule_entries(entries, priority):
+    """ orders the entries by a comma separated priority policy
+
+        nrt: by timeliness (NR, ST, NT), newest/oldest: by sensing start,
+        smallest/largest: by size (entry_size must have been called);
+        e.g. 'nrt,newest'. Ties keep the hub order.
+    """
+    keys = [key.strip().lower() for key in priority.split(",") if key.strip()]
+    for key in keys:
+        if key not in ["nrt", "newest", "oldest", "smallest", "largest"]:
+            raise Exception("Unknown download priority: " + key)
+
+    def sort_key(entry):
+        result = []
+        for key in keys:
+            if key == "nrt":
+                result.append(TIMELINESS_RANK.get(entry_timeliness(entry), 3))
+            elif key in ["newest", "oldest"]:
+                sensing = (parse_hub_date(entry["beginposition"]) \
+                           - datetime(1970, 1, 1)).total_seconds()
+                result.append(-sensing if key == "newest" else sensing)
+            else:
+                # unknown sizes go last
+                size = entry.get("size_bytes")
+                if size is None:
+                    result.append(float("inf"))
+                else:
+                    result.append(size if key == "smallest" else -size)
+        return result
+
+    return sorted(entries, key=sort_key)
+
+# ------------------------------------------------------------------------------
+def download_files(config, entries, logging, failed=None):
+    """ downloads the files in priority order, optionally in parallel
+
+        options (optional section, older ini files lack it) are read from
+        [schedule_options]: priority, probe_size, parallel_downloads and
+        bandwidth_limit (MB/s, shared by all parallel downloads).
+        Products whose download failed (as opposed to filtered out) are
+        appended to failed, if given.
+    """
+    schedule_options = config.get("schedule_options", {})
+    priority = schedule_options.get("priority", "")
+    probe_size = schedule_options.get("probe_size", "False") == "True"
+    workers = int(schedule_options.get("parallel_downloads") or 1)
+    bandwidth_limit = float(schedule_options.get("bandwidth_limit") or 0)
+
+    if bandwidth_limit > 0 and "bandwidth_limiter" not in config:
+        config["bandwidth_limiter"] = TokenBucket(bandwidth_limit * SIZE_UNITS["MB"])
+
+    if priority != "" or workers > 1:
+        with requests.Session() as req_ses:
+            for entry in entries:
+                entry_size(entry, req_ses if probe_size else None, config)
+        entries = schedule_entries(entries, priority)
+        sizes = [entry["size_bytes"] for entry in entries if entry["size_bytes"] is not None]
+        logging.info("Download order (%s): %i products, %.1f MB known size", \
+                     priority, len(entries), sum(sizes) / float(SIZE_UNITS["MB"]))
+
+    if workers <= 1 or len(entries) <= 1:
+        return download_entries(config, entries, logging, failed)
+
+    # the workers take the next product in priority order as soon as they are
+    # free, so large products do not hold up the rest of the queue
+    print("Downloading %i products with %i parallel downloads" % (len(entries), workers))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda entry: download_entries(config, [entry], logging, failed), \
+                                    entries))
+    return [entry for result in results for entry in result]
+
+# ------------------------------------------------------------------------------
+def crop_download(config, product_path, arc_dir, logging):
+    """ crops a downloaded product to the footprint (plus margin)
+
+        product_path is the .SEN3 directory (band downloads) or the zipped
+        SAFE product, which is unpacked first.
+    """
+    storage_options = config["storage_options"]
+    if zipfile.is_zipfile(product_path):
+        with zipfile.ZipFile(product_path) as zip_file:
+            product_dir = os.path.join(arc_dir, zip_file.namelist()[0].split("/")[0])
+            zip_file.extractall(arc_dir)
+        os.remove(product_path)
+    else:
+        product_dir = product_path
+
+    box = (float(config["lon1"]), float(config["lat1"]), \
+           float(config["lon2"]), float(config["lat2"]))
+    try:
+        sizes = crop_product(product_dir, box, \
+                margin=float(storage_options.get("crop_margin") or 0.1), \
+                geo_file=storage_options.get("crop_geo_file") or "geo_coordinates.nc", \
+                lon_name=storage_options.get("crop_lon") or "longitude", \
+                lat_name=storage_options.get("crop_lat") or "latitude")
+    except Exception as error:
+        logging.warning("Crop failed, keeping the full product: %s", str(error))
+        print("Crop failed, keeping the full product: " + str(error))
+        return
+    if sizes is None:
+        logging.info("Footprint not covered by the geolocation, product not cropped")
+        return
+    logging.info("Cropped to footprint: %.1f MB -> %.1f MB", sizes[0] / 1e6, sizes[1] / 1e6)
+    print("Cropped to footprint: %.1f MB -> %.1f MB" % (sizes[0] / 1e6, sizes[1] / 1e6))
+
+# ------------------------------------------------------------------------------
+def download_entries(config, entries, logging, failed=None):
+    """ downloads the files (in the given order)
+
+        returns the downloaded products; those whose download failed are
+        appended to failed (if given), filtered out ones are in neither list.
+    """
+    if failed is None:
+        failed = []
     # open requests session
     with requests.Session() as req_ses:
 
+        # manifest pre-filter settings (optional, older ini files lack them)
+        manifest_options = config["flag_options"]
+        filter_by_manifest = manifest_options.get("filter_by_manifest", "False") == "True"
+        if filter_by_manifest:
+            thresholds = parse_manifest_thresholds(\
+                         manifest_options.get("manifest_thresholds", ""))
+            margin = float(manifest_options.get("manifest_margin", "0") or 0)
+        prefilter_counts = {"pass": 0, "reject": 0, "borderline": 0}
+        downloaded = []
+
+        # footprint crop after download (optional, older ini files lack it)
+        crop = config["storage_options"].get("crop_to_footprint", "False") == "True"
+        if crop and config["global_search"]:
+            logging.warning("No footprint defined, products will not be cropped")
+            crop = False
+
         # ----------------------------------------------------------------------
         # download files
         logging.info("Started downloading %i files ...", len(entries))
@@ -372,6 +804,7 @@ def download_files(config, entries, logging):
             if not download_success:
                 print("No xml file found: something is wrong, moving to next file")
                 logging.info(url_xml_str)
+                failed.append(entry)
                 continue
 
             # filtering based on xml parameters
@@ -407,8 +840,27 @@ def download_files(config, entries, logging):
             if config["download_options"]["get_xml_only"] == "True":
                 continue
 
+            # quality pre-filter on the manifest classification summary: only
+            # borderline scenes go on to the (costly) pixel level flag check
+            check_flags = config["flag_options"]["filter_by_flag"] == "True"
+            if filter_by_manifest:
+                print("Checking manifest quality summary...")
+                try:
+                    status, message = manifest_filter(parse_manifest_summary(xml_out), \
+                                                      thresholds, margin)
+                except Exception as error:
+                    status, message = "borderline", "unreadable manifest: " + str(error)
+                prefilter_counts[status] += 1
+                logging.info("Manifest pre-filter %s: %s", status, message)
+                print("Manifest pre-filter " + status + ": " + message)
+                if status == "reject":
+                    shutil.rmtree(download_path, ignore_errors=True)
+                    continue
+                if status == "pass":
+                    check_flags = False
+
             # build url string & isolate file
-            if config["flag_options"]["filter_by_flag"] == "True":
+            if check_flags:
                 print('Checking flags...')
                 url_flag_str = config["download_options"]["url"] \
                                + "/odata/v1/Products('%s')"%entry['uuid'] \
@@ -427,11 +879,13 @@ def download_files(config, entries, logging):
                 download_success, xml_out = download_file(req_ses, url_flag_str, \
                                             config, download_path)
                 if not download_success:
+                    failed.append(entry)
                     continue
 
                 download_success, xml_out = download_file(req_ses, url_coords_str, \
                                             config, download_path)
                 if not download_success:
+                    failed.append(entry)
                     continue
 
                 flag_file = os.path.join(arc_dir, entry["identifier"] \
@@ -460,14 +914,15 @@ def download_files(config, entries, logging):
                             flag_vals, flags, \
                             flag_type=config["flag_options"]["flag_variable"])
                 flag_mask = flag_mask.astype(float)
-                flag_mask[longitude < float(config["lon1"])] = np.nan
-                flag_mask[longitude > float(config["lon2"])] = np.nan
-                flag_mask[latitude < float(config["lat1"])] = np.nan
-                flag_mask[latitude > float(config["lat2"])] = np.nan
+                # lon1 > lon2: box across the antimeridian
+                box = (float(config["lon1"]), float(config["lat1"]), \
+                       float(config["lon2"]), float(config["lat2"]))
+                flag_mask[~in_box(np.ma.filled(longitude, np.nan), \
+                                  np.ma.filled(latitude, np.nan), box)] = np.nan
 
-                bad_pixels = np.float(np.nansum(flag_mask))
+                bad_pixels = float(np.nansum(flag_mask))
                 flag_mask[flag_mask == 0] = 1.0
-                all_pixels = np.float(np.nansum(flag_mask))
+                all_pixels = float(np.nansum(flag_mask))
 
                 if all_pixels == 0.0:
                     print("Area too small to determine scene clarity")
@@ -491,6 +946,7 @@ def download_files(config, entries, logging):
 
             if config["download_options"]["get_specified_bands"] == "True":
                 mybands = config["download_options"]["specified_bands"].split(',')
+                bands_success = True
                 for myband in mybands:
                     print("Downloading band: "+myband)
                     url_band_str = config["download_options"]["url"] \
@@ -501,15 +957,29 @@ def download_files(config, entries, logging):
                                    + "')/$value"
                     download_success, xml_out = download_file(req_ses, url_band_str, \
                                                 config, download_path)
+                    bands_success = bands_success and download_success
+                download_success = bands_success
             else:
                 print("Downloading entire SAFE product")
                 download_success, xml_out = download_file(req_ses, url_str, config, arc_dir)
             if not download_success:
+                failed.append(entry)
                 continue
-
+            if crop:
+                if config["download_options"]["get_specified_bands"] == "True":
+                    crop_download(config, download_path, arc_dir, logging)
+                else:
+                    crop_download(config, xml_out, arc_dir, logging)
+            downloaded.append(entry)
+
+        if filter_by_manifest:
+            logging.info("Manifest pre-filter: %(pass)i passed, %(reject)i rejected, " \
+                         "%(borderline)i borderline", prefilter_counts)
+            print("Manifest pre-filter: %(pass)i passed, %(reject)i rejected, " \
+                  "%(borderline)i borderline" % prefilter_counts)
         logging.info("Finished downloading!")
 
-    return
+    return downloaded
 
 # ------------------------------------------------------------------------------
 def parse_date(date_str, midnight=False):
@@ -534,6 +1004,347 @@ def parse_date(date_str, midnight=False):
 
     return this_date
 
+# ------------------------------------------------------------------------------
+def parse_hub_date(date_str):
+    """ parses a hub date (e.g. 2019-06-01T10:21:33.123Z) """
+    return datetime.strptime(date_str.rstrip("Z").split(".")[0], HUB_DATE_FORMAT)
+
+# ------------------------------------------------------------------------------
+def read_watermark(watermark_file):
+    """ reads the last seen ingestion date, the uuids ingested at that date and
+        the products whose download failed (to retry)
+    """
+    if not os.path.exists(watermark_file):
+        return None, [], []
+    with open(watermark_file, "r") as the_file:
+        watermark = json.load(the_file)
+    return watermark["ingestiondate"], watermark["uuids"], watermark.get("retry", [])
+
+# ------------------------------------------------------------------------------
+def write_watermark(watermark_file, ingestion_date, uuids, retry=()):
+    """ stores the watermark atomically, so a crash never loses it """
+    with open(watermark_file + ".tmp", "w") as the_file:
+        json.dump({"ingestiondate": ingestion_date, "uuids": sorted(uuids), \
+                   "retry": list(retry)}, the_file)
+    os.replace(watermark_file + ".tmp", watermark_file)
+
+# ------------------------------------------------------------------------------
+def write_latency(metrics_file, entries, on_disk):
+    """ appends the sensing/ingestion to disk latency of downloaded products
+
+        returns the sensing to disk latencies (seconds)
+    """
+    new_file = not os.path.exists(metrics_file)
+    latencies = []
+    with open(metrics_file, "a") as the_file:
+        if new_file:
+            the_file.write("identifier,sensing_end,ingestion_date,on_disk," \
+                           "sensing_to_disk_s,ingestion_to_disk_s\n")
+        for entry in entries:
+            sensing_end = parse_hub_date(entry["endposition"])
+            sensing_latency = (on_disk - sensing_end).total_seconds()
+            ingestion_latency = ""
+            if "ingestiondate" in entry:
+                ingestion_latency = "%.0f" % (on_disk \
+                                    - parse_hub_date(entry["ingestiondate"])).total_seconds()
+            latencies.append(sensing_latency)
+            the_file.write("%s,%s,%s,%s,%.0f,%s\n" % (entry["identifier"], \
+                           entry["endposition"], entry.get("ingestiondate", ""), \
+                           on_disk.strftime(HUB_DATE_FORMAT), sensing_latency, \
+                           ingestion_latency))
+    return latencies
+
+# ------------------------------------------------------------------------------
+def watch(config, logging):
+    """ continuously downloads newly ingested products (NRT operations)
+
+        each poll only asks the hub for products ingested since the last seen
+        ingestion date (the watermark, persisted between runs), oldest first.
+        Products whose download failed are kept with the watermark and tried
+        again at the next polls, up to max_retries times.
+    """
+    watch_options = config.get("watch_options", {})
+    poll_interval = float(watch_options.get("poll_interval") or 300)
+    max_polls = int(watch_options.get("max_polls") or 0)
+    max_retries = int(watch_options.get("max_retries") or 3)
+    watermark_file = watch_options.get("watermark_file") \
+                     or config["storage_options"]["logfile"] + "_watermark.json"
+    metrics_file = watch_options.get("metrics_file") \
+                   or config["storage_options"]["logfile"] + "_latency.csv"
+
+    config["paged"] = True
+    # the sensing window of the ini file does not apply to a continuous watch
+    config["search"].pop("beginPosition", None)
+
+    watermark, seen_uuids, retry = read_watermark(watermark_file)
+    if watermark is None:
+        start = parse_date(watch_options.get("ingestion_date_start") or "NOW-1")
+        watermark = start.strftime(HUB_DATE_FORMAT) + start.strftime(".%f")[:4] + "Z"
+    logging.info("Watching for products ingested after %s", watermark)
+    print("Watching for products ingested after " + watermark)
+
+    npoll = 0
+    while max_polls == 0 or npoll < max_polls:
+        npoll = npoll + 1
+        poll_start = time.time()
+        config["search"]["ingestionDate"] = "[" + watermark + " TO NOW]"
+        config["start_row"] = 0
+        while True:
+            try:
+                entries = process_request(config, logging)
+            except Exception as error:
+                logging.warning("Query failed (%s), retrying at next poll", str(error))
+                entries = False
+            if not entries:
+                break
+            # products at the watermark date were handled by the previous poll
+            nfound = len(entries)
+            entries = [entry for entry in entries if "ingestiondate" in entry \
+                       and not (entry["ingestiondate"] == watermark \
+                                and entry["uuid"] in seen_uuids)]
+            entries.sort(key=lambda entry: entry["ingestiondate"])
+            # a full page of already seen products: look at the next page
+            if entries or nfound < config["max_rows"]:
+                break
+            config["start_row"] = config["start_row"] + nfound
+        config["start_row"] = 0
+        if not entries:
+            entries = []
+
+        if entries or retry:
+            logging.info("%i new products, %i to retry", len(entries), len(retry))
+            print("%i new products, %i to retry" % (len(entries), len(retry)))
+            new_uuids = set(entry["uuid"] for entry in entries)
+            failed = []
+            downloaded = download_files(config, entries + [entry for entry in retry \
+                                        if entry["uuid"] not in new_uuids], logging, failed)
+            if downloaded:
+                latencies = write_latency(metrics_file, downloaded, datetime.utcnow())
+                logging.info("Sensing to disk latency: median %.0f s, max %.0f s", \
+                             np.median(latencies), np.max(latencies))
+                print("Sensing to disk latency: median %.0f s, max %.0f s" \
+                      % (np.median(latencies), np.max(latencies)))
+
+            # failed downloads are retried at the next polls
+            retry = []
+            for entry in failed:
+                entry["retries"] = entry.get("retries", 0) + 1
+                if entry["retries"] <= max_retries:
+                    retry.append(entry)
+                else:
+                    logging.warning("Giving up on %s after %i retries", \
+                                    entry["identifier"], max_retries)
+                    print("Giving up on " + entry["identifier"])
+
+            # advance the watermark over every product seen in this poll
+            if entries:
+                newest = entries[-1]["ingestiondate"]
+                newest_uuids = [entry["uuid"] for entry in entries \
+                                if entry["ingestiondate"] == newest]
+                if newest == watermark:
+                    newest_uuids = newest_uuids + list(seen_uuids)
+                watermark, seen_uuids = newest, newest_uuids
+            write_watermark(watermark_file, watermark, seen_uuids, retry)
+
+        if max_polls == 0 or npoll < max_polls:
+            time.sleep(max(0.0, poll_interval - (time.time() - poll_start)))
+
+    return
+
+# ------------------------------------------------------------------------------
+def open_queue(queue_file):
+    """ opens (and creates) a sqlite work queue, e.g. on shared storage
+
+        sqlite locks the whole file for writes, so leasing is atomic across
+        processes and hosts as long as the file system supports locking.
+    """
+    connection = sqlite3.connect(queue_file, timeout=60, isolation_level=None)
+    connection.execute("CREATE TABLE IF NOT EXISTS products (" \
+                       "uuid TEXT PRIMARY KEY, identifier TEXT, entry TEXT, " \
+                       "status TEXT, worker TEXT, lease_until REAL, " \
+                       "attempts INTEGER, updated REAL)")
+    return connection
+
+# ------------------------------------------------------------------------------
+def publish(connection, entries):
+    """ adds search results to the queue, products already queued are kept
+
+        returns the number of new products
+    """
+    now = time.time()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        before = connection.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        connection.executemany("INSERT OR IGNORE INTO products VALUES " \
+                               "(?, ?, ?, 'queued', NULL, 0, 0, ?)", \
+                               [(entry["uuid"], entry["identifier"], json.dumps(entry), now) \
+                                for entry in entries])
+        after = connection.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        connection.execute("COMMIT")
+    except:
+        connection.execute("ROLLBACK")
+        raise
+    return after - before
+
+# ------------------------------------------------------------------------------
+def lease(connection, worker, lease_seconds, max_attempts):
+    """ leases the next queued product (or one whose lease has expired)
+
+        returns the search entry, or None if nothing is available
+    """
+    now = time.time()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        # products of crashed workers that ran out of attempts
+        connection.execute("UPDATE products SET status='failed', updated=? " \
+                           "WHERE status='leased' AND lease_until<? AND attempts>=?", \
+                           (now, now, max_attempts))
+        row = connection.execute("SELECT uuid, entry FROM products " \
+                                 "WHERE status='queued' OR " \
+                                 "(status='leased' AND lease_until<?) " \
+                                 "ORDER BY rowid LIMIT 1", (now,)).fetchone()
+        if row is not None:
+            connection.execute("UPDATE products SET status='leased', worker=?, " \
+                               "lease_until=?, attempts=attempts+1, updated=? " \
+                               "WHERE uuid=?", (worker, now + lease_seconds, now, row[0]))
+        connection.execute("COMMIT")
+    except:
+        connection.execute("ROLLBACK")
+        raise
+    if row is None:
+        return None
+    return json.loads(row[1])
+
+# ------------------------------------------------------------------------------
+def renew_lease(queue_file, uuid, worker, lease_seconds, stop_event):
+    """ keeps extending a lease until stop_event is set (long downloads) """
+    connection = open_queue(queue_file)
+    while not stop_event.wait(lease_seconds / 3.0):
+        try:
+            connection.execute("UPDATE products SET lease_until=? WHERE uuid=? " \
+                               "AND worker=? AND status='leased'", \
+                               (time.time() + lease_seconds, uuid, worker))
+        except sqlite3.OperationalError as error:
+            logging.warning("Could not renew lease of %s: %s", uuid, str(error))
+    connection.close()
+
+# ------------------------------------------------------------------------------
+def complete(connection, uuid, status, max_attempts=None):
+    """ reports a product as done, skipped (filtered out) or failed
+
+        a failed product is queued again until it runs out of attempts
+    """
+    if status == "failed" and max_attempts is not None:
+        connection.execute("UPDATE products SET status=CASE WHEN attempts<? " \
+                           "THEN 'queued' ELSE 'failed' END, updated=? WHERE uuid=?", \
+                           (max_attempts, time.time(), uuid))
+    else:
+        connection.execute("UPDATE products SET status=?, updated=? WHERE uuid=?", \
+                           (status, time.time(), uuid))
+
+# ------------------------------------------------------------------------------
+def queue_counts(connection):
+    """ number of products per status """
+    return dict(connection.execute("SELECT status, COUNT(*) FROM products GROUP BY status"))
+
+# ------------------------------------------------------------------------------
+def queue_settings(config):
+    """ queue options (optional section, older ini files lack it) """
+    queue_options = config.get("queue_options", {})
+    settings = {"queue_file": queue_options.get("queue_file") \
+                              or config["storage_options"]["logfile"] + "_queue.sqlite",
+                "lease_seconds": float(queue_options.get("lease_seconds") or 1800),
+                "max_attempts": int(queue_options.get("max_attempts") or 3),
+                "idle_sleep": float(queue_options.get("idle_sleep") or 60),
+                "worker": queue_options.get("worker_name") \
+                          or socket.gethostname() + ":" + str(os.getpid())}
+    return settings
+
+# ------------------------------------------------------------------------------
+def publish_search(config, logging):
+    """ runs the search (all pages) and publishes the results to the queue """
+    settings = queue_settings(config)
+    if config.get("plan_options", {}).get("use_planner", "False") == "True":
+        entries = plan_request(config, logging) or []
+    else:
+        config["paged"] = True
+        config["start_row"] = 0
+        entries = []
+        while True:
+            page = process_request(config, logging)
+            if not page:
+                break
+            entries.extend(page)
+            if len(page) < config["max_rows"]:
+                break
+            config["start_row"] = config["start_row"] + len(page)
+        config["start_row"] = 0
+
+    connection = open_queue(settings["queue_file"])
+    added = publish(connection, entries)
+    counts = queue_counts(connection)
+    connection.close()
+    logging.info("Published %i products (%i new) to %s", len(entries), added, \
+                 settings["queue_file"])
+    print("Published %i products (%i new) to %s" % (len(entries), added, \
+                                                    settings["queue_file"]))
+    print("Queue: " + ", ".join("%s %i" % item for item in sorted(counts.items())))
+
+# ------------------------------------------------------------------------------
+def work(config, logging):
+    """ leases products from the queue, downloads (and filters) them, reports
+
+        several workers (on several hosts sharing the queue file and the
+        output directory) can run at once; the products of a crashed worker
+        are leased again once its lease expires.
+    """
+    settings = queue_settings(config)
+    connection = open_queue(settings["queue_file"])
+    logging.info("Worker %s on queue %s", settings["worker"], settings["queue_file"])
+    print("Worker " + settings["worker"] + " on queue " + settings["queue_file"])
+
+    counts = {"done": 0, "skipped": 0, "failed": 0}
+    while True:
+        entry = lease(connection, settings["worker"], settings["lease_seconds"], \
+                      settings["max_attempts"])
+        if entry is None:
+            # other workers' leases may still expire and be re-issued
+            if queue_counts(connection).get("leased", 0) == 0:
+                break
+            time.sleep(settings["idle_sleep"])
+            continue
+
+        stop_event = threading.Event()
+        heartbeat = threading.Thread(target=renew_lease, \
+                                     args=(settings["queue_file"], entry["uuid"], \
+                                           settings["worker"], settings["lease_seconds"], \
+                                           stop_event))
+        heartbeat.daemon = True
+        heartbeat.start()
+        try:
+            failed = []
+            if download_files(config, [entry], logging, failed):
+                status = "done"
+            elif failed:
+                # hub or network error: leased again until max_attempts
+                status = "failed"
+            else:
+                status = "skipped"
+        except Exception as error:
+            logging.error("Failed %s: %s", entry["identifier"], str(error))
+            status = "failed"
+        finally:
+            stop_event.set()
+            heartbeat.join()
+        complete(connection, entry["uuid"], status, settings["max_attempts"])
+        counts[status] += 1
+        logging.info("%s: %s", entry["identifier"], status)
+
+    connection.close()
+    logging.info("Worker finished: %(done)i done, %(skipped)i skipped, %(failed)i failed", \
+                 counts)
+    print("Worker finished: %(done)i done, %(skipped)i skipped, %(failed)i failed" % counts)
+
 # ------------------------------------------------------------------------------
 def parse_config(config, username, userpwrd):
     """ parses the initialisation config file """
@@ -592,17 +1403,10 @@ def parse_config(config, username, userpwrd):
         config["lat2"] = latlon[1].split(",")[-1]
         config["global_search"] = False
 
-        # must split queries in CODA, it can't search across Greenwich Meridien!
-        if float(config["lon1"]) <= 0.0 and float(config["lon2"]) >= 0.0:
-            config["search"]["footprint"] = \
-                '"Intersects(POLYGON((%(lon1)s %(lat1)s, %(lont)s %(lat1)s, %(lont)s %(lat2)s, %(lon1)s %(lat2)s, %(lon1)s %(lat1)s)))"' \
-                %{"lon1":config["lon1"], "lat1":config["lat1"], "lat2":config["lat2"], "lont":"0"} \
-                +' OR footprint:"Intersects(POLYGON((%(lont)s %(lat1)s,%(lon2)s %(lat1)s,%(lon2)s %(lat2)s,%(lont)s %(lat2)s,%(lont)s %(lat1)s)))"' \
-                %{"lat1":config["lat1"], "lon2":config["lon2"], "lat2":config["lat2"], "lont":"0"}
-        else:
-            config["search"]["footprint"] = \
-                '"Intersects(POLYGON((%(lon1)s %(lat1)s,%(lon2)s %(lat1)s,%(lon2)s %(lat2)s,%(lon1)s %(lat2)s,%(lon1)s %(lat1)s)))"'\
-                %{"lon1":config["lon1"], "lat1":config["lat1"], "lon2":config["lon2"], "lat2":config["lat2"]}
+        # must split queries in CODA, it can't search across Greenwich Meridien
+        # (or the antimeridian, lon1 > lon2)!
+        config["search"]["footprint"] = ' OR footprint:'.join( \
+            plan_footprints(config["lon1"], config["lat1"], config["lon2"], config["lat2"]))
 
     if config["download_options"]["sensing_date_start"] != "" \
       and config["download_options"]["sensing_date_end"] != "":
@@ -654,6 +1458,14 @@ PARSER.add_argument("-u", "--username", type=str, \
                     help="user name", default=None)
 PARSER.add_argument("-p", "--password", type=str, \
                     help="password", default=None)
+PARSER.add_argument("-w", "--watch", action="store_true", \
+                    help="keep polling for newly ingested products (see [watch_options])")
+PARSER.add_argument("--publish", action="store_true", \
+                    help="publish the search results to the work queue (see [queue_options])")
+PARSER.add_argument("--work", action="store_true", \
+                    help="download products leased from the work queue")
+PARSER.add_argument("-q", "--queue", type=str, default=None, \
+                    help="work queue file (overrides [queue_options] queue_file)")
 
 # -args-done--------------------------------------------------------------------
 ARGS = PARSER.parse_args()
@@ -679,8 +1491,30 @@ if __name__ == "__main__":
     except:
         raise Exception("Failed to set logger")
 
+    if ARGS.queue:
+        CONFIG.setdefault("queue_options", {})["queue_file"] = ARGS.queue
+
+    # multi-node work queue: publish the search and/or download leased products
+    if ARGS.publish or ARGS.work:
+        if ARGS.publish:
+            publish_search(CONFIG, logging)
+        if ARGS.work:
+            work(CONFIG, logging)
+        sys.exit()
+
+    # continuous near real time mode
+    if ARGS.watch:
+        try:
+            watch(CONFIG, logging)
+        except KeyboardInterrupt:
+            print("Watch stopped")
+        sys.exit()
+
     # start the downloads
-    ENTRIES = process_request(CONFIG, logging)
+    if CONFIG.get("plan_options", {}).get("use_planner", "False") == "True":
+        ENTRIES = plan_request(CONFIG, logging)
+    else:
+        ENTRIES = process_request(CONFIG, logging)
 
     logging.info('Available files:')
     logging.info('=======================================')
@@ -9,22 +9,30 @@
 from ipywidgets import widgets
 from IPython.display import display
 
+PARAMETERS = ['Mission_ID', 'Data_Source', 'Processing_Level',\
+              'Data_Type_ID', 'Sensing_Start_Time',\
+              'Sensing_End_Time', 'Creation_Date', 'Instance',\
+              'Product_Generation_Centre', 'Class_ID']
+REGEX = "000_11_2_333333_444444444444444_555555555555555" \
+      + "_666666666666666_77777777777777777_888_99999999"
+
+# character positions of each field, worked out once from the template
+# (for decoding many names at once see eumetsat_marine/filenames.py)
+FIELD_SLICES = []
+for pcount in range(0,10):
+    vals = [pos for pos, char in enumerate(REGEX) if char == str(pcount)]
+    FIELD_SLICES.append(slice(vals[0], vals[-1] + 1))
+
 def handle_submit(sender):
-    parameters = ['Mission_ID', 'Data_Source', 'Processing_Level',\
-                  'Data_Type_ID', 'Sensing_Start_Time',\
-                  'Sensing_End_Time', 'Creation_Date', 'Instance',\
-                  'Product_Generation_Centre', 'Class_ID']
-    regex = "000_11_2_333333_444444444444444_555555555555555" \
-          + "_666666666666666_77777777777777777_888_99999999"
+    parameters = PARAMETERS
 
     mydict = {}    
     fname = sender.value.split('.')[0]
     for pcount in range(0,10):
-        vals = [pos for pos, char in enumerate(regex) if char == str(pcount)]
-        mydict[parameters[pcount]] = fname[vals[0]:vals[-1] + 1]
+        mydict[parameters[pcount]] = fname[FIELD_SLICES[pcount]]
 
         if parameters[pcount] == 'Instance':
-            sub_string = fname[vals[0]:vals[-1] + 1]
+            sub_string = fname[FIELD_SLICES[pcount]]
             print('Instance (Duration) : ' + sub_string[0:4])
             print('Instance (Cycle number) : ' + sub_string[5:8])
             print('Instance (Relative orbit number) : ' + sub_string[9:12])
@@ -33,7 +41,7 @@ def handle_submit(sender):
             else:
                 print('Instance (Frame coordinate) : ' + sub_string[13:])
         elif parameters[pcount] == 'Class_ID':
-            sub_string = fname[vals[0]:vals[-1] + 1]
+            sub_string = fname[FIELD_SLICES[pcount]]
             print('Class ID (Platform) : '+sub_string[0:1])
             if 'NR' in sub_string[2:4]:
                 print('Class ID (Timeliness) : NR (Near Real Time)')
@@ -44,7 +52,7 @@ def handle_submit(sender):
             print('Class ID (Baseline collection) : ' + sub_string[5:])
         else:
             print(parameters[pcount].replace('_',' ') + ' : ' \
-                + fname[vals[0]:vals[-1] + 1])
+                + fname[FIELD_SLICES[pcount]])
 
     final_string = 'This is a Sentinel-3'
     if 'A' in mydict['Mission_ID']:
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Python 3 CMEMS downloader driven by CMEMS_download.cfg.
+
+The bundled motu-client-python is Python 2 only and runs one request at a
+time. This script drives the Python 3 motu client (pip install motuclient)
+instead and:
+
+    1. splits the request into time slices (slice_days, or 'auto' to size
+       slices from the server's size estimate) and optional depth slices
+    2. downloads the slices with a bounded number of concurrent requests
+    3. skips slices that are already complete; each slice is written to a
+       .part file and renamed only once finished, so an interrupted run
+       resumes where it stopped
+    4. optionally merges the slices lazily (xarray + dask) into one file,
+       only once all slices are complete (otherwise it exits with status 1)
+
+Credentials are read from the CMEMS_USER / CMEMS_PWD environment variables,
+or asked for when missing.
+
+Usage:
+
+    python cmems_fetch.py -c CMEMS_download.cfg -o ./cmems_data --merge merged.nc
+"""
+import os
+import sys
+import math
+import time
+import getpass
+import argparse
+import datetime
+import subprocess
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_MOTU = 'http://nrt.cmems-du.eu/motu-web/Motu'
+DEFAULT_SLICE_DAYS = 30
+DEFAULT_MAX_SIZE_MB = 1024.0
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DATE_FORMAT = '%Y-%m-%d'
+
+# ------------------------------------------------------------------------------
+def parse_cfg(cfg_file):
+    """ reads the key=value lines of a CMEMS_download.cfg file """
+    config = {}
+    with open(cfg_file) as cfg:
+        for line in cfg:
+            line = line.split('#')[0].strip()
+            if '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            config[key.strip()] = value.strip()
+
+    for key in ['product_id', 'service_id', 'date_min', 'date_max', \
+                'lonmin', 'lonmax', 'latmin', 'latmax', 'variables']:
+        if key not in config:
+            raise Exception("Missing " + key + " in " + cfg_file)
+    return config
+
+# ------------------------------------------------------------------------------
+def _parse_date(text):
+    """ parses YYYY-MM-DD or YYYY-MM-DD HH:MM:SS """
+    for date_format in ('%Y-%m-%d %H:%M:%S', DATE_FORMAT):
+        try:
+            return datetime.datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    raise Exception("Unrecognised date: " + text)
+
+# ------------------------------------------------------------------------------
+def time_slices(date_min, date_max, slice_days):
+    """ consecutive, non-overlapping (start, end) day ranges covering a period """
+    start = _parse_date(date_min)
+    end = _parse_date(date_max)
+    slices = []
+    while start <= end:
+        stop = min(start + datetime.timedelta(days=slice_days) \
+                   - datetime.timedelta(seconds=1), end)
+        slices.append((start, stop))
+        start = stop + datetime.timedelta(seconds=1)
+    return slices
+
+# ------------------------------------------------------------------------------
+def depth_slices(config):
+    """ (depth_min, depth_max) ranges from the depth_min/depth_max/depth_levels keys
+
+        depth_levels = 0,100,500,1000 gives three slices (choose levels between
+        model depths, as the bounds are inclusive); without depth keys a
+        single (None, None) slice is returned (surface products).
+    """
+    if 'depth_levels' in config:
+        levels = [float(level) for level in config['depth_levels'].split(',')]
+        return list(zip(levels[:-1], levels[1:]))
+    if 'depth_min' in config and 'depth_max' in config:
+        return [(float(config['depth_min']), float(config['depth_max']))]
+    return [(None, None)]
+
+# ------------------------------------------------------------------------------
+def motu_command(config, start, stop, depth, out_dir, out_name, user, pwd, size=False):
+    """ motuclient command line of one slice """
+    command = [sys.executable, '-m', 'motuclient', '--quiet',
+               '--motu', config.get('motu', DEFAULT_MOTU),
+               '--service-id', config['service_id'],
+               '--product-id', config['product_id'],
+               '--longitude-min', config['lonmin'], '--longitude-max', config['lonmax'],
+               '--latitude-min', config['latmin'], '--latitude-max', config['latmax'],
+               '--date-min', start.strftime('%Y-%m-%d %H:%M:%S'),
+               '--date-max', stop.strftime('%Y-%m-%d %H:%M:%S'),
+               '--out-dir', out_dir, '--out-name', out_name,
+               '--user', user, '--pwd', pwd]
+    if depth[0] is not None:
+        command = command + ['--depth-min', str(depth[0]), '--depth-max', str(depth[1])]
+    for variable in config['variables'].split(','):
+        command = command + ['--variable', variable.strip()]
+    if size:
+        command.append('--size')
+    return command
+
+# ------------------------------------------------------------------------------
+def request_size_mb(config, out_dir, user, pwd):
+    """ server size estimate (MB) of the whole request, None if unavailable """
+    start = _parse_date(config['date_min'])
+    stop = _parse_date(config['date_max'])
+    out_name = config['product_id'] + '_size.xml'
+    try:
+        subprocess.run(motu_command(config, start, stop, depth_slices(config)[0], \
+                       out_dir, out_name, user, pwd, size=True), check=True, \
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        root = ET.parse(os.path.join(out_dir, out_name)).getroot()
+        size = float(root.get('size'))
+        unit = root.get('unit', 'kb').lower()
+        scale = {'b': 1e-6, 'kb': 1e-3, 'mb': 1.0, 'gb': 1e3}.get(unit, 1e-3)
+        return size * scale
+    except Exception as error:
+        print("Could not get the request size (" + str(error) + ")")
+        return None
+    finally:
+        if os.path.exists(os.path.join(out_dir, out_name)):
+            os.remove(os.path.join(out_dir, out_name))
+
+# ------------------------------------------------------------------------------
+def slice_name(config, start, stop, depth):
+    """ output file name of one slice """
+    name = config['product_id'] + '_' + start.strftime('%Y%m%d') \
+           + '_' + stop.strftime('%Y%m%d')
+    if depth[0] is not None:
+        name = name + '_z%g-%g' % depth
+    return name + '.nc'
+
+# ------------------------------------------------------------------------------
+def is_complete(path):
+    """ checks that a finished slice exists and looks like a netCDF file """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    with open(path, 'rb') as nc_file:
+        magic = nc_file.read(4)
+    return magic[:3] == b'CDF' or magic == b'\x89HDF'
+
+# ------------------------------------------------------------------------------
+def fetch_slice(config, start, stop, depth, out_dir, user, pwd, retries=DEFAULT_RETRIES):
+    """ downloads one slice to a .part file and renames it when complete """
+    name = slice_name(config, start, stop, depth)
+    path = os.path.join(out_dir, name)
+    if is_complete(path):
+        return path, 'skipped'
+
+    part_name = name + '.part'
+    for attempt in range(retries):
+        if os.path.exists(os.path.join(out_dir, part_name)):
+            os.remove(os.path.join(out_dir, part_name))
+        result = subprocess.run(motu_command(config, start, stop, depth, out_dir, \
+                                part_name, user, pwd), stdout=subprocess.PIPE, \
+                                stderr=subprocess.STDOUT, universal_newlines=True)
+        if result.returncode == 0 and is_complete(os.path.join(out_dir, part_name)):
+            os.replace(os.path.join(out_dir, part_name), path)
+            return path, 'downloaded'
+        print("Attempt %i failed for %s: %s" % (attempt + 1, name, \
+              result.stdout.strip().split('\n')[-1] if result.stdout else ''))
+        time.sleep(2**attempt)
+    raise Exception("Failed to download " + name)
+
+# ------------------------------------------------------------------------------
+def fetch(config, out_dir, user, pwd, workers=DEFAULT_WORKERS):
+    """ downloads all slices of a request concurrently
+
+        output:
+        (sorted list of the slice files that are complete,
+         names of the slices that failed)
+    """
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    slice_days = config.get('slice_days', str(DEFAULT_SLICE_DAYS))
+    if slice_days == 'auto':
+        total_days = (_parse_date(config['date_max']) \
+                      - _parse_date(config['date_min'])).days + 1
+        max_size = float(config.get('max_size_mb', DEFAULT_MAX_SIZE_MB))
+        size = request_size_mb(config, out_dir, user, pwd)
+        if size is None or size <= 0:
+            slice_days = DEFAULT_SLICE_DAYS
+        else:
+            # size covers all depth slices: divide it among them first
+            size = size / len(depth_slices(config))
+            slice_days = max(1, int(total_days / math.ceil(size / max_size)))
+        print("Using %i day slices" % slice_days)
+    slices = [(start, stop, depth) \
+              for start, stop in time_slices(config['date_min'], config['date_max'], \
+                                             int(slice_days)) \
+              for depth in depth_slices(config)]
+    print("Request split into %i slices" % len(slices))
+
+    done = []
+    missing = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_slice, config, start, stop, depth, out_dir, \
+                   user, pwd): slice_name(config, start, stop, depth) \
+                   for start, stop, depth in slices}
+        for future in as_completed(futures):
+            try:
+                path, status = future.result()
+            except Exception as error:
+                print(str(error))
+                missing.append(futures[future])
+                continue
+            print(status.capitalize() + ": " + futures[future])
+            done.append(path)
+
+    if missing:
+        print("%i slices missing, run again to resume" % len(missing))
+    return sorted(done), sorted(missing)
+
+# ------------------------------------------------------------------------------
+def merge_slices(files, out_file=None):
+    """ opens the slices as one lazily loaded (dask backed) dataset
+
+        if out_file is given the merged dataset is written chunk by chunk.
+    """
+    import xarray as xr
+
+    dataset = xr.open_mfdataset(sorted(files), combine='by_coords', chunks={})
+    if out_file is not None:
+        dataset.to_netcdf(out_file)
+    return dataset
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Concurrent time-sliced CMEMS downloader")
+    parser.add_argument("-c", "--config", type=str, default="CMEMS_download.cfg", \
+                        help="download configuration file")
+    parser.add_argument("-o", "--out_dir", type=str, default=".", \
+                        help="output directory for the slices")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, \
+                        help="number of concurrent requests")
+    parser.add_argument("--merge", type=str, default=None, \
+                        help="merge the slices into this file")
+    args = parser.parse_args()
+
+    config = parse_cfg(args.config)
+    user = os.environ.get('CMEMS_USER') or input('CMEMS user: ')
+    pwd = os.environ.get('CMEMS_PWD') or getpass.getpass('CMEMS password: ')
+
+    files, missing = fetch(config, args.out_dir, user, pwd, workers=args.workers)
+    if missing:
+        # a merge of the complete slices only would silently leave gaps
+        if args.merge is not None:
+            print("Not merging: %i slices missing" % len(missing))
+        sys.exit(1)
+    if args.merge is not None and files:
+        merge_slices(files, out_file=os.path.join(args.out_dir, args.merge))
+        print("Merged into " + os.path.join(args.out_dir, args.merge))
+
+if __name__ == "__main__":
+    main()
@@ -4,54 +4,210 @@ In your terminal, run the command:
 
 python download_gdrive.py GoogleFileID /path/for/this/file/to/download/file.type
 
-Credited to 
+or, to fetch many files concurrently from a manifest:
+
+python download_gdrive.py --manifest test_data.csv --workers 4
+
+The manifest is a csv file with the columns id,destination and optionally
+size (bytes) and md5. Partial downloads are kept as <destination>.part and
+resumed with HTTP Range requests (a partial file failing the md5 check is
+deleted); complete files (matching size/md5 when given) are skipped.
+
+Credited to
 https://stackoverflow.com/questions/25010369/wget-curl-large-file-from-google-drive
 author: https://stackoverflow.com/users/1475331/user115202
 '''
 
+import os
+import re
+import csv
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from tqdm import tqdm
 
-def download_file_from_google_drive(id, destination):
-    def get_confirm_token(response):
-        for key, value in response.cookies.items():
-            if key.startswith('download_warning'):
-                return value
+URL = "https://docs.google.com/uc?export=download"
+CONFIRM_URL = "https://drive.usercontent.google.com/download"
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_WORKERS = 4
 
-        return None
+def get_confirm_params(response):
+    # older drive pages set a cookie, newer ones return a confirmation form
+    for key, value in response.cookies.items():
+        if key.startswith('download_warning'):
+            return URL, {'confirm' : value}
 
-    def save_response_content(response, destination):
-        CHUNK_SIZE = 32768
+    if 'text/html' in response.headers.get('Content-Type', ''):
+        page = response.text
+        params = dict(re.findall(r'name="(confirm|uuid|at)" value="([^"]*)"', page))
+        if params:
+            return CONFIRM_URL, params
 
-        with open(destination, "wb") as f:
-            with tqdm(unit='B', unit_scale=True, unit_divisor=1024) as bar:
-                for chunk in response.iter_content(CHUNK_SIZE):
-                    if chunk:  # filter out keep-alive new chunks
-                        f.write(chunk)
-                        bar.update(CHUNK_SIZE)
+    return None, None
 
-    URL = "https://docs.google.com/uc?export=download"
+def file_md5(filename):
+    md5 = hashlib.md5()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
 
-    session = requests.Session()
+def is_complete(destination, size=None, md5=None):
+    if not os.path.exists(destination):
+        return False
+    if size is not None and os.path.getsize(destination) != size:
+        return False
+    if md5 is not None and file_md5(destination) != md5.lower():
+        return False
+    return True
+
+def open_download(session, id, offset):
+    # requests the file from offset onwards, following the large file warning
+    headers = {'Range' : 'bytes=%i-' % offset} if offset > 0 else {}
+    response = session.get(URL, params = { 'id' : id }, headers = headers,
+                           stream = True)
+    url, params = get_confirm_params(response)
+
+    if url:
+        response.close()
+        params.update({ 'id' : id, 'export' : 'download' })
+        response = session.get(url, params = params, headers = headers,
+                               stream = True)
+
+    # 416: nothing left after offset, the partial file is already complete
+    if offset > 0 and response.status_code == 416:
+        return response
+    response.raise_for_status()
+    if 'text/html' in response.headers.get('Content-Type', ''):
+        response.close()
+        raise Exception("Google Drive returned a web page instead of file " + id
+                        + " (check the ID and sharing settings)")
+    return response
+
+def download_file_from_google_drive(id, destination, size=None, md5=None,
+                                    session=None, bar=None):
+    if is_complete(destination, size, md5):
+        return destination, 'skipped'
+
+    if session is None:
+        session = requests.Session()
+
+    folder = os.path.dirname(os.path.abspath(destination))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
 
-    response = session.get(URL, params = { 'id' : id }, stream = True)
-    token = get_confirm_token(response)
+    part_file = destination + '.part'
+    offset = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+    if size is not None and offset > size:
+        offset = 0
 
-    if token:
-        params = { 'id' : id, 'confirm' : token }
-        response = session.get(URL, params = params, stream = True)
+    # a full size partial file (e.g. interrupted before the rename) is only
+    # checked, as a range request past its end would fail
+    if size is not None and offset == size:
+        return finish_download(part_file, destination, size, md5, bar)
 
-    save_response_content(response, destination)    
+    response = open_download(session, id, offset)
+    if response.status_code == 416:
+        response.close()
+        return finish_download(part_file, destination, size, md5, bar)
+    if offset > 0 and response.status_code != 206:
+        # range not honoured: start again from the beginning
+        offset = 0
+
+    if bar is not None and offset > 0:
+        bar.update(offset)
+
+    with open(part_file, "ab" if offset > 0 else "wb") as f:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if chunk:  # filter out keep-alive new chunks
+                f.write(chunk)
+                if bar is not None:
+                    bar.update(len(chunk))
+    response.close()
+
+    return finish_download(part_file, destination, size, md5)
+
+def finish_download(part_file, destination, size=None, md5=None, bar=None):
+    # renames a verified partial file; a short one is kept to resume, a
+    # corrupt one (wrong md5 or too long) is deleted to start again
+    if is_complete(part_file, size, md5):
+        if bar is not None:
+            bar.update(os.path.getsize(part_file))
+        os.replace(part_file, destination)
+        return destination, 'downloaded'
+    if size is not None and os.path.getsize(part_file) < size:
+        raise Exception("Size mismatch for " + destination
+                        + " (partial file kept, run again to resume)")
+    os.remove(part_file)
+    raise Exception("Size or checksum mismatch for " + destination
+                    + " (partial file deleted, run again to download it again)")
+
+def read_manifest(manifest):
+    entries = []
+    with open(manifest) as f:
+        for row in csv.DictReader(f):
+            if not row.get('id') or row['id'].startswith('#'):
+                continue
+            entries.append({'id' : row['id'].strip(),
+                            'destination' : row['destination'].strip(),
+                            'size' : int(row['size']) if row.get('size') else None,
+                            'md5' : row['md5'].strip() if row.get('md5') else None})
+    return entries
+
+def download_manifest(entries, workers=DEFAULT_WORKERS):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount('https://', adapter)
+
+    total = None
+    if all(entry['size'] is not None for entry in entries):
+        total = sum(entry['size'] for entry in entries)
+
+    failed = []
+    with tqdm(total=total, unit='B', unit_scale=True, unit_divisor=1024) as bar:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(download_file_from_google_drive,
+                                       entry['id'], entry['destination'],
+                                       size=entry['size'], md5=entry['md5'],
+                                       session=session, bar=bar): entry
+                       for entry in entries}
+            for future in as_completed(futures):
+                entry = futures[future]
+                try:
+                    destination, status = future.result()
+                    if status == 'skipped' and entry['size'] is not None:
+                        bar.update(entry['size'])
+                    bar.write(status.capitalize() + ': ' + destination)
+                except Exception as error:
+                    failed.append(entry)
+                    bar.write('Failed: ' + entry['destination'] + ' (' + str(error) + ')')
+    return failed
 
 
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) is not 3:
-        print("Usage: python google_drive.py drive_file_id destination_file_path")
+    parser = argparse.ArgumentParser(
+        description="Download files from Google Drive",
+        usage="python download_gdrive.py drive_file_id destination_file_path\n"
+              "       python download_gdrive.py --manifest manifest.csv [--workers N]")
+    # TAKE ID FROM SHAREABLE LINK
+    parser.add_argument("file_id", nargs='?', help="Google Drive file ID")
+    # DESTINATION FILE ON YOUR DISK
+    parser.add_argument("destination", nargs='?', help="destination file path")
+    parser.add_argument("--manifest", help="csv file with id,destination[,size,md5]")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="number of concurrent downloads")
+    args = parser.parse_args()
+
+    if args.manifest:
+        failed = download_manifest(read_manifest(args.manifest), workers=args.workers)
+        if failed:
+            print(str(len(failed)) + " downloads failed, run again to resume")
+    elif args.file_id and args.destination:
+        with tqdm(unit='B', unit_scale=True, unit_divisor=1024) as bar:
+            download_file_from_google_drive(args.file_id, args.destination, bar=bar)
     else:
-        # TAKE ID FROM SHAREABLE LINK
-        file_id = sys.argv[1]
-        # DESTINATION FILE ON YOUR DISK
-        destination = sys.argv[2]
-        download_file_from_google_drive(file_id, destination)
+        parser.print_usage()
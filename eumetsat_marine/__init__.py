@@ -0,0 +1,71 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Shared processing tools for the EUMETSAT Sentinel-3 marine training code.
+
+The most used functions are available from the package itself, e.g.
+
+    from eumetsat_marine import flag_data_fast, spheric_dist, find_products
+
+Submodules are only imported when one of their functions is first used, so
+importing the package is cheap and heavy dependencies (netCDF4, scipy,
+matplotlib, cartopy) are only loaded by the functions that need them.
+"""
+import importlib
+
+__version__ = '1.0'
+
+# stable API: name -> submodule
+_API = {
+    # readers / file discovery
+    "find_files": "readers", "find_products": "readers", "read_rows": "readers",
+    "read_variables": "readers", "read_flags": "readers", "read_product": "readers",
+    "open_compact": "readers", "decode_compact": "readers",
+    # flags
+    "flag_bits": "flags", "flag_data_fast": "flags", "read_flag_meanings": "flags",
+    "OLCI_L2_CHL_FLAGS": "flags",
+    # geolocation
+    "lonlat_to_xyz": "geo", "haversine": "geo", "spheric_dist": "geo",
+    "EARTH_RADIUS": "geo",
+    # statistics
+    "RunningStats": "statistics", "QuantileSketch": "statistics",
+    "streaming_stats": "statistics", "std_limits": "statistics",
+    "percentile_limits": "statistics", "symmetric_limit": "statistics",
+    "clip_colormap": "statistics",
+    # gridding, file names and maps
+    "define_grid": "resample", "bin_to_grid": "resample", "binned_mean": "resample",
+    "decode_filenames": "filenames", "land_feature": "plotting", "add_land": "plotting",
+    # downloaded products
+    "crop_product": "crop", "read_tie_variable": "tie_points",
+    "read_tie_variables": "tie_points", "toa_reflectance": "tie_points",
+    # regional datacubes
+    "update_cube": "datacube", "read_timeseries": "datacube",
+    # notebook batch runs
+    "run_notebook": "notebook_runner", "run_grid": "notebook_runner",
+    }
+
+_SUBMODULES = ["altimetry_index", "archive", "benchmark", "chl_comparison", "collocation",
+               "crop", "datacube", "filenames", "flags", "geo", "notebook_runner",
+               "plotting", "quicklook", "readers", "resample", "slstr_sst", "sral_sla",
+               "statistics", "tie_points", "waveforms"]
+
+__all__ = sorted(_API)
+
+# ------------------------------------------------------------------------------
+def __getattr__(name):
+    """ imports the submodule of an API name (or a submodule) on first use """
+    if name in _SUBMODULES:
+        return importlib.import_module(__name__ + '.' + name)
+    if name in _API:
+        value = getattr(importlib.import_module(__name__ + '.' + _API[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module " + __name__ + " has no attribute " + name)
+
+# ------------------------------------------------------------------------------
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,353 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Persistent spatial/temporal index of along-track altimetry points.
+
+Every track file of an archive (SRAL SR_2_WAT standard_measurement.nc at 1 Hz
+and 20 Hz, Jason-3 GDR files at 1 Hz and 20 Hz) is cut into segments of
+consecutive points that fall in the same lat/lon cell. Each segment is stored
+in an SQLite database with its file, index range, cell and time range, so
+
+    "all altimetry points within 25 km and +/-3 h of this OLCI pixel"
+
+becomes an indexed lookup of a handful of cells and a time window; only the
+candidate slices of the candidate files are opened to compute exact
+distances. Re-running the build only indexes new or modified files.
+
+Usage:
+
+    python -m eumetsat_marine.altimetry_index build -r <archive root> -d altimetry.db
+    python -m eumetsat_marine.altimetry_index query -d altimetry.db \\
+        --lon -30.5 --lat 40.2 --time 2017-08-09T15:00:00 --radius 25 --hours 3
+"""
+import os
+import fnmatch
+import sqlite3
+import argparse
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from eumetsat_marine import readers
+from eumetsat_marine.geo import haversine, EARTH_RADIUS
+
+DEFAULT_CELL_SIZE = 1.0
+DEFAULT_RADIUS = 25000.0
+DEFAULT_WINDOW = 3 * 3600.0
+
+# point sets indexed per file type: file pattern and time/lat/lon variables
+SOURCES = {
+    "sral_01": {"pattern": "standard_measurement.nc",
+                "time": "time_01", "lat": "lat_01", "lon": "lon_01"},
+    "sral_20": {"pattern": "standard_measurement.nc",
+                "time": "time_20_ku", "lat": "lat_20_ku", "lon": "lon_20_ku"},
+    "jason_01": {"pattern": "JA3_*.nc",
+                 "time": "time", "lat": "lat", "lon": "lon"},
+    "jason_20": {"pattern": "JA3_*.nc",
+                 "time": "time_20hz", "lat": "lat_20hz", "lon": "lon_20hz"},
+    }
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE,
+                                  mtime REAL, size INTEGER);
+CREATE TABLE IF NOT EXISTS segments (file_id INTEGER, source TEXT, cell INTEGER,
+                                     start INTEGER, stop INTEGER,
+                                     time_min REAL, time_max REAL);
+CREATE INDEX IF NOT EXISTS segments_cell ON segments (cell, time_min, time_max);
+CREATE INDEX IF NOT EXISTS segments_file ON segments (file_id);
+"""
+
+# ------------------------------------------------------------------------------
+def to_unix_time(value):
+    """ converts a datetime, ISO string or number to seconds since 1970 """
+    if isinstance(value, str):
+        value = datetime.datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None) - value.utcoffset()
+        return (value - EPOCH).total_seconds()
+    return float(value)
+
+# ------------------------------------------------------------------------------
+def _time_offset(units):
+    """ offset (s) to convert 'seconds since <epoch>' times to unix time """
+    import netCDF4 as nc
+    if not units.startswith('seconds since'):
+        raise Exception("Unsupported time units: " + units)
+    epoch = nc.num2date(0, units, only_use_cftime_datetimes=False, \
+                        only_use_python_datetimes=True)
+    return (epoch - EPOCH).total_seconds()
+
+# ------------------------------------------------------------------------------
+def cell_id(lon, lat, cell_size=DEFAULT_CELL_SIZE):
+    """ integer key of the lat/lon cell containing each point """
+    ncols = int(round(360.0 / cell_size))
+    nrows = int(round(180.0 / cell_size))
+    col = np.floor((np.mod(np.asarray(lon) + 180.0, 360.0)) / cell_size).astype(np.int64)
+    row = np.floor((np.asarray(lat) + 90.0) / cell_size).astype(np.int64)
+    return np.clip(row, 0, nrows - 1) * ncols + np.clip(col, 0, ncols - 1)
+
+# ------------------------------------------------------------------------------
+def cells_near(lon, lat, radius, cell_size=DEFAULT_CELL_SIZE):
+    """ keys of all cells that may hold points within radius (m) of a point """
+    ncols = int(round(360.0 / cell_size))
+    nrows = int(round(180.0 / cell_size))
+    dlat = np.rad2deg(radius / EARTH_RADIUS)
+    row1 = int(np.floor((max(lat - dlat, -90.0) + 90.0) / cell_size))
+    row2 = int(np.floor((min(lat + dlat, 90.0) + 90.0) / cell_size))
+    rows = np.arange(max(row1, 0), min(row2, nrows - 1) + 1)
+
+    cos_lat = np.cos(np.deg2rad(min(abs(lat) + dlat, 90.0)))
+    if cos_lat < 1e-6 or dlat / cos_lat >= 180.0:
+        cols = np.arange(ncols)
+    else:
+        dlon = dlat / cos_lat
+        col1 = int(np.floor((lon - dlon + 180.0) / cell_size))
+        col2 = int(np.floor((lon + dlon + 180.0) / cell_size))
+        # modulo handles boxes crossing the antimeridian
+        cols = np.unique(np.mod(np.arange(col1, col2 + 1), ncols))
+    return (rows[:, None] * ncols + cols[None, :]).ravel().tolist()
+
+# ------------------------------------------------------------------------------
+def _read_points(nc_fid, source, start=None, stop=None):
+    """ reads flattened time (unix s), lat and lon of a source, optionally
+        only the flat index range start:stop
+    """
+    variables = nc_fid.variables
+    names = SOURCES[source]
+    offset = _time_offset(variables[names["time"]].units)
+
+    values = []
+    for name in (names["time"], names["lat"], names["lon"]):
+        variable = variables[name]
+        if start is None:
+            data = variable[:]
+        elif variable.ndim == 1:
+            data = variable[start:stop]
+        else:
+            # 2D (time, 20) 20 Hz arrays: read the covering rows only
+            ncols = variable.shape[1]
+            data = variable[start // ncols:(stop - 1) // ncols + 1, :]
+            data = data.ravel()[start - (start // ncols) * ncols:][:stop - start]
+        values.append(np.ma.filled(np.ma.asarray(data, dtype=np.float64).ravel(), np.nan))
+    values[0] = values[0] + offset
+    return values
+
+# ------------------------------------------------------------------------------
+def file_segments(path, cell_size=DEFAULT_CELL_SIZE, sources=None):
+    """ splits the points of a track file into single-cell segments
+
+        output:
+        list of (source, cell, start, stop, time_min, time_max) tuples
+    """
+    import netCDF4 as nc
+
+    segments = []
+    with nc.Dataset(path, 'r') as nc_fid:
+        for source in (sources or SOURCES):
+            names = SOURCES[source]
+            if not fnmatch.fnmatch(os.path.basename(path), names["pattern"]) \
+               or names["lat"] not in nc_fid.variables:
+                continue
+            time, lat, lon = _read_points(nc_fid, source)
+            valid = np.isfinite(time) & np.isfinite(lat) & np.isfinite(lon)
+            cells = np.where(valid, cell_id(np.where(valid, lon, 0.0), \
+                             np.where(valid, lat, 0.0), cell_size), -1)
+
+            # a new segment starts wherever the cell changes
+            starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+            stops = np.r_[starts[1:], cells.size]
+            for start, stop in zip(starts, stops):
+                if cells[start] < 0:
+                    continue
+                segment_time = time[start:stop]
+                segments.append((source, int(cells[start]), int(start), int(stop), \
+                                 float(segment_time.min()), float(segment_time.max())))
+    return segments
+
+# ------------------------------------------------------------------------------
+def find_track_files(root_dir, sources=None):
+    """ finds all files below root_dir matching one of the source patterns """
+    patterns = set(SOURCES[source]["pattern"] for source in (sources or SOURCES))
+    return readers.find_files(root_dir, sorted(patterns))
+
+# ------------------------------------------------------------------------------
+def open_index(db_file, cell_size=DEFAULT_CELL_SIZE):
+    """ opens (or creates) an index database """
+    connection = sqlite3.connect(db_file)
+    connection.executescript(SCHEMA)
+    row = connection.execute("SELECT value FROM settings WHERE name = 'cell_size'").fetchone()
+    if row is None:
+        connection.execute("INSERT INTO settings VALUES ('cell_size', ?)", (str(cell_size),))
+        connection.commit()
+    elif float(row[0]) != cell_size:
+        print("Using the cell size of the existing index: " + row[0])
+    return connection
+
+# ------------------------------------------------------------------------------
+def _cell_size(connection):
+    """ cell size an index was built with """
+    return float(connection.execute( \
+        "SELECT value FROM settings WHERE name = 'cell_size'").fetchone()[0])
+
+# ------------------------------------------------------------------------------
+def build_index(root_dir, db_file, cell_size=DEFAULT_CELL_SIZE, sources=None, nprocs=None):
+    """ indexes new or modified track files below root_dir in parallel
+
+        files that disappeared from the archive are removed from the index.
+    """
+    connection = open_index(db_file, cell_size=cell_size)
+    cell_size = _cell_size(connection)
+
+    known = {path: (file_id, mtime, size) for file_id, path, mtime, size in \
+             connection.execute("SELECT id, path, mtime, size FROM files")}
+    track_files = [os.path.abspath(path) for path in find_track_files(root_dir, sources)]
+
+    todo = []
+    for path in track_files:
+        stat = os.stat(path)
+        if path in known and known[path][1] == stat.st_mtime and known[path][2] == stat.st_size:
+            continue
+        todo.append((path, stat.st_mtime, stat.st_size))
+
+    root_prefix = os.path.join(os.path.abspath(root_dir), '')
+    present = set(track_files)
+    removed = [path for path in known if path.startswith(root_prefix) \
+               and path not in present]
+    for path in removed + [item[0] for item in todo if item[0] in known]:
+        connection.execute("DELETE FROM segments WHERE file_id = ?", (known[path][0],))
+        connection.execute("DELETE FROM files WHERE id = ?", (known[path][0],))
+    print("Indexing %i of %i files (%i removed)" % (len(todo), len(track_files), len(removed)))
+
+    with ProcessPoolExecutor(max_workers=nprocs) as executor:
+        futures = [executor.submit(file_segments, item[0], cell_size=cell_size, \
+                   sources=sources) for item in todo]
+        for (path, mtime, size), future in zip(todo, futures):
+            try:
+                segments = future.result()
+            except Exception as error:
+                print("Failed: " + path + " (" + str(error) + ")")
+                continue
+            file_id = connection.execute("INSERT INTO files (path, mtime, size) " \
+                                         "VALUES (?, ?, ?)", (path, mtime, size)).lastrowid
+            connection.executemany("INSERT INTO segments VALUES (?, ?, ?, ?, ?, ?, ?)", \
+                                   [(file_id,) + segment for segment in segments])
+            connection.commit()
+    connection.close()
+
+# ------------------------------------------------------------------------------
+def query(db_file, lon, lat, time=None, radius=DEFAULT_RADIUS, window=DEFAULT_WINDOW, \
+          sources=None):
+    """ all indexed points within radius (m) and, if time is given, within
+        +/- window (s) of a point
+
+        output:
+        dictionary of arrays: path, source, index (flat index in the source
+        variables), lon, lat, time (unix s) and distance (m), sorted by distance
+    """
+    import netCDF4 as nc
+
+    connection = sqlite3.connect(db_file)
+    cells = cells_near(lon, lat, radius, _cell_size(connection))
+
+    sql = "SELECT files.path, segments.source, segments.start, segments.stop " \
+          "FROM segments JOIN files ON files.id = segments.file_id " \
+          "WHERE segments.cell IN (%s)" % ','.join(str(cell) for cell in cells)
+    parameters = []
+    if time is not None:
+        time = to_unix_time(time)
+        sql = sql + " AND segments.time_max >= ? AND segments.time_min <= ?"
+        parameters = [time - window, time + window]
+    if sources:
+        sql = sql + " AND segments.source IN (%s)" % ','.join('?' * len(sources))
+        parameters = parameters + list(sources)
+    candidates = connection.execute(sql + " ORDER BY files.path", parameters).fetchall()
+    connection.close()
+
+    result = {"path": [], "source": [], "index": [], "lon": [], "lat": [], \
+              "time": [], "distance": []}
+    by_file = {}
+    for path, source, start, stop in candidates:
+        by_file.setdefault(path, []).append((source, start, stop))
+
+    for path, segments in by_file.items():
+        with nc.Dataset(path, 'r') as nc_fid:
+            for source, start, stop in segments:
+                point_time, point_lat, point_lon = _read_points(nc_fid, source, start, stop)
+                distance = haversine(lon, lat, point_lon, point_lat)
+                keep = distance <= radius
+                if time is not None:
+                    keep &= np.abs(point_time - time) <= window
+                keep = np.flatnonzero(keep)
+                result["path"].extend([path] * keep.size)
+                result["source"].extend([source] * keep.size)
+                result["index"].append(start + keep)
+                result["lon"].append(point_lon[keep])
+                result["lat"].append(point_lat[keep])
+                result["time"].append(point_time[keep])
+                result["distance"].append(distance[keep])
+
+    for name in ("index", "lon", "lat", "time", "distance"):
+        result[name] = np.concatenate(result[name]) if result[name] else np.empty(0)
+    result["path"] = np.array(result["path"], dtype=object)
+    result["source"] = np.array(result["source"], dtype=object)
+    order = np.argsort(result["distance"], kind='mergesort')
+    return {name: values[order] for name, values in result.items()}
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Along-track altimetry index")
+    subparsers = parser.add_subparsers(dest="command")
+
+    build_parser = subparsers.add_parser("build", help="index an archive")
+    build_parser.add_argument("-r", "--root_dir", type=str, required=True, \
+                              help="archive root directory")
+    build_parser.add_argument("-d", "--db_file", type=str, default="altimetry.db", \
+                              help="index database")
+    build_parser.add_argument("--cell_size", type=float, default=DEFAULT_CELL_SIZE, \
+                              help="cell size (degrees) of a new index")
+    build_parser.add_argument("-n", "--nprocs", type=int, default=None, \
+                              help="number of worker processes")
+
+    query_parser = subparsers.add_parser("query", help="find points near a location")
+    query_parser.add_argument("-d", "--db_file", type=str, default="altimetry.db", \
+                              help="index database")
+    query_parser.add_argument("--lon", type=float, required=True, help="longitude")
+    query_parser.add_argument("--lat", type=float, required=True, help="latitude")
+    query_parser.add_argument("--time", type=str, default=None, \
+                              help="time (YYYY-MM-DDTHH:MM:SS), all times if omitted")
+    query_parser.add_argument("--radius", type=float, default=DEFAULT_RADIUS / 1000.0, \
+                              help="search radius (km)")
+    query_parser.add_argument("--hours", type=float, default=DEFAULT_WINDOW / 3600.0, \
+                              help="time window (+/- hours)")
+    query_parser.add_argument("--sources", type=str, default="", \
+                              help="comma separated sources (" + ','.join(SOURCES) + ")")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(args.root_dir, args.db_file, cell_size=args.cell_size, nprocs=args.nprocs)
+    elif args.command == "query":
+        sources = [source for source in args.sources.split(',') if source != '']
+        result = query(args.db_file, args.lon, args.lat, time=args.time, \
+                       radius=args.radius * 1000.0, window=args.hours * 3600.0, \
+                       sources=sources)
+        print("Found %i points" % len(result["distance"]))
+        for index in range(len(result["distance"])):
+            print("%s %s %i %.4f %.4f %s %.0f m" % (result["path"][index], \
+                  result["source"][index], result["index"][index], \
+                  result["lon"][index], result["lat"][index], \
+                  (EPOCH + datetime.timedelta(seconds=result["time"][index])).isoformat(), \
+                  result["distance"][index]))
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Incremental catalogue of a local Sentinel-3 archive.
+
+Replaces walking the whole tree with os.walk + fnmatch.filter on every run.
+The archive is scanned with os.scandir, one directory level at a time and in
+parallel (so the YYYY/MM/DD directories of the downloader are listed
+concurrently). Directory mtimes are cached in an SQLite catalogue: a directory
+whose mtime has not changed is not listed again, only its known
+sub-directories are visited. Product names are decoded into catalogue columns
+so glob, time range and product type queries never touch the file system.
+
+.SEN3 product directories are catalogued as products, and their member files
+(e.g. Oa01_reflectance.nc) as entries below them; only the product names are
+decoded, so time and type queries return products, not member files. Files
+rewritten in place (same name) do not change their directory mtime, so use
+full=True to pick those up.
+
+Typical use (the os.walk searches of notebooks 13 and 16):
+
+    nc_files = find(os.path.join(input_root, input_path), '*reflectance*.nc')
+    products = query('archive.db', pattern='*OL_2_WFR*',
+                     start='2018-01-01', stop='2018-02-01')
+"""
+import os
+import sqlite3
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from eumetsat_marine.filenames import decode_filenames
+
+DEFAULT_DB_FILE = 'archive.db'
+# find() catalogues, one per root directory, kept outside the scanned tree
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'eumetsat_marine')
+DEFAULT_THREADS = 16
+
+# decoded name columns stored with each entry
+NAME_COLUMNS = ['mission', 'data_source', 'processing_level', 'data_type', \
+                'start', 'stop', 'cycle', 'relative_orbit', 'frame', \
+                'timeliness', 'baseline']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (path TEXT PRIMARY KEY, parent TEXT, mtime REAL);
+CREATE TABLE IF NOT EXISTS entries (path TEXT PRIMARY KEY, directory TEXT, name TEXT,
+                                    is_product_dir INTEGER, size INTEGER, mtime REAL,
+                                    mission TEXT, data_source TEXT,
+                                    processing_level TEXT, data_type TEXT,
+                                    start INTEGER, stop INTEGER, cycle INTEGER,
+                                    relative_orbit INTEGER, frame INTEGER,
+                                    timeliness TEXT, baseline TEXT);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+CREATE INDEX IF NOT EXISTS entries_directory ON entries (directory);
+CREATE INDEX IF NOT EXISTS entries_time ON entries (start, stop);
+CREATE INDEX IF NOT EXISTS entries_type ON entries (data_type, mission);
+"""
+
+# ------------------------------------------------------------------------------
+def _list_directory(path):
+    """ lists one directory: sub-directories to walk and entries to catalogue """
+    subdirs = []
+    entries = []
+    with os.scandir(path) as iterator:
+        for entry in iterator:
+            try:
+                if entry.is_dir():
+                    if entry.name.endswith('.SEN3'):
+                        entries.append((entry.path, entry.name, 1, 0, \
+                                        entry.stat().st_mtime))
+                    subdirs.append(entry.path)
+                else:
+                    stat = entry.stat()
+                    entries.append((entry.path, entry.name, 0, stat.st_size, stat.st_mtime))
+            except OSError:
+                continue
+    return subdirs, entries
+
+# ------------------------------------------------------------------------------
+def _visit(path, cached_mtime, full):
+    """ stats a directory and lists it if it changed
+
+        output:
+        (path, mtime, subdirs, entries); subdirs/entries are None when the
+        directory is unchanged, mtime is None if it disappeared
+    """
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return path, None, None, None
+    if not full and cached_mtime is not None and cached_mtime == mtime:
+        return path, mtime, None, None
+    try:
+        subdirs, entries = _list_directory(path)
+    except OSError:
+        return path, None, None, None
+    return path, mtime, subdirs, entries
+
+# ------------------------------------------------------------------------------
+def open_catalogue(db_file=DEFAULT_DB_FILE):
+    """ opens (or creates) a catalogue database """
+    connection = sqlite3.connect(db_file)
+    connection.executescript(SCHEMA)
+    return connection
+
+# ------------------------------------------------------------------------------
+def _decoded_rows(entries):
+    """ catalogue rows of (path, name, is_product_dir, size, mtime) entries """
+    if not entries:
+        return []
+    table = decode_filenames([entry[1] for entry in entries])
+    columns = []
+    for column in NAME_COLUMNS:
+        values = table[column]
+        if values.dtype.kind == 'M':
+            seconds = values.astype('datetime64[s]').astype(np.int64)
+            columns.append([None if invalid else int(value) for value, invalid \
+                            in zip(seconds, np.isnat(values))])
+        elif values.dtype.kind == 'i':
+            columns.append([None if value < 0 else int(value) for value in values])
+        else:
+            columns.append([value if value != '' else None for value in values.tolist()])
+
+    rows = []
+    for number, (path, name, is_product_dir, size, mtime) in enumerate(entries):
+        decoded = [column[number] for column in columns]
+        if not table["valid"][number]:
+            decoded = [None] * len(NAME_COLUMNS)
+        rows.append([path, os.path.dirname(path), name, is_product_dir, size, mtime] + decoded)
+    return rows
+
+# ------------------------------------------------------------------------------
+def _below(path):
+    """ LIKE pattern (escape character '|') matching everything below path """
+    escaped = path.replace('|', '||').replace('%', '|%').replace('_', '|_')
+    return os.path.join(escaped, '') + '%'
+
+# ------------------------------------------------------------------------------
+def _forget(connection, path):
+    """ removes a directory subtree from the catalogue, returns the number
+        of entries removed
+    """
+    removed = connection.execute("DELETE FROM entries WHERE directory = ? " \
+                                 "OR directory LIKE ? ESCAPE '|'", \
+                                 (path, _below(path))).rowcount
+    connection.execute("DELETE FROM directories WHERE path = ? " \
+                       "OR path LIKE ? ESCAPE '|'", (path, _below(path)))
+    return removed
+
+# ------------------------------------------------------------------------------
+def scan(root_dir, db_file=DEFAULT_DB_FILE, threads=DEFAULT_THREADS, full=False):
+    """ updates the catalogue of root_dir, listing only changed directories
+
+        output:
+        dictionary with the number of directories visited and listed and the
+        number of entries added and removed
+    """
+    root_dir = os.path.abspath(root_dir)
+    connection = open_catalogue(db_file)
+    cached = {path: mtime for path, mtime in connection.execute( \
+              "SELECT path, mtime FROM directories WHERE path = ? " \
+              "OR path LIKE ? ESCAPE '|'", (root_dir, _below(root_dir)))}
+
+    counts = {"visited": 0, "listed": 0, "added": 0, "removed": 0}
+    frontier = [root_dir]
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while frontier:
+            results = list(executor.map(_visit, frontier, \
+                                        [cached.get(path) for path in frontier], \
+                                        [full] * len(frontier)))
+            frontier = []
+            for path, mtime, subdirs, entries in results:
+                counts["visited"] += 1
+                if mtime is None:
+                    counts["removed"] += _forget(connection, path)
+                    continue
+
+                known_subdirs = [row[0] for row in connection.execute( \
+                                 "SELECT path FROM directories WHERE parent = ?", (path,))]
+                if subdirs is None:
+                    # unchanged: only its known sub-directories need a visit
+                    frontier.extend(known_subdirs)
+                    continue
+
+                counts["listed"] += 1
+                for old_subdir in set(known_subdirs) - set(subdirs):
+                    counts["removed"] += _forget(connection, old_subdir)
+
+                known = set(row[0] for row in connection.execute( \
+                            "SELECT path FROM entries WHERE directory = ?", (path,)))
+                present = set(entry[0] for entry in entries)
+                gone = known - present
+                connection.executemany("DELETE FROM entries WHERE path = ?", \
+                                       [(entry,) for entry in gone])
+                new_entries = [entry for entry in entries if entry[0] not in known or full]
+                connection.executemany("INSERT OR REPLACE INTO entries VALUES (%s)" \
+                                       % ','.join('?' * (6 + len(NAME_COLUMNS))), \
+                                       _decoded_rows(new_entries))
+                counts["added"] += len([entry for entry in new_entries if entry[0] not in known])
+                counts["removed"] += len(gone)
+
+                connection.execute("INSERT OR REPLACE INTO directories VALUES (?, ?, ?)", \
+                                   (path, os.path.dirname(path) if path != root_dir \
+                                    else None, mtime))
+                connection.executemany("INSERT OR IGNORE INTO directories VALUES (?, ?, NULL)", \
+                                       [(subdir, path) for subdir in subdirs])
+                frontier.extend(subdirs)
+            connection.commit()
+    connection.close()
+    return counts
+
+# ------------------------------------------------------------------------------
+def _unix_time(value):
+    """ converts an ISO string or datetime to unix seconds """
+    return int(np.datetime64(value, 's').astype(np.int64))
+
+# ------------------------------------------------------------------------------
+def query(db_file=DEFAULT_DB_FILE, root_dir=None, pattern=None, start=None, stop=None, \
+          products_only=False, **criteria):
+    """ catalogue paths matching all the given conditions
+
+        input:
+        root_dir      : only entries below this directory
+        pattern       : glob on the entry name (e.g. '*OL_2_WFR*.SEN3')
+        start, stop   : entries whose sensing time overlaps this range
+        products_only : only entries with a decodable product name
+        criteria      : decoded columns, e.g. mission='S3A',
+                        data_type=['WFR', 'WRR'], timeliness='NT'
+
+        output:
+        sorted list of paths
+    """
+    sql = "SELECT path FROM entries WHERE 1"
+    parameters = []
+    if root_dir is not None:
+        root_dir = os.path.abspath(root_dir)
+        sql = sql + " AND (directory = ? OR directory LIKE ? ESCAPE '|')"
+        parameters = parameters + [root_dir, _below(root_dir)]
+    if pattern is not None:
+        sql = sql + " AND name GLOB ?"
+        parameters.append(pattern)
+    if start is not None:
+        sql = sql + " AND stop >= ?"
+        parameters.append(_unix_time(start))
+    if stop is not None:
+        sql = sql + " AND start <= ?"
+        parameters.append(_unix_time(stop))
+    if products_only:
+        sql = sql + " AND start IS NOT NULL"
+    for column, value in criteria.items():
+        if column not in NAME_COLUMNS:
+            raise Exception("Unknown catalogue column: " + column)
+        if isinstance(value, (list, tuple, set)):
+            sql = sql + " AND %s IN (%s)" % (column, ','.join('?' * len(value)))
+            parameters = parameters + list(value)
+        else:
+            sql = sql + " AND %s = ?" % column
+            parameters.append(value)
+
+    connection = open_catalogue(db_file)
+    paths = [row[0] for row in connection.execute(sql + " ORDER BY path", parameters)]
+    connection.close()
+    return paths
+
+# ------------------------------------------------------------------------------
+def find(root_dir, pattern, db_file=None, **kwargs):
+    """ drop-in for the notebook os.walk + fnmatch.filter file search
+
+        updates the catalogue incrementally, then queries it. The catalogue
+        defaults to a file of CACHE_DIR named after root_dir, so read-only
+        archives work and the scan does not change the archive mtimes.
+    """
+    if db_file is None:
+        if not os.path.exists(CACHE_DIR):
+            os.makedirs(CACHE_DIR)
+        key = hashlib.sha1(os.path.abspath(root_dir).encode('utf-8')).hexdigest()[:16]
+        db_file = os.path.join(CACHE_DIR, 'archive_' + key + '.db')
+    scan(root_dir, db_file=db_file)
+    return query(db_file, root_dir=root_dir, pattern=pattern, **kwargs)
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Incremental archive catalogue")
+    subparsers = parser.add_subparsers(dest="command")
+
+    scan_parser = subparsers.add_parser("scan", help="update the catalogue")
+    scan_parser.add_argument("-r", "--root_dir", type=str, required=True, \
+                             help="archive root directory")
+    scan_parser.add_argument("-d", "--db_file", type=str, default=DEFAULT_DB_FILE, \
+                             help="catalogue database")
+    scan_parser.add_argument("-t", "--threads", type=int, default=DEFAULT_THREADS, \
+                             help="number of scanning threads")
+    scan_parser.add_argument("--full", action="store_true", \
+                             help="list every directory, ignoring cached mtimes")
+
+    query_parser = subparsers.add_parser("query", help="query the catalogue")
+    query_parser.add_argument("-d", "--db_file", type=str, default=DEFAULT_DB_FILE, \
+                              help="catalogue database")
+    query_parser.add_argument("-p", "--pattern", type=str, default=None, \
+                              help="name glob, e.g. '*OL_2_WFR*'")
+    query_parser.add_argument("--start", type=str, default=None, \
+                              help="start of the time range (YYYY-MM-DDTHH:MM:SS)")
+    query_parser.add_argument("--stop", type=str, default=None, \
+                              help="end of the time range (YYYY-MM-DDTHH:MM:SS)")
+    query_parser.add_argument("--mission", type=str, default=None, help="e.g. S3A")
+    query_parser.add_argument("--data_type", type=str, default=None, help="e.g. WFR")
+    args = parser.parse_args()
+
+    if args.command == "scan":
+        counts = scan(args.root_dir, db_file=args.db_file, threads=args.threads, \
+                      full=args.full)
+        print("Visited %i directories, listed %i, %i entries added, %i removed" % \
+              (counts["visited"], counts["listed"], counts["added"], counts["removed"]))
+    elif args.command == "query":
+        criteria = {}
+        if args.mission is not None:
+            criteria["mission"] = args.mission
+        if args.data_type is not None:
+            criteria["data_type"] = args.data_type
+        for path in query(args.db_file, pattern=args.pattern, start=args.start, \
+                          stop=args.stop, **criteria):
+            print(path)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
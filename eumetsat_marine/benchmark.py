@@ -0,0 +1,436 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Time and peak memory benchmarks of the shared hot-path functions.
+
+Runs each function on synthetic OLCI FR (4091 x 4865), SLSTR 1 km
+(1200 x 1500) and SRAL 20 Hz (one pass) shaped arrays, so results are
+comparable between machines and commits without any test data:
+
+    python -m eumetsat_marine.benchmark --csv bench.csv
+    python -m eumetsat_marine.benchmark --baseline bench.csv -k flag
+
+--scale shrinks (or grows) the swath dimensions, --baseline compares with
+a previous csv and exits with an error when a case is slower than
+--tolerance times its baseline. The same cases run as a pytest-benchmark
+suite in tests/test_benchmarks.py. Peak memory is the tracemalloc peak of a
+separate run (numpy reports its allocations to tracemalloc).
+
+--loaders compares the peak RSS of loading a synthetic OLCI FR and RR
+product (geolocation, WQSF, CHL_NN, three reflectances, stored with the
+product data types) the notebook way (xr.open_dataset defaults, float
+flag mask) and with readers.open_compact (float32, native flags, boolean
+mask). Each load runs in its own process:
+
+    python -m eumetsat_marine.benchmark --loaders
+"""
+import os
+import sys
+import csv
+import time
+import shutil
+import argparse
+import tempfile
+import importlib
+import subprocess
+import tracemalloc
+import numpy as np
+
+from eumetsat_marine.statistics import write_table
+
+OLCI_FR_SHAPE = (4091, 4865)
+OLCI_RR_SHAPE = (1023, 1217)
+SLSTR_1KM_SHAPE = (1200, 1500)
+SRAL_20HZ_POINTS = 60000
+NAMES = 100000
+
+DEFAULT_SCALE = 0.5
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 1.25
+
+# ------------------------------------------------------------------------------
+def _swath(shape, lon0, lat0, width, height):
+    """ synthetic tilted swath coordinates (degrees) with a few fill values """
+    rows, cols = np.meshgrid(np.linspace(0, 1, shape[0]), np.linspace(0, 1, shape[1]), \
+                             indexing='ij')
+    lon = lon0 + width * cols + 0.2 * width * rows
+    lat = lat0 + height * rows - 0.05 * height * cols
+    lon[:, :2] = np.nan
+    return lon, lat
+
+# ------------------------------------------------------------------------------
+def synthetic_olci(scale=DEFAULT_SCALE, seed=0):
+    """ OLCI FR shaped lon/lat, log10 CHL (with NaN) and uint64 WQSF flags """
+    from eumetsat_marine.flags import OLCI_L2_CHL_FLAGS
+
+    random = np.random.default_rng(seed)
+    shape = (max(1, int(OLCI_FR_SHAPE[0] * scale)), max(1, int(OLCI_FR_SHAPE[1] * scale)))
+    lon, lat = _swath(shape, -10.0, 35.0, 12.0, 10.0)
+    chl = random.normal(-0.5, 0.4, shape).astype(np.float32)
+    chl[random.random(shape) < 0.3] = np.nan
+    flag_names = OLCI_L2_CHL_FLAGS + ['LAND', 'COASTLINE', 'WATER']
+    flag_values = (np.uint64(1) << np.arange(len(flag_names), dtype=np.uint64))
+    wqsf = random.integers(0, 2**len(flag_names), shape, dtype=np.uint64) \
+           & random.integers(0, 2**len(flag_names), shape, dtype=np.uint64)
+    return {"lon": lon, "lat": lat, "chl": chl, "wqsf": wqsf, \
+            "flag_names": flag_names, "flag_values": flag_values}
+
+# ------------------------------------------------------------------------------
+def synthetic_slstr(scale=DEFAULT_SCALE, seed=1):
+    """ SLSTR 1 km shaped lon/lat and SST (K, with NaN) """
+    random = np.random.default_rng(seed)
+    shape = (max(1, int(SLSTR_1KM_SHAPE[0] * scale)), max(1, int(SLSTR_1KM_SHAPE[1] * scale)))
+    lon, lat = _swath(shape, -12.0, 33.0, 16.0, 12.0)
+    sst = (290.0 + random.normal(0, 2, shape)).astype(np.float32)
+    sst[random.random(shape) < 0.4] = np.nan
+    return {"lon": lon, "lat": lat, "sst": sst}
+
+# ------------------------------------------------------------------------------
+def synthetic_sral(points=SRAL_20HZ_POINTS, seed=2):
+    """ SRAL 20 Hz shaped along-track lon/lat (one pass over the OLCI swath) """
+    random = np.random.default_rng(seed)
+    lat = np.linspace(30.0, 50.0, points)
+    lon = -4.0 + 0.3 * (lat - 30.0) + random.normal(0, 1e-4, points)
+    return {"lon": lon, "lat": lat}
+
+# ------------------------------------------------------------------------------
+def synthetic_names(count=NAMES, seed=3):
+    """ valid Sentinel-3 product names with varying times, orbits and frames """
+    random = np.random.default_rng(seed)
+    template = "S3%s_OL_2_WFR____201801%02iT10%02i00_201801%02iT10%02i00_" \
+               + "20180104T120000_0180_%03i_%03i_%04i_MAR_O_NT_002.SEN3"
+    names = []
+    for _ in range(count):
+        day, minute = random.integers(1, 28), random.integers(0, 57)
+        names.append(template % ('AB'[random.integers(0, 2)], day, minute, day, \
+                     minute + 3, random.integers(0, 999), random.integers(0, 999), \
+                     random.integers(0, 9999)))
+    return names
+
+# ------------------------------------------------------------------------------
+def cases(scale=DEFAULT_SCALE):
+    """ list of (name, sensor, shape, setup) benchmark cases
+
+        setup() builds the inputs and returns the function to time, so the
+        synthetic data generation is not measured.
+    """
+    from eumetsat_marine import flags, geo, statistics, quicklook, resample, \
+                                collocation, filenames
+
+    def olci():
+        return synthetic_olci(scale)
+
+    def slstr():
+        return synthetic_slstr(scale)
+
+    def flag_case():
+        data = olci()
+        return lambda: flags.flag_data_fast(flags.OLCI_L2_CHL_FLAGS, data["flag_names"], \
+                                            data["flag_values"], data["wqsf"])
+
+    def spheric_case():
+        data = olci()
+        return lambda: geo.spheric_dist(data["lat"], 40.0, data["lon"], -5.0)
+
+    def haversine_case():
+        data = olci()
+        return lambda: geo.haversine(data["lon"], data["lat"], -5.0, 40.0)
+
+    def xyz_case():
+        data = olci()
+        return lambda: geo.lonlat_to_xyz(data["lon"], data["lat"])
+
+    def stats_case():
+        data = olci()
+        return lambda: statistics.streaming_stats(data["chl"], quantiles=True)
+
+    def limits_case():
+        data = olci()
+        return lambda: statistics.std_limits(data["chl"])
+
+    def pyramid_case():
+        data = olci()
+        return lambda: quicklook.build_pyramid(data["chl"])
+
+    def bin_case():
+        data = slstr()
+        grid = resample.define_grid(-12.0, 8.0, 32.0, 46.0, 0.05)
+        return lambda: resample.bin_to_grid(data["lon"], data["lat"], data["sst"], grid)
+
+    def mapping_case():
+        data = slstr()
+        grid = resample.define_grid(-10.0, 4.0, 34.0, 44.0, 0.05)
+        return lambda: resample.build_mapping(data["lon"], data["lat"], grid)
+
+    def collocation_case():
+        target = olci()
+        source = synthetic_sral()
+        return lambda: collocation.build_collocation(source["lon"], source["lat"], \
+                                                     target["lon"], target["lat"])
+
+    def names_case():
+        names = synthetic_names()
+        return lambda: filenames.decode_filenames(names)
+
+    olci_shape = 'x'.join(str(int(size * scale)) for size in OLCI_FR_SHAPE)
+    slstr_shape = 'x'.join(str(int(size * scale)) for size in SLSTR_1KM_SHAPE)
+    return [("flags.flag_data_fast", "olci", olci_shape, flag_case),
+            ("geo.spheric_dist", "olci", olci_shape, spheric_case),
+            ("geo.haversine", "olci", olci_shape, haversine_case),
+            ("geo.lonlat_to_xyz", "olci", olci_shape, xyz_case),
+            ("statistics.streaming_stats", "olci", olci_shape, stats_case),
+            ("statistics.std_limits", "olci", olci_shape, limits_case),
+            ("quicklook.build_pyramid", "olci", olci_shape, pyramid_case),
+            ("resample.bin_to_grid", "slstr", slstr_shape, bin_case),
+            ("resample.build_mapping", "slstr", slstr_shape, mapping_case),
+            ("collocation.build_collocation", "sral->olci", \
+             "%i->%s" % (SRAL_20HZ_POINTS, olci_shape), collocation_case),
+            ("filenames.decode_filenames", "names", str(NAMES), names_case)]
+
+# ------------------------------------------------------------------------------
+def measure(function, repeat=DEFAULT_REPEAT):
+    """ best and mean wall time (s) of repeat calls, and peak traced memory (MB) """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), sum(times) / len(times), peak / 1e6
+
+# ------------------------------------------------------------------------------
+def run(scale=DEFAULT_SCALE, repeat=DEFAULT_REPEAT, keyword=None, verbose=True):
+    """ runs the benchmark cases (optionally only those containing keyword) """
+    rows = []
+    for name, sensor, shape, setup in cases(scale):
+        if keyword is not None and keyword not in name:
+            continue
+        try:
+            best, mean, peak = measure(setup(), repeat=repeat)
+        except ImportError as error:
+            # optional dependency (scipy) missing
+            print("Skipping " + name + " (" + str(error) + ")")
+            continue
+        rows.append({"name": name, "sensor": sensor, "shape": shape, \
+                     "best_s": "%.4f" % best, "mean_s": "%.4f" % mean, \
+                     "peak_mb": "%.1f" % peak})
+        if verbose:
+            print("%-32s %-11s %-16s %9.4f s %9.1f MB" % (name, sensor, shape, best, peak))
+    return rows
+
+# ------------------------------------------------------------------------------
+def compare(rows, baseline_file, tolerance=DEFAULT_TOLERANCE):
+    """ prints the time/memory ratios to a baseline csv
+
+        output:
+        names of the cases slower than tolerance times their baseline
+    """
+    with open(baseline_file, newline='') as csv_file:
+        baseline = {row["name"]: row for row in csv.DictReader(csv_file)}
+
+    slower = []
+    for row in rows:
+        if row["name"] not in baseline or baseline[row["name"]]["shape"] != row["shape"]:
+            continue
+        old = baseline[row["name"]]
+        time_ratio = float(row["best_s"]) / max(float(old["best_s"]), 1e-9)
+        memory_ratio = float(row["peak_mb"]) / max(float(old["peak_mb"]), 1e-3)
+        flag = ''
+        if time_ratio > tolerance:
+            slower.append(row["name"])
+            flag = 'SLOWER'
+        print("%-32s time x%5.2f  memory x%5.2f %s" % (row["name"], time_ratio, \
+                                                       memory_ratio, flag))
+    return slower
+
+# ------------------------------------------------------------------------------
+def write_synthetic_product(product_dir, shape, seed=4):
+    """ writes an OLCI WFR like product: lat/lon (int32), WQSF (uint64),
+        CHL_NN (float32) and Oa01-03 reflectances (scaled uint16)
+    """
+    import netCDF4 as nc
+    from eumetsat_marine.flags import OLCI_L2_CHL_FLAGS
+
+    random = np.random.default_rng(seed)
+    os.makedirs(product_dir, exist_ok=True)
+    lon, lat = _swath(shape, -10.0, 35.0, 12.0, 10.0)
+
+    def new_file(name):
+        nc_fid = nc.Dataset(os.path.join(product_dir, name), 'w')
+        nc_fid.createDimension('rows', shape[0])
+        nc_fid.createDimension('columns', shape[1])
+        return nc_fid
+
+    with new_file('geo_coordinates.nc') as nc_fid:
+        for name, values in [('longitude', lon), ('latitude', lat)]:
+            variable = nc_fid.createVariable(name, 'i4', ('rows', 'columns'), \
+                                             fill_value=np.int32(-2147483648))
+            variable.scale_factor = 1e-6
+            variable[:] = np.ma.masked_array(np.nan_to_num(values), mask=np.isnan(values))
+    with new_file('wqsf.nc') as nc_fid:
+        flag_names = OLCI_L2_CHL_FLAGS + ['LAND', 'WATER']
+        variable = nc_fid.createVariable('WQSF', 'u8', ('rows', 'columns'), \
+                                         fill_value=np.uint64(0))
+        variable.flag_masks = (np.uint64(1) << np.arange(len(flag_names), dtype=np.uint64))
+        variable.flag_meanings = ' '.join(flag_names)
+        variable[:] = random.integers(1, 2**len(flag_names), shape, dtype=np.uint64)
+    with new_file('chl_nn.nc') as nc_fid:
+        variable = nc_fid.createVariable('CHL_NN', 'f4', ('rows', 'columns'), \
+                                         fill_value=np.float32(np.nan))
+        variable[:] = random.normal(-0.5, 0.4, shape).astype(np.float32)
+    for band in [1, 2, 3]:
+        name = 'Oa%02i_reflectance' % band
+        with new_file(name + '.nc') as nc_fid:
+            variable = nc_fid.createVariable(name, 'u2', ('rows', 'columns'), \
+                                             fill_value=np.uint16(65535))
+            variable.scale_factor = 1e-4
+            variable.add_offset = -0.05
+            variable[:] = random.uniform(0.0, 0.1, shape)
+
+# ------------------------------------------------------------------------------
+def load_product(product_dir, mode):
+    """ loads the synthetic product as the notebooks do ('default') or with
+        readers.open_compact ('compact'), and masks CHL with the WQSF flags
+
+        output:
+        list of the loaded arrays
+    """
+    import xarray as xr
+    from eumetsat_marine.flags import flag_data_fast, OLCI_L2_CHL_FLAGS
+    from eumetsat_marine.readers import open_compact
+
+    def path(name):
+        return os.path.join(product_dir, name + '.nc')
+
+    names = ['Oa01_reflectance', 'Oa02_reflectance', 'Oa03_reflectance']
+    if mode == 'default':
+        with xr.open_dataset(path('geo_coordinates')) as dataset:
+            arrays = [dataset['longitude'].values, dataset['latitude'].values]
+        with xr.open_dataset(path('wqsf')) as dataset:
+            flag_names = dataset['WQSF'].attrs['flag_meanings'].split(' ')
+            flag_values = dataset['WQSF'].attrs['flag_masks']
+            flags = dataset['WQSF'].values.astype(np.uint64)
+        flag_mask = flag_data_fast(OLCI_L2_CHL_FLAGS, flag_names, flag_values, flags)
+        flag_mask = flag_mask.astype(float)
+        with xr.open_dataset(path('chl_nn')) as dataset:
+            chl = dataset['CHL_NN'].values
+        chl[flag_mask == 1] = np.nan
+        for name in names:
+            with xr.open_dataset(path(name)) as dataset:
+                arrays.append(dataset[name].values)
+    else:
+        with open_compact(path('geo_coordinates')) as dataset:
+            arrays = [dataset['longitude'].values, dataset['latitude'].values]
+        with open_compact(path('wqsf')) as dataset:
+            flag_names = dataset['WQSF'].attrs['flag_meanings'].split(' ')
+            flag_values = dataset['WQSF'].attrs['flag_masks']
+            flags = dataset['WQSF'].values
+        flag_mask = flag_data_fast(OLCI_L2_CHL_FLAGS, flag_names, flag_values, flags)
+        with open_compact(path('chl_nn')) as dataset:
+            chl = dataset['CHL_NN'].values
+        chl[flag_mask] = np.nan
+        for name in names:
+            with open_compact(path(name)) as dataset:
+                arrays.append(dataset[name].values)
+    return arrays + [flags, flag_mask, chl]
+
+# ------------------------------------------------------------------------------
+def peak_rss_mb():
+    """ peak resident memory of this process (MB) """
+    import resource
+
+    # on Linux ru_maxrss is inherited from the parent process (which wrote
+    # the products), the high water mark of /proc is not
+    try:
+        with open('/proc/self/status') as status_file:
+            for line in status_file:
+                if line.startswith('VmHWM:'):
+                    return float(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+# ------------------------------------------------------------------------------
+def loader_memory(scale=1.0, verbose=True):
+    """ peak RSS of the default and compact loads of synthetic FR / RR products """
+    rows = []
+    work_dir = tempfile.mkdtemp(prefix='eumetsat_marine_loaders_')
+    try:
+        for product, shape in [('OLCI FR', OLCI_FR_SHAPE), ('OLCI RR', OLCI_RR_SHAPE)]:
+            shape = (max(1, int(shape[0] * scale)), max(1, int(shape[1] * scale)))
+            product_dir = os.path.join(work_dir, product.replace(' ', '_'))
+            write_synthetic_product(product_dir, shape)
+            peaks = {}
+            for mode in ['default', 'compact']:
+                output = subprocess.run([sys.executable, '-m', 'eumetsat_marine.benchmark', \
+                                         '--loader-run', mode, product_dir], \
+                                        capture_output=True, text=True, check=True).stdout
+                peaks[mode] = float(output.split()[-1])
+                rows.append({"name": "load_product." + mode, "sensor": product, \
+                             "shape": "x".join(str(size) for size in shape), \
+                             "peak_rss_mb": "%.1f" % peaks[mode]})
+            if verbose:
+                print("%-8s %-11s default %8.1f MB  compact %8.1f MB  (-%.0f %%)" \
+                      % (product, "x".join(str(size) for size in shape), peaks['default'], \
+                         peaks['compact'], 100.0 * (1.0 - peaks['compact'] / peaks['default'])))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return rows
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Benchmark the shared processing functions")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE, \
+                        help="scale of the synthetic swath dimensions (1: full size)")
+    parser.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT, \
+                        help="timed calls per case")
+    parser.add_argument("-k", "--keyword", type=str, default=None, \
+                        help="only run cases whose name contains this")
+    parser.add_argument("--csv", type=str, default=None, \
+                        help="write the results to this csv file")
+    parser.add_argument("--baseline", type=str, default=None, \
+                        help="compare with a previous csv file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, \
+                        help="allowed slow down with respect to the baseline")
+    parser.add_argument("--loaders", action="store_true", \
+                        help="compare the peak RSS of the default and compact product loads")
+    parser.add_argument("--loader-run", nargs=2, metavar=("MODE", "PRODUCT"), \
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.loader_run is not None:
+        # one load in this process: prints the peak RSS added by the load,
+        # xarray is imported first so its own footprint is not counted
+        importlib.import_module('xarray')
+        base = peak_rss_mb()
+        load_product(args.loader_run[1], args.loader_run[0])
+        print("%.1f" % (peak_rss_mb() - base))
+        return
+    if args.loaders:
+        rows = loader_memory(scale=1.0 if args.scale == DEFAULT_SCALE else args.scale)
+        if args.csv is not None:
+            write_table(rows, args.csv)
+        return
+
+    rows = run(scale=args.scale, repeat=args.repeat, keyword=args.keyword)
+    if args.csv is not None:
+        write_table(rows, args.csv)
+    if args.baseline is not None:
+        if compare(rows, args.baseline, tolerance=args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
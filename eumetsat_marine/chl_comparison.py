@@ -0,0 +1,165 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Batch OLCI CHL_NN vs CHL_OC4ME comparison over an archive of WFR products.
+
+This is the archive-wide version of 15_OLCI_CHL_comparison.ipynb: for every
+product the flag-masked anomaly 10**CHL_NN - 10**CHL_OC4ME is computed in row
+chunks (float32, never more than one chunk of each band in memory), summarised
+with streaming moments and quantile sketches, and the per-granule results are
+merged into archive statistics. Products are processed in parallel.
+
+Usage:
+
+    python -m eumetsat_marine.chl_comparison -r <archive root> -o <output dir>
+"""
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from eumetsat_marine import readers
+from eumetsat_marine.flags import flag_bits, read_flag_meanings, \
+                                  OLCI_L2_CHL_FLAGS
+from eumetsat_marine.statistics import RunningStats, QuantileSketch, write_table
+
+DEFAULT_PRODUCT_FILTER = '*OL_2_WFR*.SEN3'
+DEFAULT_CHUNK_ROWS = 512
+DEFAULT_PERCENTILES = [5, 25, 50, 75, 95]
+
+# ------------------------------------------------------------------------------
+def find_products(root_dir, product_filter=DEFAULT_PRODUCT_FILTER):
+    """ finds product (.SEN3) directories below root_dir, without entering them """
+    return readers.find_products(root_dir, product_filter)
+
+# ------------------------------------------------------------------------------
+def granule_statistics(product_dir, flags_we_want=OLCI_L2_CHL_FLAGS, \
+                       chunk_rows=DEFAULT_CHUNK_ROWS):
+    """ computes the flag-masked CHL anomaly statistics of one WFR product
+
+        output:
+        dictionary with the product name and RunningStats/QuantileSketch
+        accumulators for the anomaly and the absolute anomaly
+    """
+    import netCDF4 as nc
+
+    anomaly_stats = RunningStats()
+    anomaly_sketch = QuantileSketch()
+    abs_sketch = QuantileSketch()
+
+    with nc.Dataset(os.path.join(product_dir, 'chl_nn.nc'), 'r') as nn_fid, \
+         nc.Dataset(os.path.join(product_dir, 'chl_oc4me.nc'), 'r') as oc_fid, \
+         nc.Dataset(os.path.join(product_dir, 'wqsf.nc'), 'r') as flag_fid:
+
+        chl_nn = nn_fid.variables['CHL_NN']
+        chl_oc4me = oc_fid.variables['CHL_OC4ME']
+        wqsf = flag_fid.variables['WQSF']
+        wqsf.set_auto_mask(False)
+        flag_names, flag_vals = read_flag_meanings(wqsf)
+        bits = flag_bits(flags_we_want, flag_names, flag_vals, flag_type='WQSF')
+
+        for row1 in range(0, chl_nn.shape[0], chunk_rows):
+            row2 = min(row1 + chunk_rows, chl_nn.shape[0])
+            flag_mask = (wqsf[row1:row2, :] & bits) > 0
+
+            # CHL values are log10 distributed: linearise before differencing
+            anomaly = np.power(np.float32(10.0), readers.read_rows(chl_nn, row1, row2))
+            anomaly -= np.power(np.float32(10.0), readers.read_rows(chl_oc4me, row1, row2))
+            anomaly[flag_mask] = np.nan
+
+            anomaly_stats.update(anomaly)
+            anomaly_sketch.update(anomaly)
+            abs_sketch.update(np.abs(anomaly, out=anomaly))
+
+    return {"product": os.path.basename(os.path.normpath(product_dir)),
+            "stats": anomaly_stats,
+            "sketch": anomaly_sketch,
+            "abs_sketch": abs_sketch}
+
+# ------------------------------------------------------------------------------
+def summary_row(name, result, percentiles=DEFAULT_PERCENTILES):
+    """ converts accumulators into one row of a statistics table """
+    row = {"product": name}
+    row.update(result["stats"].as_dict(prefix='anomaly_'))
+    for percentile, value in zip(percentiles, \
+                                 result["sketch"].percentile(percentiles)):
+        row["anomaly_p%i" % percentile] = value
+    row["abs_anomaly_p95"] = result["abs_sketch"].percentile(95)
+    return row
+
+# ------------------------------------------------------------------------------
+def merge_results(results):
+    """ merges per-granule accumulators into archive-wide ones """
+    merged = {"stats": RunningStats(), "sketch": QuantileSketch(), \
+              "abs_sketch": QuantileSketch()}
+    for result in results:
+        merged["stats"].merge(result["stats"])
+        merged["sketch"].merge(result["sketch"])
+        merged["abs_sketch"].merge(result["abs_sketch"])
+    return merged
+
+# ------------------------------------------------------------------------------
+def compare_archive(root_dir, out_dir, product_filter=DEFAULT_PRODUCT_FILTER, \
+                    flags_we_want=OLCI_L2_CHL_FLAGS, chunk_rows=DEFAULT_CHUNK_ROWS, \
+                    nprocs=None):
+    """ runs the comparison over all products of an archive in parallel
+
+        writes chl_comparison_granules.csv (one row per product) and
+        chl_comparison_summary.csv (all products merged) to out_dir, and
+        returns the two tables.
+    """
+    products = find_products(root_dir, product_filter=product_filter)
+    print("Found %i products" % len(products))
+
+    results = []
+    granule_rows = []
+    with ProcessPoolExecutor(max_workers=nprocs) as executor:
+        futures = [executor.submit(granule_statistics, product, \
+                   flags_we_want=flags_we_want, chunk_rows=chunk_rows) \
+                   for product in products]
+        for product, future in zip(products, futures):
+            try:
+                result = future.result()
+            except Exception as error:
+                print("Failed: " + product + " (" + str(error) + ")")
+                continue
+            results.append(result)
+            granule_rows.append(summary_row(result["product"], result))
+
+    summary_rows = [summary_row("ALL", merge_results(results))]
+
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    write_table(granule_rows, os.path.join(out_dir, 'chl_comparison_granules.csv'))
+    write_table(summary_rows, os.path.join(out_dir, 'chl_comparison_summary.csv'))
+
+    return granule_rows, summary_rows
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Batch OLCI CHL_NN vs CHL_OC4ME comparison")
+    parser.add_argument("-r", "--root_dir", type=str, required=True, \
+                        help="archive root directory")
+    parser.add_argument("-o", "--out_dir", type=str, default=".", \
+                        help="output directory for the statistics tables")
+    parser.add_argument("-f", "--product_filter", type=str, \
+                        default=DEFAULT_PRODUCT_FILTER, help="product name filter")
+    parser.add_argument("-n", "--nprocs", type=int, default=None, \
+                        help="number of worker processes")
+    parser.add_argument("--chunk_rows", type=int, default=DEFAULT_CHUNK_ROWS, \
+                        help="rows read per chunk")
+    args = parser.parse_args()
+
+    _, summary_rows = compare_archive(args.root_dir, args.out_dir, \
+                      product_filter=args.product_filter, \
+                      chunk_rows=args.chunk_rows, nprocs=args.nprocs)
+    for key, value in summary_rows[0].items():
+        print(key + " : " + str(value))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Pixel level collocation of Sentinel-3 sensors (OLCI / SLSTR / SRAL).
+
+Builds correspondences between the footprints shown together in
+42_Sentinel3_PDU_Comparison.ipynb using a KD-tree on earth centred
+coordinates of the target sensor, so no N x M distance matrix is computed:
+
+    nearest : each source pixel/point -> nearest target pixel
+              (e.g. each SLSTR pixel -> nearest OLCI FR pixel)
+    radius  : each source pixel/point -> all target pixels within a radius
+              (e.g. each SRAL point -> the OLCI/SLSTR pixels covering it),
+              stored in compressed sparse row form
+
+Mappings are cached per pair of products (i.e. per orbit/frame) and can be
+applied to any variable of the target product.
+
+Typical use:
+
+    mapping = collocate_products(SRAL_PRODUCT, 'sral_20', OLCI_PRODUCT, 'olci',
+                                 method='radius', radius=1000.0, cache_dir='cache')
+    CHL_AT_SRAL = collocate_values(mapping, CHL)
+"""
+import os
+import hashlib
+import numpy as np
+
+from eumetsat_marine.geo import lonlat_to_xyz, chord_length, arc_length
+from eumetsat_marine.resample import estimate_pixel_spacing, _query_tree, \
+                                     DEFAULT_CHUNK_SIZE
+
+COLLOCATION_VERSION = 1
+DEFAULT_MAX_DISTANCE = 10000.0
+
+# coordinate file and variables of each sensor, as read in notebook 42.
+# a file name of None means the product is a single netCDF file (L2P).
+SENSORS = {
+    "olci": ("geo_coordinates.nc", "longitude", "latitude"),
+    "slstr_in": ("geodetic_in.nc", "longitude_in", "latitude_in"),
+    "slstr_io": ("geodetic_io.nc", "longitude_io", "latitude_io"),
+    "slstr_an": ("geodetic_an.nc", "longitude_an", "latitude_an"),
+    "slstr_l2p": (None, "lon", "lat"),
+    "sral_01": ("standard_measurement.nc", "lon_01", "lat_01"),
+    "sral_20": ("standard_measurement.nc", "lon_20_ku", "lat_20_ku"),
+    }
+
+# ------------------------------------------------------------------------------
+def read_coordinates(product, sensor):
+    """ reads lon/lat (degrees, fill values as NaN) of a product """
+    import netCDF4 as nc
+
+    file_name, lon_name, lat_name = SENSORS[sensor]
+    path = product if file_name is None else os.path.join(product, file_name)
+    with nc.Dataset(path, 'r') as nc_fid:
+        lon = np.ma.filled(np.squeeze(nc_fid.variables[lon_name][:]).astype(np.float64), np.nan)
+        lat = np.ma.filled(np.squeeze(nc_fid.variables[lat_name][:]).astype(np.float64), np.nan)
+    return lon, lat
+
+# ------------------------------------------------------------------------------
+def build_collocation(source_lon, source_lat, target_lon, target_lat, \
+                      method='nearest', max_distance=None, radius=None, \
+                      chunk_size=DEFAULT_CHUNK_SIZE, nprocs=1):
+    """ builds a source -> target pixel mapping
+
+        input:
+        source_lon/lat : coordinates of the points to collocate (any shape)
+        target_lon/lat : coordinates of the sensor to look up (any shape)
+        method         : 'nearest' or 'radius'
+        max_distance   : nearest only; sources further than this (m) from
+                         any target pixel get index -1. Defaults to twice the
+                         target pixel spacing for swaths.
+        radius         : radius only; search radius (m)
+        nprocs         : worker threads for the KD-tree queries (-1: all cores)
+
+        output:
+        mapping dictionary, usable with collocate_values/save_collocation.
+        Indices are flat indices into the target arrays.
+    """
+    from scipy.spatial import cKDTree
+
+    if method not in ('nearest', 'radius'):
+        raise Exception("Unknown collocation method: " + str(method))
+    if method == 'radius' and radius is None:
+        raise Exception("A radius is needed for radius collocation")
+
+    source_lon = np.asarray(source_lon, dtype=np.float64)
+    source_lat = np.asarray(source_lat, dtype=np.float64)
+    target_lon = np.asarray(target_lon, dtype=np.float64)
+    target_lat = np.asarray(target_lat, dtype=np.float64)
+
+    if method == 'nearest' and max_distance is None:
+        max_distance = DEFAULT_MAX_DISTANCE
+        if target_lon.ndim == 2:
+            max_distance = 2.0 * estimate_pixel_spacing(target_lon, target_lat)
+
+    valid = np.flatnonzero(np.isfinite(target_lon.ravel()) & np.isfinite(target_lat.ravel()))
+    tree = cKDTree(lonlat_to_xyz(target_lon.ravel()[valid], target_lat.ravel()[valid]))
+
+    flat_lon = source_lon.ravel()
+    flat_lat = source_lat.ravel()
+    source_valid = np.isfinite(flat_lon) & np.isfinite(flat_lat)
+    xyz = lonlat_to_xyz(np.where(source_valid, flat_lon, 0.0), \
+                        np.where(source_valid, flat_lat, 0.0))
+
+    mapping = {"method": method, "source_shape": source_lon.shape, \
+               "target_shape": target_lon.shape, "max_distance": max_distance, \
+               "radius": radius}
+
+    if method == 'nearest':
+        chord, nearest = _query_tree(tree, xyz, chord_length(max_distance), \
+                                     chunk_size, nprocs)
+        found = (nearest < valid.size) & source_valid
+        index = np.full(flat_lon.size, -1, dtype=np.int64)
+        index[found] = valid[nearest[found]]
+        distance = np.full(flat_lon.size, np.nan, dtype=np.float32)
+        distance[found] = arc_length(chord[found])
+        mapping.update({"index": index, "distance": distance})
+        return mapping
+
+    # radius: compressed sparse rows, one row per source point
+    counts = np.zeros(flat_lon.size, dtype=np.int64)
+    indices = []
+    source_index = np.flatnonzero(source_valid)
+    for start in range(0, source_index.size, chunk_size):
+        this_index = source_index[start:start + chunk_size]
+        neighbours = tree.query_ball_point(xyz[this_index], chord_length(radius), \
+                                           workers=nprocs, return_sorted=True)
+        lengths = np.fromiter((len(neighbour) for neighbour in neighbours), \
+                              dtype=np.int64, count=len(neighbours))
+        counts[this_index] = lengths
+        if lengths.sum() > 0:
+            indices.append(valid[np.concatenate(neighbours).astype(np.int64)])
+    mapping.update({"offsets": np.r_[0, np.cumsum(counts)], \
+                    "indices": np.concatenate(indices) if indices \
+                               else np.empty(0, dtype=np.int64)})
+    return mapping
+
+# ------------------------------------------------------------------------------
+def collocate_values(mapping, target_data, fill_value=np.nan, dtype=np.float32):
+    """ target variable values at the source pixels of a mapping
+
+        nearest mappings return the nearest target value, radius mappings the
+        mean of the finite target values within the radius. The output has
+        the source shape.
+    """
+    if np.ma.isMaskedArray(target_data):
+        target_data = np.ma.filled(target_data.astype(dtype), np.nan)
+    flat = np.asarray(target_data, dtype=dtype).reshape(-1)
+    if flat.size != int(np.prod(mapping["target_shape"])):
+        raise Exception("Data shape does not match the mapping target shape")
+
+    if mapping["method"] == 'nearest':
+        index = mapping["index"]
+        out = np.full(index.size, fill_value, dtype=dtype)
+        found = index >= 0
+        out[found] = flat[index[found]]
+        return out.reshape(mapping["source_shape"])
+
+    offsets = mapping["offsets"]
+    values = flat[mapping["indices"]]
+    valid = np.isfinite(values)
+    # source row of each neighbour; rows without neighbours get zero counts
+    nsource = offsets.size - 1
+    rows = np.repeat(np.arange(nsource), np.diff(offsets))
+    counts = np.bincount(rows, weights=valid, minlength=nsource)
+    sums = np.bincount(rows, weights=np.where(valid, values, 0.0), minlength=nsource)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where(counts > 0, sums / counts, fill_value).astype(dtype)
+    return out.reshape(mapping["source_shape"])
+
+# ------------------------------------------------------------------------------
+def collocation_key(source_product, source_sensor, target_product, target_sensor, \
+                    method, max_distance, radius):
+    """ cache key of a product pair (orbit/frame) and collocation settings """
+    key = hashlib.sha1()
+    key.update(repr((os.path.basename(os.path.normpath(source_product)), source_sensor,
+                     os.path.basename(os.path.normpath(target_product)), target_sensor,
+                     method, max_distance, radius, COLLOCATION_VERSION)).encode())
+    return key.hexdigest()
+
+# ------------------------------------------------------------------------------
+def save_collocation(mapping, filename):
+    """ stores a mapping as a compressed numpy archive """
+    arrays = {"method": np.array(mapping["method"]),
+              "source_shape": np.array(mapping["source_shape"]),
+              "target_shape": np.array(mapping["target_shape"]),
+              "max_distance": np.array(np.nan if mapping["max_distance"] is None \
+                                       else mapping["max_distance"]),
+              "radius": np.array(np.nan if mapping["radius"] is None \
+                                 else mapping["radius"])}
+    for name in ("index", "distance", "offsets", "indices"):
+        if name in mapping:
+            arrays[name] = mapping[name]
+
+    temp_name = filename + ".part.npz"
+    np.savez_compressed(temp_name, **arrays)
+    os.replace(temp_name, filename)
+
+# ------------------------------------------------------------------------------
+def load_collocation(filename):
+    """ reads a mapping stored by save_collocation """
+    with np.load(filename) as npz:
+        mapping = {"method": str(npz["method"]),
+                   "source_shape": tuple(npz["source_shape"]),
+                   "target_shape": tuple(npz["target_shape"])}
+        for name in ("max_distance", "radius"):
+            value = float(npz[name])
+            mapping[name] = None if np.isnan(value) else value
+        for name in ("index", "distance", "offsets", "indices"):
+            if name in npz.files:
+                mapping[name] = npz[name]
+    return mapping
+
+# ------------------------------------------------------------------------------
+def collocate_products(source_product, source_sensor, target_product, target_sensor, \
+                       method='nearest', max_distance=None, radius=None, \
+                       cache_dir=None, nprocs=1):
+    """ returns the mapping between two products, reusing a cached one
+
+        e.g. collocate_products(SLSTR, 'slstr_in', OLCI_FR, 'olci') maps each
+        SLSTR 1 km pixel to its nearest OLCI FR pixel.
+    """
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = os.path.join(cache_dir, "collocation_" + \
+                     collocation_key(source_product, source_sensor, target_product, \
+                                     target_sensor, method, max_distance, radius) + ".npz")
+        if os.path.exists(cache_file):
+            return load_collocation(cache_file)
+
+    source_lon, source_lat = read_coordinates(source_product, source_sensor)
+    target_lon, target_lat = read_coordinates(target_product, target_sensor)
+    mapping = build_collocation(source_lon, source_lat, target_lon, target_lat, \
+                                method=method, max_distance=max_distance, \
+                                radius=radius, nprocs=nprocs)
+
+    if cache_file is not None:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        save_collocation(mapping, cache_file)
+    return mapping
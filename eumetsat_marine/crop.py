@@ -0,0 +1,216 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Crops downloaded Sentinel-3 products to a footprint (box) of interest.
+
+The row/column window covering the box (plus a margin) is found from the
+geolocation, read in row blocks, then every netCDF file on the image grid is
+rewritten to that window with zlib compression, one variable at a time, so
+no more than one (cropped) band is held in memory. Files on other grids
+(tie points, instrument data, SLSTR 500 m files when cropping on the 1 km
+geolocation) are copied unchanged. The manifest
+only keeps the data objects of the files left in the product:
+
+    python -m eumetsat_marine.crop S3A_OL_2_WFR____...SEN3 -9.5,38.4:-8.5,39.0
+
+A regional box typically keeps 1-10 % of a full granule.
+"""
+import os
+import shutil
+import argparse
+import numpy as np
+
+from eumetsat_marine.readers import read_rows
+
+DEFAULT_GEO_FILE = 'geo_coordinates.nc'
+DEFAULT_LON = 'longitude'
+DEFAULT_LAT = 'latitude'
+DEFAULT_MARGIN = 0.1
+DEFAULT_COMPLEVEL = 4
+ROW_BLOCK = 512
+MANIFEST = 'xfdumanifest.xml'
+
+# ------------------------------------------------------------------------------
+def parse_footprint(footprint):
+    """ lon1,lat1:lon2,lat2 (downloader ini format) -> (lon1, lat1, lon2, lat2) """
+    corner1, corner2 = footprint.split(':')
+    lon1, lat1 = [float(value) for value in corner1.split(',')]
+    lon2, lat2 = [float(value) for value in corner2.split(',')]
+    return lon1, lat1, lon2, lat2
+
+# ------------------------------------------------------------------------------
+def in_box(lon, lat, box, margin=0.0):
+    """ mask of the points inside box (lon1 > lon2: box across the antimeridian) """
+    lon1, lat1, lon2, lat2 = box
+    inside = (lat >= lat1 - margin) & (lat <= lat2 + margin)
+    if lon1 <= lon2:
+        return inside & (lon >= lon1 - margin) & (lon <= lon2 + margin)
+    return inside & ((lon >= lon1 - margin) | (lon <= lon2 + margin))
+
+# ------------------------------------------------------------------------------
+def footprint_window(geo_file, box, margin=DEFAULT_MARGIN, lon_name=DEFAULT_LON, \
+                     lat_name=DEFAULT_LAT, row_block=ROW_BLOCK):
+    """ row/column window of the pixels within box (plus margin, degrees)
+
+        output:
+        (row1, row2, col1, col2, grid) slice limits on the geolocation grid,
+        with grid ((row dimension, length), (column dimension, length)), or
+        None if the box is not covered
+    """
+    import netCDF4 as nc
+
+    row1, row2, col1, col2 = None, None, None, None
+    with nc.Dataset(geo_file, 'r') as nc_fid:
+        lon_var = nc_fid.variables[lon_name]
+        lat_var = nc_fid.variables[lat_name]
+        nrows = lon_var.shape[-2]
+        for start in range(0, nrows, row_block):
+            inside = in_box(read_rows(lon_var, start, start + row_block), \
+                            read_rows(lat_var, start, start + row_block), box, margin)
+            rows = np.flatnonzero(inside.any(axis=1))
+            if rows.size == 0:
+                continue
+            cols = np.flatnonzero(inside.any(axis=0))
+            if row1 is None:
+                row1, col1, col2 = start + rows[0], cols[0], cols[-1] + 1
+            row2 = start + rows[-1] + 1
+            col1, col2 = min(col1, cols[0]), max(col2, cols[-1] + 1)
+        grid = tuple(zip(lon_var.dimensions[-2:], lon_var.shape[-2:]))
+    if row1 is None:
+        return None
+    return int(row1), int(row2), int(col1), int(col2), grid
+
+# ------------------------------------------------------------------------------
+def crop_file(in_file, out_file, window, complevel=DEFAULT_COMPLEVEL):
+    """ rewrites a netCDF file to window, returns False if it is not on the grid
+
+        window: (row1, row2, col1, col2, grid) as given by footprint_window.
+        Files on another grid with the same dimension names (e.g. SLSTR 500 m
+        and 1 km files both use rows/columns) are recognised by their size.
+    """
+    import netCDF4 as nc
+
+    row1, row2, col1, col2, grid = window
+    (row_dim, nrows), (col_dim, ncols) = grid
+    with nc.Dataset(in_file, 'r') as in_fid:
+        if row_dim not in in_fid.dimensions or col_dim not in in_fid.dimensions \
+           or len(in_fid.dimensions[row_dim]) != nrows \
+           or len(in_fid.dimensions[col_dim]) != ncols:
+            return False
+        in_fid.set_auto_maskandscale(False)
+        with nc.Dataset(out_file, 'w', format=in_fid.data_model) as out_fid:
+            out_fid.setncatts({name: in_fid.getncattr(name) for name in in_fid.ncattrs()})
+            out_fid.setncattr('crop_window', 'rows %i:%i columns %i:%i of the full product' \
+                              % (row1, row2, col1, col2))
+            sizes = {row_dim: row2 - row1, col_dim: col2 - col1}
+            for name, dimension in in_fid.dimensions.items():
+                out_fid.createDimension(name, None if dimension.isunlimited() \
+                                        else sizes.get(name, len(dimension)))
+
+            for name, in_var in in_fid.variables.items():
+                attributes = {key: in_var.getncattr(key) for key in in_var.ncattrs()}
+                fill_value = attributes.pop('_FillValue', None)
+                compress = in_var.dtype != str and in_var.ndim > 0
+                out_var = out_fid.createVariable(name, in_var.datatype, in_var.dimensions, \
+                                                 zlib=compress, complevel=complevel, \
+                                                 fill_value=fill_value)
+                out_var.set_auto_maskandscale(False)
+                out_var.setncatts(attributes)
+                index = tuple(slice(row1, row2) if dim == row_dim else \
+                              slice(col1, col2) if dim == col_dim else slice(None) \
+                              for dim in in_var.dimensions)
+                if in_var.ndim == 0:
+                    out_var.assignValue(in_var.getValue())
+                else:
+                    out_var[:] = in_var[index]
+    return True
+
+# ------------------------------------------------------------------------------
+def trim_manifest(in_file, out_file, kept_files):
+    """ writes the manifest without the data objects of removed files """
+    from lxml import etree
+
+    tree = etree.parse(in_file)
+    for data_object in tree.xpath("//*[local-name()='dataObject']"):
+        locations = data_object.xpath(".//*[local-name()='fileLocation']/@href")
+        if locations and os.path.basename(locations[0]) not in kept_files:
+            data_object.getparent().remove(data_object)
+    tree.write(out_file, xml_declaration=True, encoding='UTF-8')
+
+# ------------------------------------------------------------------------------
+def crop_product(product_dir, box, margin=DEFAULT_MARGIN, geo_file=DEFAULT_GEO_FILE, \
+                 lon_name=DEFAULT_LON, lat_name=DEFAULT_LAT, complevel=DEFAULT_COMPLEVEL, \
+                 files=None):
+    """ replaces a product (.SEN3 directory) by its crop to box
+
+        input:
+        box   : (lon1, lat1, lon2, lat2) or a lon1,lat1:lon2,lat2 string
+        files : netCDF files to keep (default: all)
+
+        output:
+        (full size, cropped size) in bytes, or None if the box is not covered
+        (the product is then left as it is)
+    """
+    if isinstance(box, str):
+        box = parse_footprint(box)
+    product_dir = product_dir.rstrip(os.sep)
+    window = footprint_window(os.path.join(product_dir, geo_file), box, margin=margin, \
+                              lon_name=lon_name, lat_name=lat_name)
+    if window is None:
+        return None
+
+    names = sorted(os.listdir(product_dir))
+    full_size = sum(os.path.getsize(os.path.join(product_dir, name)) for name in names)
+    crop_dir = product_dir + '.crop'
+    shutil.rmtree(crop_dir, ignore_errors=True)
+    os.makedirs(crop_dir)
+    try:
+        kept = [name for name in names if name.endswith('.nc') \
+                and (files is None or name in files or name == geo_file)]
+        for name in kept:
+            in_file = os.path.join(product_dir, name)
+            if not crop_file(in_file, os.path.join(crop_dir, name), window, complevel):
+                shutil.copy2(in_file, crop_dir)
+        if MANIFEST in names:
+            trim_manifest(os.path.join(product_dir, MANIFEST), \
+                          os.path.join(crop_dir, MANIFEST), kept)
+    except:
+        shutil.rmtree(crop_dir, ignore_errors=True)
+        raise
+
+    # swap only once the whole crop is written
+    shutil.rmtree(product_dir)
+    os.rename(crop_dir, product_dir)
+    crop_size = sum(os.path.getsize(os.path.join(product_dir, name)) \
+                    for name in os.listdir(product_dir))
+    return full_size, crop_size
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Crop Sentinel-3 products to a box")
+    parser.add_argument("products", nargs='+', help=".SEN3 product directories")
+    parser.add_argument("footprint", help="lon1,lat1:lon2,lat2 (bottom left : top right)")
+    parser.add_argument("--margin", type=float, default=DEFAULT_MARGIN, \
+                        help="margin around the box (degrees)")
+    parser.add_argument("--geo-file", type=str, default=DEFAULT_GEO_FILE, \
+                        help="geolocation file (e.g. geodetic_in.nc for SLSTR; files " \
+                             "on another grid are copied unchanged)")
+    parser.add_argument("--lon", type=str, default=DEFAULT_LON, help="longitude variable")
+    parser.add_argument("--lat", type=str, default=DEFAULT_LAT, help="latitude variable")
+    args = parser.parse_args()
+
+    for product_dir in args.products:
+        sizes = crop_product(product_dir, args.footprint, margin=args.margin, \
+                             geo_file=args.geo_file, lon_name=args.lon, lat_name=args.lat)
+        if sizes is None:
+            print(product_dir + ": footprint not covered, left as it is")
+        else:
+            print("%s: %.1f MB -> %.1f MB" % (product_dir, sizes[0] / 1e6, sizes[1] / 1e6))
+
+if __name__ == "__main__":
+    main()
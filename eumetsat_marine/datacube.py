@@ -0,0 +1,239 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Incremental regional datacubes of flag-masked OLCI water constituents (and
+SLSTR SST) on a fixed lat/lon grid, stored in Zarr.
+
+Each new granule is resampled (resample.get_mapping / apply_mapping) onto
+the regional grid and appended as one time slice. The names of the products
+already processed are kept in the store attributes, so a daily update only
+reads the new granules of an archive:
+
+    python -m eumetsat_marine.datacube cubes/Philippines.zarr /data/OLCI --region Philippines
+
+Arrays are chunked (time_chunk, tile, tile): a time series at a grid cell
+is read from a few contiguous chunks, at the cost of rewriting the last
+time chunk of a tile on every append. Slices are stored in the order they
+are appended (products of one update are sorted by sensing time); use
+the time array to sort when updates arrive out of order.
+"""
+import os
+import argparse
+from datetime import datetime
+import numpy as np
+
+from eumetsat_marine import readers
+from eumetsat_marine.flags import flag_data_fast, OLCI_L2_CHL_FLAGS
+from eumetsat_marine.resample import define_grid, grid_shape, get_mapping, apply_mapping
+
+# notebook 14 locations: (lon_min, lon_max, lat_min, lat_max), approximate
+# coastal boxes within the example granules
+REGIONS = {"India": (68.0, 76.0, 12.0, 20.0),
+           "Philippines": (118.0, 126.0, 8.0, 16.0),
+           "Vietnam": (104.0, 112.0, 8.0, 16.0),
+           "Malaysia": (98.0, 106.0, 0.0, 8.0),
+           "Indonesia": (110.0, 118.0, -8.0, 0.0)}
+
+# OLCI L2 WFR variables: (file name, variable name)
+OLCI_VARIABLES = [('chl_nn.nc', 'CHL_NN'), ('tsm_nn.nc', 'TSM_NN'), ('iop_nn.nc', 'ADG443_NN')]
+OLCI_FLAGS = ('wqsf.nc', 'WQSF')
+OLCI_PRODUCT_FILTER = '*OL_2_WFR*.SEN3'
+SLSTR_FILE_FILTER = '*SLSTR*.nc'
+SST_MIN_QUALITY = 5
+
+DEFAULT_RESOLUTION = 0.01
+DEFAULT_TIME_CHUNK = 128
+DEFAULT_TILE = 64
+
+# ------------------------------------------------------------------------------
+def sensing_time(product_name):
+    """ sensing start of an OLCI product or SLSTR L2P file, from its name """
+    name = os.path.basename(product_name)
+    if name.startswith('S3'):
+        return datetime.strptime(name[16:31], '%Y%m%dT%H%M%S')
+    return datetime.strptime(name[:14], '%Y%m%d%H%M%S')
+
+# ------------------------------------------------------------------------------
+def _create_array(group, name, shape, chunks, dtype, fill_value):
+    """ creates an array with the zarr 3 (create_array) or 2 API """
+    if hasattr(group, 'create_array'):
+        return group.create_array(name, shape=shape, chunks=chunks, dtype=dtype, \
+                                  fill_value=fill_value)
+    return group.create_dataset(name, shape=shape, chunks=chunks, dtype=dtype, \
+                                fill_value=fill_value)
+
+# ------------------------------------------------------------------------------
+def open_cube(store, extent=None, resolution=DEFAULT_RESOLUTION, variables=None, \
+              time_chunk=DEFAULT_TIME_CHUNK, tile=DEFAULT_TILE):
+    """ opens a datacube, creating it if needed
+
+        input:
+        extent    : (lon_min, lon_max, lat_min, lat_max) or a REGIONS name,
+                    only needed to create the cube
+        variables : variable names of a new cube
+    """
+    import zarr
+
+    group = zarr.open_group(store, mode='a')
+    if 'time' in group:
+        return group
+    if extent is None or variables is None:
+        raise Exception("New datacube: extent and variables are needed")
+    if isinstance(extent, str):
+        extent = REGIONS[extent]
+
+    grid = define_grid(extent[0], extent[1], extent[2], extent[3], resolution)
+    nlat, nlon = grid_shape(grid)
+    _create_array(group, 'lat', (nlat,), (nlat,), 'f8', np.nan)[:] = grid["lat"]
+    _create_array(group, 'lon', (nlon,), (nlon,), 'f8', np.nan)[:] = grid["lon"]
+    for name in variables:
+        _create_array(group, name, (0, nlat, nlon), (time_chunk, min(tile, nlat), \
+                      min(tile, nlon)), 'f4', np.nan)
+    _create_array(group, 'time', (0,), (max(time_chunk, 1024),), 'i8', 0)
+    group.attrs.update({"extent": list(extent), "resolution": resolution, \
+                        "variables": list(variables), \
+                        "time_units": "seconds since 1970-01-01", "products": {}})
+    return group
+
+# ------------------------------------------------------------------------------
+def cube_grid(group):
+    """ grid definition (as resample.define_grid) of a datacube """
+    extent = group.attrs["extent"]
+    return define_grid(extent[0], extent[1], extent[2], extent[3], group.attrs["resolution"])
+
+# ------------------------------------------------------------------------------
+def read_olci(product_dir, flags_we_want=OLCI_L2_CHL_FLAGS):
+    """ lon, lat and flag-masked OLCI variables of a WFR product """
+    flag_data, flag_names, flag_values = readers.read_flags( \
+        os.path.join(product_dir, OLCI_FLAGS[0]), OLCI_FLAGS[1])
+    mask = flag_data_fast(flags_we_want, flag_names, flag_values, flag_data)
+    del flag_data
+    data = readers.read_product(product_dir, \
+        {'geo_coordinates.nc': ['longitude', 'latitude']}, dtype=np.float64)
+    variables = {}
+    for file_name, name in OLCI_VARIABLES:
+        values = readers.read_variables(os.path.join(product_dir, file_name), [name])[name]
+        values[mask] = np.nan
+        variables[name] = values
+    return data['longitude'], data['latitude'], variables
+
+# ------------------------------------------------------------------------------
+def read_sst(nc_file, min_quality=SST_MIN_QUALITY):
+    """ lon, lat and quality-masked SST (K) of a SLSTR L2P file """
+    data = readers.read_variables(nc_file, ['lon', 'lat'], dtype=np.float64)
+    values = readers.read_variables(nc_file, ['sea_surface_temperature', 'quality_level'])
+    sst = values['sea_surface_temperature']
+    sst[~(values['quality_level'] >= min_quality)] = np.nan
+    return data['lon'], data['lat'], {'sea_surface_temperature': sst}
+
+# ------------------------------------------------------------------------------
+def append_granule(group, name, lon, lat, variables, time, method='nearest', cache_dir=None):
+    """ resamples a granule onto the cube grid and appends it as a time slice
+
+        output:
+        index of the new time slice, or None if the granule misses the grid
+        (the product is recorded either way, so it is not read again)
+    """
+    grid = cube_grid(group)
+    mapping = get_mapping(lon, lat, grid, method=method, cache_dir=cache_dir)
+    slices = {var_name: apply_mapping(mapping, variables[var_name]) \
+              for var_name in group.attrs["variables"] if var_name in variables}
+
+    products = dict(group.attrs["products"])
+    index = None
+    if any(np.isfinite(values).any() for values in slices.values()):
+        nlat, nlon = grid_shape(grid)
+        index = group['time'].shape[0]
+        for var_name in group.attrs["variables"]:
+            array = group[var_name]
+            array.resize((index + 1, nlat, nlon))
+            array[index] = slices.get(var_name, np.full((nlat, nlon), np.nan, np.float32))
+        group['time'].resize((index + 1,))
+        group['time'][index] = int((time - datetime(1970, 1, 1)).total_seconds())
+    # the time slice is written before the product is recorded
+    products[name] = index
+    group.attrs["products"] = products
+    return index
+
+# ------------------------------------------------------------------------------
+def update_cube(store, root_dir, sensor='olci', extent=None, resolution=DEFAULT_RESOLUTION, \
+                method='nearest', cache_dir=None, verbose=True):
+    """ appends the products of root_dir that are not yet in the datacube
+
+        output:
+        number of time slices added
+    """
+    if sensor == 'olci':
+        variables = [name for _, name in OLCI_VARIABLES]
+        paths = readers.find_products(root_dir, OLCI_PRODUCT_FILTER)
+        reader = read_olci
+    else:
+        variables = ['sea_surface_temperature']
+        paths = readers.find_files(root_dir, SLSTR_FILE_FILTER)
+        reader = read_sst
+
+    group = open_cube(store, extent=extent, resolution=resolution, variables=variables)
+    done = group.attrs["products"]
+    new = sorted([path for path in paths if os.path.basename(path) not in done], \
+                 key=sensing_time)
+    if verbose:
+        print("%i products, %i new" % (len(paths), len(new)))
+
+    added = 0
+    for path in new:
+        lon, lat, data = reader(path)
+        index = append_granule(group, os.path.basename(path), lon, lat, data, \
+                               sensing_time(path), method=method, cache_dir=cache_dir)
+        if index is not None:
+            added = added + 1
+        if verbose:
+            print(os.path.basename(path) + (": outside the grid" if index is None \
+                                            else ": time slice %i" % index))
+    return added
+
+# ------------------------------------------------------------------------------
+def read_timeseries(store, variable, lon, lat):
+    """ time series at the grid cell nearest to (lon, lat)
+
+        output:
+        (times as datetime64[s], values), sorted by time
+    """
+    import zarr
+
+    group = zarr.open_group(store, mode='r')
+    col = int(np.abs(group['lon'][:] - lon).argmin())
+    row = int(np.abs(group['lat'][:] - lat).argmin())
+    times = group['time'][:]
+    values = group[variable][:, row, col]
+    order = np.argsort(times, kind='stable')
+    return times[order].astype('datetime64[s]'), values[order]
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Append new granules to a regional datacube")
+    parser.add_argument("store", help="Zarr store (directory)")
+    parser.add_argument("root_dir", help="archive of OLCI WFR products or SLSTR L2P files")
+    parser.add_argument("--sensor", choices=['olci', 'sst'], default='olci')
+    parser.add_argument("--region", choices=sorted(REGIONS), default=None, \
+                        help="notebook 14 location (for a new cube)")
+    parser.add_argument("--extent", type=float, nargs=4, default=None, \
+                        metavar=("LON_MIN", "LON_MAX", "LAT_MIN", "LAT_MAX"), \
+                        help="grid extent (for a new cube)")
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION, \
+                        help="grid resolution (degrees, for a new cube)")
+    parser.add_argument("--method", choices=['nearest', 'bilinear'], default='nearest')
+    parser.add_argument("--cache", type=str, default=None, help="mapping cache directory")
+    args = parser.parse_args()
+
+    extent = args.region if args.extent is None else args.extent
+    added = update_cube(args.store, args.root_dir, sensor=args.sensor, extent=extent, \
+                        resolution=args.resolution, method=args.method, cache_dir=args.cache)
+    print("%i time slices added" % added)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Bulk decoding of Sentinel-3 product names into a columnar table.
+
+Non-interactive version of the decoder in Sentinel3_General_Tools
+(41_Sentinel3_filename_decoder.ipynb / Widget_Functions.handle_submit). The
+field positions are derived from the naming template once, at import. Names
+are converted to a fixed width byte matrix and every field is a column slice
+of that matrix, so millions of names decode without a Python loop per name.
+
+Typical use:
+
+    table = decode_filenames(os.listdir(ARCHIVE))
+    keep  = match(table, mission='S3A', data_type='WFR', timeliness='NT',
+                  start=('2018-01-01', '2018-02-01'))
+"""
+import os
+import numpy as np
+
+# field number per character, as in Widget_Functions.handle_submit
+TEMPLATE = "000_11_2_333333_444444444444444_555555555555555" \
+         + "_666666666666666_77777777777777777_888_99999999"
+
+FIELD_NAMES = ['mission', 'data_source', 'processing_level', 'data_type', \
+               'start', 'stop', 'creation', 'instance', 'centre', 'class_id']
+
+NAME_LENGTH = len(TEMPLATE)
+
+# ------------------------------------------------------------------------------
+def _template_slices(template):
+    """ start/stop character positions of each numbered template field """
+    slices = []
+    for field in range(len(FIELD_NAMES)):
+        positions = [pos for pos, char in enumerate(template) if char == str(field)]
+        slices.append(slice(positions[0], positions[-1] + 1))
+    return slices
+
+FIELD_SLICES = dict(zip(FIELD_NAMES, _template_slices(TEMPLATE)))
+
+# sub-fields of the instance and class ID fields (positions within the field)
+INSTANCE_SLICES = {"duration": slice(0, 4), "cycle": slice(5, 8),
+                   "relative_orbit": slice(9, 12), "frame": slice(13, 17)}
+CLASS_SLICES = {"platform": slice(0, 1), "timeliness": slice(2, 4),
+                "baseline": slice(5, 8)}
+
+TIMELINESS = {"NR": "Near Real Time", "ST": "Short Time critical",
+              "NT": "Non Time critical"}
+
+# ------------------------------------------------------------------------------
+def _name_matrix(names):
+    """ (n, NAME_LENGTH) uint8 matrix of product names, without directories
+        and extensions (shorter names are padded with NUL bytes)
+    """
+    names = np.asarray(names)
+    if names.dtype.kind == 'O':
+        names = names.astype('U')
+    # look for directories on the raw character codes (no per name loop)
+    codes = names.view(np.uint32 if names.dtype.kind == 'U' else np.uint8)
+    if np.any(codes == ord('/')) or np.any(codes == ord('\\')):
+        names = np.array([os.path.basename(os.path.normpath(name)) for name in names.tolist()])
+    # fixed width truncation drops the extension (.SEN3, .zip, ...)
+    names = np.ascontiguousarray(names.astype('S%i' % NAME_LENGTH))
+    return names.view(np.uint8).reshape(-1, NAME_LENGTH)
+
+# ------------------------------------------------------------------------------
+def _text_column(chars, strip=True):
+    """ converts a column block of characters to a unicode string array """
+    column = np.ascontiguousarray(chars).view('S%i' % chars.shape[1]).ravel()
+    if strip:
+        column = np.char.rstrip(column, b'_')
+    return column.astype('U')
+
+# ------------------------------------------------------------------------------
+def _integer_column(chars):
+    """ converts a column block of digits to integers, -1 where not digits """
+    digits = chars.astype(np.int64) - ord('0')
+    valid = np.all((digits >= 0) & (digits <= 9), axis=1)
+    powers = 10 ** np.arange(chars.shape[1] - 1, -1, -1, dtype=np.int64)
+    return np.where(valid, digits.dot(powers), -1)
+
+# ------------------------------------------------------------------------------
+def _time_column(chars):
+    """ converts YYYYMMDDTHHMMSS columns to datetime64[s], NaT if invalid """
+    parts = [_integer_column(chars[:, part]) for part in \
+             (slice(0, 4), slice(4, 6), slice(6, 8), slice(9, 11), slice(11, 13), slice(13, 15))]
+    valid = np.all([part >= 0 for part in parts], axis=0) & (chars[:, 8] == ord('T')) \
+            & (parts[1] >= 1) & (parts[1] <= 12) & (parts[2] >= 1)
+    year, month, day, hour, minute, second = [np.where(valid, part, 0) for part in parts]
+
+    # calendar arithmetic on integers instead of parsing strings
+    times = (year - 1970).astype('datetime64[Y]').astype('datetime64[M]') \
+            + np.where(valid, month - 1, 0).astype('timedelta64[M]')
+    times = times.astype('datetime64[D]') + np.where(valid, day - 1, 0).astype('timedelta64[D]')
+    times = times.astype('datetime64[s]') \
+            + (hour * 3600 + minute * 60 + second).astype('timedelta64[s]')
+    times[~valid] = np.datetime64('NaT')
+    return times
+
+# ------------------------------------------------------------------------------
+def decode_filenames(names):
+    """ decodes Sentinel-3 product names into a dictionary of columns
+
+        input:
+        names : sequence (or array) of product names or paths
+
+        output:
+        dictionary of equal length numpy arrays: name, mission, platform,
+        data_source, processing_level, data_type, start, stop, creation
+        (datetime64[s]), duration (s), cycle, relative_orbit, frame (-1 for
+        dump products), centre, timeliness, baseline and valid (name long
+        enough and well formed times).
+    """
+    chars = _name_matrix(names)
+    table = {"name": _text_column(chars, strip=False)}
+
+    for field in ('mission', 'data_source', 'processing_level', 'data_type', 'centre'):
+        table[field] = _text_column(chars[:, FIELD_SLICES[field]])
+    for field in ('start', 'stop', 'creation'):
+        table[field] = _time_column(chars[:, FIELD_SLICES[field]])
+
+    instance = chars[:, FIELD_SLICES['instance']]
+    for field, sub_slice in INSTANCE_SLICES.items():
+        table[field] = _integer_column(instance[:, sub_slice])
+
+    class_id = chars[:, FIELD_SLICES['class_id']]
+    for field, sub_slice in CLASS_SLICES.items():
+        table[field] = _text_column(class_id[:, sub_slice])
+
+    table["valid"] = ~np.isnat(table["start"]) & ~np.isnat(table["stop"])
+    return table
+
+# ------------------------------------------------------------------------------
+def match(table, **criteria):
+    """ boolean mask of the rows of a decoded table meeting all criteria
+
+        each criterion is a column name with either a value, a list of
+        values, or a (min, max) tuple for inclusive ranges, e.g.
+        match(table, mission=['S3A', 'S3B'], relative_orbit=(100, 200)).
+        'start' and 'stop' ranges accept ISO strings.
+    """
+    mask = np.ones(len(table["name"]), dtype=bool)
+    for column, value in criteria.items():
+        data = table[column]
+        if isinstance(value, tuple):
+            low, high = value
+            if data.dtype.kind == 'M':
+                low = np.datetime64(low) if low is not None else None
+                high = np.datetime64(high) if high is not None else None
+            if low is not None:
+                mask &= data >= low
+            if high is not None:
+                mask &= data <= high
+        elif isinstance(value, (list, set)):
+            mask &= np.isin(data, list(value))
+        else:
+            mask &= data == value
+    return mask
+
+# ------------------------------------------------------------------------------
+def select(table, mask):
+    """ applies a boolean mask (or index array) to every column of a table """
+    return {column: values[mask] for column, values in table.items()}
+
+# ------------------------------------------------------------------------------
+def to_dataframe(table):
+    """ converts a decoded table to a pandas DataFrame """
+    import pandas as pd
+    return pd.DataFrame(table)
+
+# ------------------------------------------------------------------------------
+def describe(name):
+    """ human readable decoding of one product name, as the widget prints """
+    row = select(decode_filenames([name]), 0)
+    lines = ['Mission ID : ' + row["mission"],
+             'Data Source : ' + row["data_source"],
+             'Processing Level : ' + row["processing_level"],
+             'Data Type ID : ' + row["data_type"],
+             'Sensing Start Time : ' + str(row["start"]),
+             'Sensing End Time : ' + str(row["stop"]),
+             'Creation Date : ' + str(row["creation"]),
+             'Instance (Duration) : ' + str(row["duration"]),
+             'Instance (Cycle number) : ' + str(row["cycle"]),
+             'Instance (Relative orbit number) : ' + str(row["relative_orbit"]),
+             'Instance (Frame coordinate) : ' + \
+                 ('None (dump product)' if row["frame"] < 0 else str(row["frame"])),
+             'Product Generation Centre : ' + row["centre"],
+             'Class ID (Platform) : ' + row["platform"],
+             'Class ID (Timeliness) : ' + row["timeliness"] + \
+                 ' (' + TIMELINESS.get(row["timeliness"], 'unknown') + ')',
+             'Class ID (Baseline collection) : ' + row["baseline"]]
+    return '\n'.join(lines)
@@ -0,0 +1,56 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Flag masking shared by the notebooks, the downloader and the batch tools.
+"""
+import numpy as np
+
+# the OLCI L2 WQSF flags used to screen CHL in the training notebooks
+OLCI_L2_CHL_FLAGS = ['CLOUD', 'CLOUD_AMBIGUOUS', 'CLOUD_MARGIN', 'INVALID',
+                     'COSMETIC', 'SATURATED', 'SUSPECT', 'HISOLZEN',
+                     'HIGHGLINT', 'SNOW_ICE', 'AC_FAIL', 'WHITECAPS',
+                     'ANNOT_ABSO_D', 'ANNOT_MIXR1', 'ANNOT_DROUT',
+                     'ANNOT_TAU06', 'RWNEG_O2', 'RWNEG_O3', 'RWNEG_O4',
+                     'RWNEG_O5', 'RWNEG_O6', 'RWNEG_O7', 'RWNEG_O8']
+
+# ------------------------------------------------------------------------------
+def flag_bits(flags_we_want, flag_names, flag_values, flag_type='WQSF'):
+    """ combines the bit values of the wanted flags into a single mask word
+
+        compute this once when the same flags are tested against many
+        chunks or files, then use (flag_data & bits) > 0 per chunk.
+    """
+    bits = np.uint64()
+    if flag_type == 'SST':
+        bits = np.uint8()
+    elif flag_type == 'WQSF_lsb' or flag_type == 'quality_flags'\
+      or flag_type == 'c2rcc_flags':
+        bits = np.uint32()
+    elif flag_type == 'pixel_classif_flags':
+        bits = np.uint16()
+
+    for flag in flags_we_want:
+        try:
+            bits = bits | flag_values[flag_names.index(flag)]
+        except:
+            print(flag + " not present")
+
+    return bits
+
+# ------------------------------------------------------------------------------
+def flag_data_fast(flags_we_want, flag_names, flag_values, \
+                   flag_data, flag_type='WQSF'):
+    """ Implement flag masking processor """
+    return (flag_data & flag_bits(flags_we_want, flag_names, \
+                                  flag_values, flag_type=flag_type)) > 0
+
+# ------------------------------------------------------------------------------
+def read_flag_meanings(nc_variable):
+    """ returns the flag names and bit values of a netCDF flag variable """
+    flag_names = nc_variable.flag_meanings.split(' ')
+    flag_values = nc_variable.flag_masks
+    return flag_names, flag_values
@@ -0,0 +1,70 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Geolocation helpers for Sentinel-3 swath and along-track coordinates.
+"""
+import numpy as np
+
+# simple spheric earth, as used by spheric_dist in the training notebooks
+EARTH_RADIUS = 6367442.76
+
+# ------------------------------------------------------------------------------
+def lonlat_to_xyz(lon, lat, radius=EARTH_RADIUS):
+    """ converts lon/lat (degrees) to earth centred cartesian coordinates (m)
+
+        output has shape lon.shape + (3,), so it can be fed straight into a
+        KD-tree, where euclidean (chord) distances preserve the ordering of
+        great circle distances.
+    """
+    lon = np.deg2rad(np.asarray(lon, dtype=np.float64))
+    lat = np.deg2rad(np.asarray(lat, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack((radius*cos_lat*np.cos(lon),
+                     radius*cos_lat*np.sin(lon),
+                     radius*np.sin(lat)), axis=-1)
+
+# ------------------------------------------------------------------------------
+def chord_length(distance, radius=EARTH_RADIUS):
+    """ converts a great circle distance (m) to the equivalent chord (m) """
+    return 2.0*radius*np.sin(np.minimum(distance, np.pi*radius)/(2.0*radius))
+
+# ------------------------------------------------------------------------------
+def arc_length(chord, radius=EARTH_RADIUS):
+    """ converts a chord (m) to the equivalent great circle distance (m) """
+    return 2.0*radius*np.arcsin(np.clip(chord/(2.0*radius), 0.0, 1.0))
+
+# ------------------------------------------------------------------------------
+def haversine(lon1, lat1, lon2, lat2, radius=EARTH_RADIUS):
+    """ great circle distance (m) between points (degrees), numerically
+        stable for short distances
+    """
+    lon1, lat1, lon2, lat2 = [np.deg2rad(np.asarray(value, dtype=np.float64)) \
+                              for value in (lon1, lat1, lon2, lat2)]
+    a = np.sin(0.5*(lat2 - lat1))**2 \
+        + np.cos(lat1)*np.cos(lat2)*np.sin(0.5*(lon2 - lon1))**2
+    return 2.0*radius*np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+# ------------------------------------------------------------------------------
+def spheric_dist(lat1, lat2, lon1, lon2, mode="global"):
+    """ distances (m) for a simple spheric earth, as in the training notebooks
+
+        mode "global" and "regional" are great circle distances, "local" is
+        the equirectangular approximation for small separations.
+    """
+    lat1, lat2, lon1, lon2 = [np.asarray(value, dtype=np.float64) \
+                              for value in (lat1, lat2, lon1, lon2)]
+    # proper longitudinal shift
+    dlon = np.abs(lon2 - lon1)
+    dlon = np.where(dlon >= 180, 360 - dlon, dlon)
+
+    if mode == "global" or mode == "regional":
+        return haversine(0.0, lat1, dlon, lat2)
+    elif mode == "local":
+        x = np.deg2rad(dlon)*np.cos(np.deg2rad(0.5*(lat2 + lat1)))
+        y = np.deg2rad(lat2 - lat1)
+        return EARTH_RADIUS*np.sqrt(x*x + y*y)
+    raise Exception("Incorrect mode: " + str(mode))
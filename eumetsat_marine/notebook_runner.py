@@ -0,0 +1,365 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Runs the code of a training notebook headless over a grid of parameters.
+
+The notebooks hard-code one scenario each (notebook 14: Location, 13: the
+lonmin/lonmax/latmin/latmax box, 31: input_file) and MYPATH is edited by
+hand. Here every assignment of a parameter name outside functions (also in
+if branches, e.g. input_path in notebook 14) is replaced by the scenario
+value, then the code cells are executed in a process pool, one scenario per
+task, in its own output directory:
+
+    python -m eumetsat_marine.notebook_runner OLCI/14_OLCI_water_constituents.ipynb \\
+        --mypath /data --param Location=India,Philippines,Vietnam --out qa/2018-03
+
+Values are Python literals or plain strings; @pattern expands to the names
+of the files matching a glob, e.g. input_path=@/data/OLCI_test_data/*WFR*.SEN3.
+Several --param give their cartesian product; use --grid file.json (list of
+parameter dictionaries) for paired values such as boxes.
+
+Matplotlib uses the Agg backend, plt.show does nothing and the figures open
+after each cell are saved (cellNN_figM.png) and closed. IPython magics are
+dropped. Cell output goes to output.log of the scenario.
+
+With --cache, the variables written by a cell (arrays, lists, numbers...)
+are pickled under a key of the cell code and all the code (parameters
+included) before it, so a rerun, or another scenario sharing the first
+cells, loads them instead of reading the products again (their printed
+output is not repeated). Cells importing modules, defining functions,
+making figures, assigning nothing or writing a variable that cannot be
+pickled (open files, netCDF datasets) are always run. The key does not cover
+the input files: clear the cache when they change. Values changed only
+through method calls of objects the cell does not assign are not seen.
+
+Per cell timings (run or loaded from the cache) are printed and written to
+timings.csv.
+"""
+import os
+import ast
+import sys
+import glob
+import json
+import time
+import pickle
+import hashlib
+import argparse
+import itertools
+import contextlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+# cell magics whose body is still Python
+PYTHON_CELL_MAGICS = ['capture', 'time', 'timeit']
+DEFAULT_WORKERS = 1
+
+# ------------------------------------------------------------------------------
+def read_cells(notebook):
+    """ code cells of a notebook (nbformat 4) as source strings """
+    with open(notebook, 'r', encoding='utf-8') as input_file:
+        content = json.load(input_file)
+    cells = []
+    for cell in content['cells']:
+        if cell['cell_type'] == 'code':
+            source = cell['source']
+            cells.append(source if isinstance(source, str) else ''.join(source))
+    return cells
+
+# ------------------------------------------------------------------------------
+def strip_magics(source):
+    """ source without IPython magics and shell commands, None for non-Python cells """
+    lines = source.split('\n')
+    if lines and lines[0].startswith('%%'):
+        if lines[0][2:].split(' ')[0] not in PYTHON_CELL_MAGICS:
+            return None
+        lines = lines[1:]
+    return '\n'.join('' if line.lstrip().startswith(('%', '!')) else line for line in lines)
+
+# ------------------------------------------------------------------------------
+class _ParameterTransformer(ast.NodeTransformer):
+    """ replaces the value of assignments to parameter names, outside functions """
+
+    def __init__(self, parameters):
+        self.parameters = parameters
+        self.assigned = set()
+
+    def visit_Assign(self, node):
+        if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name) \
+           and node.targets[0].id in self.parameters:
+            name = node.targets[0].id
+            node.value = ast.copy_location(ast.parse(repr(self.parameters[name]), \
+                                                     mode='eval').body, node.value)
+            self.assigned.add(name)
+        return node
+
+    def visit_FunctionDef(self, node):
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_ClassDef = visit_FunctionDef
+
+# ------------------------------------------------------------------------------
+def written_names(tree):
+    """ names a cell assigns, or modifies through item/attribute assignment """
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, (ast.Subscript, ast.Attribute)) \
+             and isinstance(node.ctx, ast.Store):
+            while isinstance(node, (ast.Subscript, ast.Attribute)):
+                node = node.value
+            if isinstance(node, ast.Name):
+                names.add(node.id)
+    return sorted(names)
+
+# ------------------------------------------------------------------------------
+def is_cacheable(tree):
+    """ cells importing or defining code are always run """
+    return not any(isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, \
+                                     ast.AsyncFunctionDef, ast.ClassDef, ast.Global)) \
+                   for node in ast.walk(tree))
+
+# ------------------------------------------------------------------------------
+def prepare_cells(notebook, parameters):
+    """ parses the code cells of a notebook with the parameter values injected
+
+        output:
+        list of (cell number, first code line, code tree, cache key), the key
+        covering the cell and every cell before it
+    """
+    transformer = _ParameterTransformer(parameters)
+    cells = []
+    key = hashlib.sha1(os.path.basename(notebook).encode('utf-8'))
+    for number, source in enumerate(read_cells(notebook)):
+        source = strip_magics(source)
+        if source is None or not source.strip():
+            continue
+        tree = ast.fix_missing_locations(transformer.visit(ast.parse(source)))
+        key.update(ast.dump(tree).encode('utf-8'))
+        first_line = [line.strip() for line in source.split('\n') \
+                      if line.strip() and not line.strip().startswith('#')]
+        cells.append((number, first_line[0] if first_line else '', tree, key.hexdigest()))
+
+    missing = sorted(set(parameters) - transformer.assigned)
+    if missing:
+        raise Exception("Parameters not assigned in " + notebook + ": " + ', '.join(missing))
+    return cells
+
+# ------------------------------------------------------------------------------
+def save_figures(out_dir, number):
+    """ saves and closes the open matplotlib figures, returns their number """
+    if 'matplotlib.pyplot' not in sys.modules:
+        return 0
+    plt = sys.modules['matplotlib.pyplot']
+    figures = plt.get_fignums()
+    for index, figure_number in enumerate(figures):
+        plt.figure(figure_number).savefig(os.path.join(out_dir, \
+            'cell%02i_fig%i.png' % (number, index + 1)), bbox_inches='tight')
+    plt.close('all')
+    return len(figures)
+
+# ------------------------------------------------------------------------------
+def _load_cache(cache_file, namespace):
+    """ restores the variables of a cell, False if there is no usable entry """
+    if cache_file is None or not os.path.exists(cache_file):
+        return False
+    try:
+        with open(cache_file, 'rb') as input_file:
+            namespace.update(pickle.load(input_file))
+    except Exception:
+        return False
+    return True
+
+# ------------------------------------------------------------------------------
+def _save_cache(cache_file, namespace, names):
+    """ pickles the written variables of a cell
+
+        nothing is cached if one of them cannot be pickled (open files,
+        netCDF datasets...): the cell is then run every time.
+    """
+    values = {name: namespace[name] for name in names if name in namespace}
+    try:
+        content = pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+    # write then rename, as scenarios of the pool may share entries
+    temp_file = cache_file + '.%i.tmp' % os.getpid()
+    with open(temp_file, 'wb') as output_file:
+        output_file.write(content)
+    os.replace(temp_file, cache_file)
+    return True
+
+# ------------------------------------------------------------------------------
+def _headless_matplotlib():
+    """ non-interactive backend, plt.show does nothing """
+    os.environ['MPLBACKEND'] = 'Agg'
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return
+    plt.show = lambda *args, **kwargs: None
+
+# ------------------------------------------------------------------------------
+def run_notebook(notebook, parameters, out_dir, cache_dir=None):
+    """ runs the code cells of a notebook for one set of parameters
+
+        the cells are run in out_dir (relative output files, log files and
+        figures end up there), with the package root on sys.path.
+
+        output:
+        dictionary with the parameters, status ('ok' or the error) and the
+        per cell timings [(cell number, first line, seconds, 'run'/'cached')]
+    """
+    notebook = os.path.abspath(notebook)
+    result = {"parameters": parameters, "out_dir": out_dir, "status": 'ok', "timings": []}
+    os.makedirs(out_dir, exist_ok=True)
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if package_root not in sys.path:
+        sys.path.insert(0, package_root)
+    _headless_matplotlib()
+
+    namespace = {"__name__": "__main__"}
+    cwd = os.getcwd()
+    os.chdir(out_dir)
+    try:
+        with open('output.log', 'w') as log_file, contextlib.redirect_stdout(log_file), \
+             contextlib.redirect_stderr(log_file):
+            cells = prepare_cells(notebook, parameters)
+            for number, first_line, tree, key in cells:
+                cacheable = cache_dir is not None and is_cacheable(tree)
+                cache_file = os.path.join(cache_dir, key + '.pkl') if cacheable else None
+                start = time.time()
+                if _load_cache(cache_file, namespace):
+                    result["timings"].append((number, first_line, time.time() - start, 'cached'))
+                    continue
+                try:
+                    exec(compile(tree, '<%s cell %i>' % (os.path.basename(notebook), number), \
+                                 'exec'), namespace)
+                except Exception:
+                    traceback.print_exc()
+                    result["status"] = 'cell %i failed: %s' % (number, sys.exc_info()[1])
+                    break
+                finally:
+                    figures = save_figures(out_dir, number)
+                    result["timings"].append((number, first_line, time.time() - start, 'run'))
+                names = written_names(tree)
+                if cacheable and figures == 0 and names:
+                    _save_cache(cache_file, namespace, names)
+    except Exception:
+        result["status"] = 'failed: %s' % sys.exc_info()[1]
+    finally:
+        os.chdir(cwd)
+    return result
+
+# ------------------------------------------------------------------------------
+def parse_value(text):
+    """ Python literal, or the string itself """
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+# ------------------------------------------------------------------------------
+def parameter_grid(options):
+    """ cartesian product of NAME=value1,value2 or NAME=@glob options """
+    names, values = [], []
+    for option in options:
+        name, text = option.split('=', 1)
+        if text.startswith('@'):
+            choices = [os.path.basename(path) for path in sorted(glob.glob(text[1:]))]
+            if not choices:
+                raise Exception("No file matches " + text[1:])
+        else:
+            choices = [parse_value(value) for value in text.split(',')]
+        names.append(name.strip())
+        values.append(choices)
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+# ------------------------------------------------------------------------------
+def scenario_name(parameters):
+    """ directory name of a scenario """
+    name = '_'.join('%s-%s' % (key, value) for key, value in sorted(parameters.items()) \
+                    if key != 'MYPATH')
+    return ''.join(char if char.isalnum() or char in '-_.' else '_' for char in name) \
+           or 'default'
+
+# ------------------------------------------------------------------------------
+def run_grid(notebook, grid, out_dir, cache_dir=None, workers=DEFAULT_WORKERS):
+    """ runs a notebook for every parameter dictionary of grid in a process pool """
+    tasks = [(notebook, parameters, os.path.abspath(os.path.join(out_dir, \
+              scenario_name(parameters))), cache_dir) for parameters in grid]
+    if workers == 1:
+        return [run_notebook(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_notebook, *task) for task in tasks]
+        return [future.result() for future in futures]
+
+# ------------------------------------------------------------------------------
+def timing_report(results, csv_file=None):
+    """ prints the per cell timings over the scenarios, optionally as csv """
+    cells = {}
+    for result in results:
+        print("%-60s %8.1f s  %s" % (os.path.basename(result["out_dir"]), \
+              sum(timing[2] for timing in result["timings"]), result["status"]))
+        for number, first_line, seconds, mode in result["timings"]:
+            cells.setdefault((number, first_line), []).append((seconds, mode))
+
+    print("\ncell  runs cached   mean s    max s  first line")
+    for (number, first_line), timings in sorted(cells.items()):
+        seconds = [timing[0] for timing in timings]
+        print("%4i %5i %6i %8.2f %8.2f  %s" % (number, len(timings), \
+              sum(1 for timing in timings if timing[1] == 'cached'), \
+              sum(seconds) / len(seconds), max(seconds), first_line[:50]))
+
+    if csv_file is not None:
+        with open(csv_file, 'w') as output_file:
+            output_file.write("scenario,cell,mode,seconds\n")
+            for result in results:
+                for number, _, seconds, mode in result["timings"]:
+                    output_file.write("%s,%i,%s,%.3f\n" % (os.path.basename(result["out_dir"]), \
+                                      number, mode, seconds))
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Run a notebook over a parameter grid")
+    parser.add_argument("notebook", help="notebook (.ipynb)")
+    parser.add_argument("--param", action='append', default=[], metavar="NAME=VALUES", \
+                        help="parameter values, comma separated or @glob (repeatable)")
+    parser.add_argument("--grid", type=str, default=None, \
+                        help="json list of parameter dictionaries (instead of --param)")
+    parser.add_argument("--mypath", type=str, default=None, help="MYPATH of the notebooks")
+    parser.add_argument("--out", type=str, default='notebook_runs', help="output directory")
+    parser.add_argument("--cache", type=str, default=None, help="cache directory")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, \
+                        help="number of parallel processes")
+    args = parser.parse_args()
+
+    if args.grid is not None:
+        with open(args.grid, 'r') as input_file:
+            grid = json.load(input_file)
+    else:
+        grid = parameter_grid(args.param)
+    if args.mypath is not None:
+        for parameters in grid:
+            parameters["MYPATH"] = args.mypath
+    cache_dir = None if args.cache is None else os.path.abspath(args.cache)
+
+    print("%i scenarios, %i workers" % (len(grid), args.workers))
+    results = run_grid(args.notebook, grid, args.out, cache_dir=cache_dir, workers=args.workers)
+    os.makedirs(args.out, exist_ok=True)
+    timing_report(results, os.path.join(args.out, 'timings.csv'))
+    if any(result["status"] != 'ok' for result in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Map decoration shared by the notebooks.
+
+The notebooks each build the same Natural Earth land feature:
+
+    land_poly = cfeature.NaturalEarthFeature('physical', 'land', land_resolution,
+                                             edgecolor='k',
+                                             facecolor=cfeature.COLORS['land'])
+
+land_feature builds it once per resolution and session (cartopy keeps the
+loaded geometries on the feature, so reusing it also avoids re-reading the
+shapefile for every map). cartopy is only imported when first needed.
+"""
+import functools
+
+DEFAULT_LAND_RESOLUTION = '50m'
+
+# ------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def land_feature(resolution=DEFAULT_LAND_RESOLUTION, edgecolor='k', facecolor=None):
+    """ cached Natural Earth land polygon feature, as defined in the notebooks """
+    import cartopy.feature as cfeature
+
+    if facecolor is None:
+        facecolor = cfeature.COLORS['land']
+    return cfeature.NaturalEarthFeature('physical', 'land', resolution, \
+                                        edgecolor=edgecolor, facecolor=facecolor)
+
+# ------------------------------------------------------------------------------
+def add_land(axis, resolution=DEFAULT_LAND_RESOLUTION, coastlines=True, linewidth=1):
+    """ adds the land polygons (and coastlines) to a cartopy map axis """
+    if coastlines:
+        axis.coastlines(resolution=resolution, color='black', linewidth=linewidth)
+    axis.add_feature(land_feature(resolution))
+    return axis
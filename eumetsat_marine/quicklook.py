@@ -0,0 +1,231 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Quicklook rendering of large swath products from decimated overviews.
+
+Each variable is reduced once into a pyramid of overviews (level 0 is the full
+resolution field, every following level halves both dimensions). Each level
+keeps the block minimum, maximum and mean, so that small features (blooms,
+fronts, cloud edges) survive decimation. Levels are cached on disk as plain
+.npy files, which are memory mapped when rendering, so a preview or a tile
+only ever touches the level it is drawn from.
+
+Rendering is done in image (row/column) space with matplotlib's imsave, which
+is orders of magnitude faster than a cartopy pcolormesh of the full swath.
+"""
+import os
+import json
+import warnings
+import numpy as np
+
+# the log10 CHL scale used across the OLCI notebooks (0.01 - 50 mg.m-3)
+CHL_VMIN = np.log10(0.01)
+CHL_VMAX = np.log10(50)
+CHL_CMAP = 'viridis'
+
+PYRAMID_STATS = ('min', 'max', 'mean')
+PYRAMID_INFO = 'pyramid.json'
+DEFAULT_MIN_SIZE = 256
+DEFAULT_TILE_SIZE = 256
+
+# ------------------------------------------------------------------------------
+def _block_view(array, factor, fill_value):
+    """ pads a 2D array to a multiple of factor and views it as blocks """
+    pad_rows = (-array.shape[0]) % factor
+    pad_cols = (-array.shape[1]) % factor
+    if pad_rows or pad_cols:
+        array = np.pad(array, ((0, pad_rows), (0, pad_cols)), \
+                       mode='constant', constant_values=fill_value)
+    return array.reshape(array.shape[0] // factor, factor, \
+                         array.shape[1] // factor, factor)
+
+# ------------------------------------------------------------------------------
+def decimate(level, factor=2):
+    """ reduces one pyramid level (dict of min/max/sum/count) by factor """
+    with warnings.catch_warnings():
+        # all-NaN blocks are expected (land, cloud, outside swath)
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        reduced = {
+            "min": np.nanmin(_block_view(level["min"], factor, np.nan), axis=(1, 3)),
+            "max": np.nanmax(_block_view(level["max"], factor, np.nan), axis=(1, 3)),
+            "sum": _block_view(level["sum"], factor, 0.0).sum(axis=(1, 3)),
+            "count": _block_view(level["count"], factor, 0).sum(axis=(1, 3))
+            }
+    return reduced
+
+# ------------------------------------------------------------------------------
+def build_pyramid(data, min_size=DEFAULT_MIN_SIZE):
+    """ builds a list of min/max/mean overviews, from full resolution down
+
+        decimation stops once the largest dimension is <= min_size.
+    """
+    if np.ma.isMaskedArray(data):
+        data = np.ma.filled(data.astype(np.float32), np.nan)
+    data = np.asarray(data, dtype=np.float32)
+    if data.ndim != 2:
+        raise Exception("Quicklooks need a 2D field")
+
+    finite = np.isfinite(data)
+    level = {"min": data, "max": data,
+             "sum": np.where(finite, data, 0.0).astype(np.float64),
+             "count": finite.astype(np.int32)}
+
+    pyramid = []
+    while True:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = (level["sum"] / level["count"]).astype(np.float32)
+        pyramid.append({"min": level["min"], "max": level["max"], "mean": mean})
+        if max(level["min"].shape) <= min_size:
+            break
+        level = decimate(level)
+
+    return pyramid
+
+# ------------------------------------------------------------------------------
+def _level_file(var_dir, nlevel, stat):
+    """ cache file name for one level/statistic """
+    if nlevel == 0:
+        # full resolution: min, max and mean are all the field itself
+        stat = 'data'
+    return os.path.join(var_dir, "L%02i_%s.npy" % (nlevel, stat))
+
+# ------------------------------------------------------------------------------
+def _source_signature(file_name):
+    """ size and modification time of a source file, to invalidate caches """
+    file_stat = os.stat(file_name)
+    return [file_stat.st_size, int(file_stat.st_mtime)]
+
+# ------------------------------------------------------------------------------
+def cache_pyramid(pyramid, var_dir, source=None):
+    """ writes a pyramid to a cache directory """
+    if not os.path.exists(var_dir):
+        os.makedirs(var_dir)
+    np.save(_level_file(var_dir, 0, None), pyramid[0]["mean"])
+    for nlevel, level in enumerate(pyramid[1:], start=1):
+        for stat in PYRAMID_STATS:
+            np.save(_level_file(var_dir, nlevel, stat), level[stat])
+
+    info = {"levels": [list(level["min"].shape) for level in pyramid],
+            "source": source}
+    with open(os.path.join(var_dir, PYRAMID_INFO), 'w') as info_file:
+        json.dump(info, info_file)
+
+# ------------------------------------------------------------------------------
+def read_pyramid_info(var_dir):
+    """ reads the level shapes of a cached pyramid (None if not cached) """
+    info_file = os.path.join(var_dir, PYRAMID_INFO)
+    if not os.path.exists(info_file):
+        return None
+    with open(info_file, 'r') as info_fid:
+        return json.load(info_fid)
+
+# ------------------------------------------------------------------------------
+def load_level(var_dir, nlevel, stat='max'):
+    """ memory maps one cached pyramid level """
+    return np.load(_level_file(var_dir, nlevel, stat), mmap_mode='r')
+
+# ------------------------------------------------------------------------------
+def product_pyramid(product_dir, file_name, var_name, cache_dir, \
+                    min_size=DEFAULT_MIN_SIZE):
+    """ builds (once) and returns the cache directory of a variable pyramid """
+    import netCDF4 as nc
+
+    source_file = os.path.join(product_dir, file_name)
+    var_dir = os.path.join(cache_dir, \
+              os.path.basename(os.path.normpath(product_dir)), var_name)
+    signature = _source_signature(source_file)
+
+    info = read_pyramid_info(var_dir)
+    if info is not None and info["source"] == signature:
+        return var_dir
+
+    with nc.Dataset(source_file, 'r') as nc_fid:
+        data = np.squeeze(nc_fid.variables[var_name][:])
+    cache_pyramid(build_pyramid(data, min_size=min_size), var_dir, source=signature)
+    return var_dir
+
+# ------------------------------------------------------------------------------
+def select_level(info, max_size):
+    """ selects the finest level whose largest dimension fits in max_size """
+    for nlevel, shape in enumerate(info["levels"]):
+        if max(shape) <= max_size:
+            return nlevel
+    return len(info["levels"]) - 1
+
+# ------------------------------------------------------------------------------
+def _save_png(file_name, array, vmin, vmax, cmap):
+    """ writes a colour mapped array, with transparent NaNs """
+    from matplotlib import image as mpimg
+    out_dir = os.path.dirname(file_name)
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    mpimg.imsave(file_name, np.ma.masked_invalid(array), \
+                 vmin=vmin, vmax=vmax, cmap=cmap)
+
+# ------------------------------------------------------------------------------
+def render_preview(var_dir, out_file, max_size=1024, stat='max', \
+                   vmin=CHL_VMIN, vmax=CHL_VMAX, cmap=CHL_CMAP):
+    """ renders a whole swath preview from the best fitting pyramid level """
+    info = read_pyramid_info(var_dir)
+    if info is None:
+        raise Exception("No pyramid cached in " + var_dir)
+    nlevel = select_level(info, max_size)
+    _save_png(out_file, load_level(var_dir, nlevel, stat), vmin, vmax, cmap)
+    return nlevel
+
+# ------------------------------------------------------------------------------
+def render_tile(var_dir, out_file, nlevel, tile_row, tile_col, \
+                tile_size=DEFAULT_TILE_SIZE, stat='max', \
+                vmin=CHL_VMIN, vmax=CHL_VMAX, cmap=CHL_CMAP):
+    """ renders a single tile of one pyramid level (only reads that tile) """
+    level = load_level(var_dir, nlevel, stat)
+    tile = level[tile_row*tile_size:(tile_row + 1)*tile_size, \
+                 tile_col*tile_size:(tile_col + 1)*tile_size]
+    if tile.size == 0:
+        return False
+    _save_png(out_file, tile, vmin, vmax, cmap)
+    return True
+
+# ------------------------------------------------------------------------------
+def render_tiles(var_dir, out_dir, levels=None, tile_size=DEFAULT_TILE_SIZE, \
+                 stat='max', vmin=CHL_VMIN, vmax=CHL_VMAX, cmap=CHL_CMAP):
+    """ renders all tiles (out_dir/level/row/col.png) of the selected levels """
+    info = read_pyramid_info(var_dir)
+    if info is None:
+        raise Exception("No pyramid cached in " + var_dir)
+    if levels is None:
+        levels = range(len(info["levels"]))
+
+    ntiles = 0
+    for nlevel in levels:
+        nrows, ncols = info["levels"][nlevel]
+        for tile_row in range(int(np.ceil(nrows / float(tile_size)))):
+            for tile_col in range(int(np.ceil(ncols / float(tile_size)))):
+                out_file = os.path.join(out_dir, str(nlevel), str(tile_row), \
+                                        str(tile_col) + '.png')
+                if render_tile(var_dir, out_file, nlevel, tile_row, tile_col, \
+                               tile_size=tile_size, stat=stat, \
+                               vmin=vmin, vmax=vmax, cmap=cmap):
+                    ntiles = ntiles + 1
+    return ntiles
+
+# ------------------------------------------------------------------------------
+def product_quicklooks(product_dir, variables, cache_dir, out_dir, \
+                       max_size=1024, stat='max', vmin=CHL_VMIN, vmax=CHL_VMAX, \
+                       cmap=CHL_CMAP):
+    """ builds pyramids for (file name, variable name) pairs of a product and
+        writes one preview png per variable, returning the output files
+    """
+    out_files = []
+    product_name = os.path.basename(os.path.normpath(product_dir))
+    for file_name, var_name in variables:
+        var_dir = product_pyramid(product_dir, file_name, var_name, cache_dir)
+        out_file = os.path.join(out_dir, product_name + "_" + var_name + ".png")
+        render_preview(var_dir, out_file, max_size=max_size, stat=stat, \
+                       vmin=vmin, vmax=vmax, cmap=cmap)
+        out_files.append(out_file)
+    return out_files
@@ -0,0 +1,176 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+File discovery and netCDF reading shared by the notebooks and batch tools.
+
+Replaces the os.walk / fnmatch.filter loops of the notebooks and the
+downloader: one walk that matches several patterns, optionally returning
+product (.SEN3) directories without entering them.
+
+open_compact is a lower memory alternative to the xr.open_dataset defaults
+of the notebooks, which decode scaled integers to float64 and turn flag
+words with a fill value into float64 (losing the upper bits of the 64 bit
+WQSF): flags keep their unsigned integer type, geophysical variables are
+decoded to float32 (or kept scaled, see decode_compact), and flag masks are
+used as booleans, e.g.
+
+    wqsf = open_compact(WQSF_FILE)['WQSF'].values
+    mask = flag_data_fast(OLCI_L2_CHL_FLAGS, names, values, wqsf)
+    chl = np.where(mask, np.float32(np.nan), open_compact(CHL_FILE)['CHL_NN'].values)
+"""
+import os
+import fnmatch
+import numpy as np
+
+PRODUCT_SUFFIX = '.SEN3'
+
+# ------------------------------------------------------------------------------
+def find_files(root_dir, patterns, directories=False):
+    """ finds the files (or directories) below root_dir matching patterns
+
+        input:
+        root_dir    : directory to search
+        patterns    : fnmatch pattern or list of patterns, e.g. '*OL_2_WFR*.SEN3'
+        directories : match directory names instead of file names; matching
+                      directories and .SEN3 products are not entered
+
+        output:
+        sorted list of paths
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    matches = []
+    stack = [root_dir]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            is_dir = entry.is_dir()
+            if is_dir == directories \
+               and any(fnmatch.fnmatch(entry.name, pattern) for pattern in patterns):
+                matches.append(entry.path)
+                if is_dir:
+                    continue
+            # as os.walk, symbolic links to directories are not followed
+            if is_dir and not entry.is_symlink() \
+               and not (directories and entry.name.endswith(PRODUCT_SUFFIX)):
+                stack.append(entry.path)
+    return sorted(matches)
+
+# ------------------------------------------------------------------------------
+def find_products(root_dir, product_filter='*.SEN3'):
+    """ finds product (.SEN3) directories below root_dir, without entering them """
+    return find_files(root_dir, product_filter, directories=True)
+
+# ------------------------------------------------------------------------------
+def read_rows(nc_variable, row1=None, row2=None, dtype=np.float32):
+    """ reads rows of a netCDF variable, fill values as NaN
+
+        a leading time dimension of length one (L2P files) is dropped.
+        Use dtype=None to keep the stored type (e.g. for flags).
+    """
+    if nc_variable.ndim == 3 and nc_variable.shape[0] == 1:
+        data = nc_variable[0, row1:row2]
+    else:
+        data = nc_variable[row1:row2]
+    if dtype is None:
+        return np.asarray(data)
+    if np.ma.isMaskedArray(data):
+        data = np.ma.filled(data.astype(dtype), np.nan)
+    return np.asarray(data, dtype=dtype)
+
+# ------------------------------------------------------------------------------
+def read_variables(nc_file, names, dtype=np.float32):
+    """ reads whole variables of a netCDF file into a dictionary of arrays """
+    import netCDF4 as nc
+
+    with nc.Dataset(nc_file, 'r') as nc_fid:
+        return {name: read_rows(nc_fid.variables[name], dtype=dtype) for name in names}
+
+# ------------------------------------------------------------------------------
+def read_flags(nc_file, flag_variable):
+    """ reads a flag variable with its flag names and bit values
+
+        output:
+        (flag data, flag names, flag values) as used by flag_data_fast
+    """
+    import netCDF4 as nc
+
+    with nc.Dataset(nc_file, 'r') as nc_fid:
+        variable = nc_fid.variables[flag_variable]
+        flag_names = variable.flag_meanings.split(' ')
+        flag_values = variable.flag_masks
+        flag_data = read_rows(variable, dtype=None)
+    return flag_data, flag_names, flag_values
+
+# ------------------------------------------------------------------------------
+def read_product(product_dir, files, dtype=np.float32):
+    """ reads variables from the netCDF files of a product
+
+        e.g. read_product(OLCI_WFR, {'geo_coordinates.nc': ['longitude', 'latitude'],
+                                     'chl_nn.nc': ['CHL_NN']})
+    """
+    data = {}
+    for file_name, names in files.items():
+        data.update(read_variables(os.path.join(product_dir, file_name), names, dtype=dtype))
+    return data
+
+# ------------------------------------------------------------------------------
+def is_flag_variable(variable):
+    """ True for flag words (flag_masks or flag_values attributes) """
+    return 'flag_masks' in variable.attrs or 'flag_values' in variable.attrs
+
+# ------------------------------------------------------------------------------
+def decode_compact(variable, dtype=np.float32):
+    """ decodes a raw xarray variable (opened with mask_and_scale=False)
+
+        scale_factor / add_offset are applied in dtype, in place, and fill
+        values set to NaN; select a window first to decode only that, e.g.
+        decode_compact(dataset['Oa08_reflectance'][row1:row2, col1:col2])
+    """
+    attrs = dict(variable.attrs)
+    fill_value = attrs.pop('_FillValue', None)
+    scale_factor = attrs.pop('scale_factor', None)
+    add_offset = attrs.pop('add_offset', None)
+    if fill_value is None and scale_factor is None and add_offset is None:
+        return variable
+    raw = variable.values
+    values = raw.astype(dtype)
+    if scale_factor is not None:
+        values *= dtype(scale_factor)
+    if add_offset is not None:
+        values += dtype(add_offset)
+    if fill_value is not None:
+        values[raw == fill_value] = np.nan
+    del raw
+    decoded = variable.copy(data=values)
+    decoded.attrs = attrs
+    return decoded
+
+# ------------------------------------------------------------------------------
+def open_compact(nc_file, keep_scaled=False, variables=None, dtype=np.float32):
+    """ opens a netCDF file with xarray, in compact data types
+
+        input:
+        keep_scaled : leave geophysical variables as stored (e.g. scaled
+                      int16, lazily read) for decode_compact on demand
+        variables   : names of the variables to keep (default: all)
+
+        flag variables always keep their stored unsigned integer type.
+    """
+    import xarray as xr
+
+    dataset = xr.open_dataset(nc_file, mask_and_scale=False)
+    if variables is not None:
+        dataset = dataset[variables]
+    if not keep_scaled:
+        for name in list(dataset.data_vars):
+            if not is_flag_variable(dataset[name]):
+                dataset[name] = decode_compact(dataset[name], dtype=dtype)
+    return dataset
@@ -0,0 +1,387 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Swath to grid resampling for OLCI and SLSTR products.
+
+The expensive part of resampling a swath is working out which source pixels
+feed each grid cell. That index mapping depends only on the geolocation, so
+it is computed once per granule geometry (optionally cached to disk) and then
+applied to every variable of the granule with a vectorised gather.
+
+Typical use:
+
+    grid    = define_grid(-10.0, -8.0, 38.0, 40.0, 0.01)
+    mapping = get_mapping(LON, LAT, grid, method='bilinear', cache_dir='cache')
+    CHL_GRID = apply_mapping(mapping, CHL)
+"""
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from eumetsat_marine.geo import lonlat_to_xyz, chord_length, EARTH_RADIUS
+
+MAPPING_VERSION = 1
+DEFAULT_CHUNK_SIZE = 1000000
+
+# ------------------------------------------------------------------------------
+def define_grid(lon_min, lon_max, lat_min, lat_max, resolution):
+    """ defines a regular lat/lon grid by its cell centres (degrees) """
+    nlon = int(round((lon_max - lon_min) / resolution))
+    nlat = int(round((lat_max - lat_min) / resolution))
+    if nlon < 1 or nlat < 1:
+        raise Exception("Grid extent is smaller than the grid resolution!")
+
+    grid = {
+        "lon": lon_min + (np.arange(nlon) + 0.5) * resolution,
+        "lat": lat_min + (np.arange(nlat) + 0.5) * resolution,
+        "resolution": float(resolution),
+        "extent": (float(lon_min), float(lon_max),
+                   float(lat_min), float(lat_max))
+        }
+    return grid
+
+# ------------------------------------------------------------------------------
+def grid_shape(grid):
+    """ returns the (lat, lon) shape of a grid """
+    return (len(grid["lat"]), len(grid["lon"]))
+
+# ------------------------------------------------------------------------------
+def estimate_pixel_spacing(lon, lat, step=16):
+    """ estimates the along and across track pixel spacing (m) of a swath """
+    xyz = lonlat_to_xyz(lon[::step, ::step], lat[::step, ::step])
+    spacing = []
+    for axis in (0, 1):
+        if xyz.shape[axis] > 1:
+            chord = np.linalg.norm(np.diff(xyz, axis=axis), axis=-1)
+            spacing.append(np.nanmedian(chord) / step)
+    if not spacing:
+        return np.nan
+    return float(np.nanmax(spacing))
+
+# ------------------------------------------------------------------------------
+def mapping_key(lon, lat, grid, method, max_distance):
+    """ builds a cache key that identifies a geometry/grid/method combination """
+    key = hashlib.sha1()
+    for array in (lon, lat):
+        array = np.ascontiguousarray(array)
+        key.update(str(array.shape).encode())
+        key.update(str(array.dtype).encode())
+        key.update(array.data)
+    key.update(repr((grid["extent"], grid["resolution"], method,
+                     max_distance, MAPPING_VERSION)).encode())
+    return key.hexdigest()
+
+# ------------------------------------------------------------------------------
+def _query_tree(tree, targets, max_chord, chunk_size, nprocs):
+    """ chunked nearest neighbour query of a KD-tree """
+    ntarget = targets.shape[0]
+    index = np.empty(ntarget, dtype=np.int64)
+    dist = np.empty(ntarget, dtype=np.float64)
+    for start in range(0, ntarget, chunk_size):
+        stop = min(start + chunk_size, ntarget)
+        dist[start:stop], index[start:stop] = tree.query(targets[start:stop], \
+            k=1, distance_upper_bound=max_chord, workers=nprocs)
+    return dist, index
+
+# ------------------------------------------------------------------------------
+def _bilinear_weights(lon, lat, rows, cols, target_lon, target_lat):
+    """ computes bilinear corner indices and weights around nearest pixels
+
+        the fractional position of each target inside the swath is found by
+        inverting the local (row, column) jacobian of the geolocation at the
+        nearest pixel, so no iterative search is needed.
+    """
+    nrows, ncols = lon.shape
+
+    # forward differences, clipped at the swath edges
+    r_fwd = np.minimum(rows, nrows - 2)
+    c_fwd = np.minimum(cols, ncols - 2)
+
+    lat0 = lat[rows, cols]
+    lon0 = lon[rows, cols]
+    cos_lat = np.cos(np.deg2rad(lat0))
+
+    def _east(dlon):
+        return (((dlon + 180.0) % 360.0) - 180.0) * cos_lat
+
+    # jacobian columns: unit step in row and in column
+    e_r = np.stack((_east(lon[r_fwd + 1, cols] - lon[r_fwd, cols]),
+                    lat[r_fwd + 1, cols] - lat[r_fwd, cols]), axis=-1)
+    e_c = np.stack((_east(lon[rows, c_fwd + 1] - lon[rows, c_fwd]),
+                    lat[rows, c_fwd + 1] - lat[rows, c_fwd]), axis=-1)
+    delta = np.stack((_east(target_lon - lon0), target_lat - lat0), axis=-1)
+
+    det = e_r[:, 0]*e_c[:, 1] - e_r[:, 1]*e_c[:, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac_r = (delta[:, 0]*e_c[:, 1] - delta[:, 1]*e_c[:, 0]) / det
+        frac_c = (e_r[:, 0]*delta[:, 1] - e_r[:, 1]*delta[:, 0]) / det
+
+    # degenerate geometry (e.g. missing neighbours): fall back to nearest
+    bad = ~(np.isfinite(frac_r) & np.isfinite(frac_c))
+    frac_r[bad] = 0.0
+    frac_c[bad] = 0.0
+
+    row0 = np.clip(rows + np.floor(frac_r).astype(np.int64), 0, nrows - 2)
+    col0 = np.clip(cols + np.floor(frac_c).astype(np.int64), 0, ncols - 2)
+    frac_r = np.clip(rows + frac_r - row0, 0.0, 1.0)
+    frac_c = np.clip(cols + frac_c - col0, 0.0, 1.0)
+
+    index = np.stack((row0*ncols + col0, (row0 + 1)*ncols + col0,
+                      row0*ncols + col0 + 1, (row0 + 1)*ncols + col0 + 1), axis=-1)
+    weights = np.stack(((1.0 - frac_r)*(1.0 - frac_c), frac_r*(1.0 - frac_c),
+                        (1.0 - frac_r)*frac_c, frac_r*frac_c), axis=-1)
+
+    index[bad] = (rows[bad]*ncols + cols[bad])[:, np.newaxis]
+    weights[bad] = [1.0, 0.0, 0.0, 0.0]
+
+    return index, weights.astype(np.float32)
+
+# ------------------------------------------------------------------------------
+def build_mapping(lon, lat, grid, method='nearest', max_distance=None, \
+                  chunk_size=DEFAULT_CHUNK_SIZE, nprocs=1):
+    """ builds the swath (lon, lat) to grid index mapping
+
+        input:
+        lon, lat     : 2D swath coordinates (degrees)
+        grid         : grid definition from define_grid
+        method       : 'nearest' or 'bilinear'
+        max_distance : grid cells further than this (m) from a valid pixel are
+                       left empty. Defaults to twice the swath pixel spacing.
+        chunk_size   : number of grid cells queried at once
+        nprocs       : worker threads for the KD-tree queries (-1: all cores)
+
+        output:
+        mapping dictionary, usable with apply_mapping/save_mapping
+    """
+    from scipy.spatial import cKDTree
+
+    if method not in ('nearest', 'bilinear'):
+        raise Exception("Unknown resampling method: " + str(method))
+
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    if lon.ndim != 2 or lon.shape != lat.shape:
+        raise Exception("Swath coordinates must be 2D arrays of equal shape")
+
+    if max_distance is None:
+        max_distance = 2.0 * estimate_pixel_spacing(lon, lat)
+        if not np.isfinite(max_distance):
+            max_distance = grid["resolution"] * np.pi / 180.0 * EARTH_RADIUS
+
+    valid = np.flatnonzero(np.isfinite(lon.ravel()) & np.isfinite(lat.ravel()))
+    tree = cKDTree(lonlat_to_xyz(lon.ravel()[valid], lat.ravel()[valid]))
+
+    grid_lon, grid_lat = np.meshgrid(grid["lon"], grid["lat"])
+    grid_lon = grid_lon.ravel()
+    grid_lat = grid_lat.ravel()
+    _, nearest = _query_tree(tree, lonlat_to_xyz(grid_lon, grid_lat), \
+                             chord_length(max_distance), chunk_size, nprocs)
+    del tree
+
+    target = np.flatnonzero(nearest < valid.size)
+    source = valid[nearest[target]]
+
+    if method == 'nearest':
+        index = source[:, np.newaxis]
+        weights = None
+    else:
+        rows, cols = np.unravel_index(source, lon.shape)
+        index, weights = _bilinear_weights(lon, lat, rows, cols, \
+                                           grid_lon[target], grid_lat[target])
+
+    mapping = {
+        "method": method,
+        "source_shape": lon.shape,
+        "grid_shape": grid_shape(grid),
+        "target": target,
+        "index": index,
+        "weights": weights,
+        "max_distance": float(max_distance)
+        }
+    return mapping
+
+# ------------------------------------------------------------------------------
+def save_mapping(mapping, filename):
+    """ stores a mapping as a compressed numpy archive """
+    arrays = {"method": np.array(mapping["method"]),
+              "source_shape": np.array(mapping["source_shape"]),
+              "grid_shape": np.array(mapping["grid_shape"]),
+              "target": mapping["target"],
+              "index": mapping["index"],
+              "max_distance": np.array(mapping["max_distance"])}
+    if mapping["weights"] is not None:
+        arrays["weights"] = mapping["weights"]
+
+    temp_name = filename + ".part.npz"
+    np.savez_compressed(temp_name, **arrays)
+    os.replace(temp_name, filename)
+
+# ------------------------------------------------------------------------------
+def load_mapping(filename):
+    """ reads a mapping stored by save_mapping """
+    with np.load(filename) as npz:
+        mapping = {
+            "method": str(npz["method"]),
+            "source_shape": tuple(npz["source_shape"]),
+            "grid_shape": tuple(npz["grid_shape"]),
+            "target": npz["target"],
+            "index": npz["index"],
+            "weights": npz["weights"] if "weights" in npz.files else None,
+            "max_distance": float(npz["max_distance"])
+            }
+    return mapping
+
+# ------------------------------------------------------------------------------
+def get_mapping(lon, lat, grid, method='nearest', max_distance=None, \
+                cache_dir=None, nprocs=1):
+    """ returns a mapping, reusing a cached one for identical geometry """
+    lon = np.asarray(lon)
+    lat = np.asarray(lat)
+    if cache_dir is None:
+        return build_mapping(lon, lat, grid, method=method, \
+                             max_distance=max_distance, nprocs=nprocs)
+
+    cache_file = os.path.join(cache_dir, "mapping_" + \
+                 mapping_key(lon, lat, grid, method, max_distance) + ".npz")
+    if os.path.exists(cache_file):
+        return load_mapping(cache_file)
+
+    mapping = build_mapping(lon, lat, grid, method=method, \
+                            max_distance=max_distance, nprocs=nprocs)
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    save_mapping(mapping, cache_file)
+    return mapping
+
+# ------------------------------------------------------------------------------
+def apply_mapping(mapping, data, fill_value=np.nan, dtype=np.float32, \
+                  chunk_size=DEFAULT_CHUNK_SIZE):
+    """ resamples one swath variable to the grid of a mapping
+
+        NaN (or masked) source pixels are ignored; for bilinear mappings the
+        remaining corner weights are renormalised.
+    """
+    if np.ma.isMaskedArray(data):
+        data = np.ma.filled(data.astype(dtype), np.nan)
+    flat = np.asarray(data).reshape(-1)
+    if flat.size != np.prod(mapping["source_shape"]):
+        raise Exception("Data shape does not match the mapping source shape")
+
+    out = np.full(int(np.prod(mapping["grid_shape"])), fill_value, dtype=dtype)
+    target = mapping["target"]
+    index = mapping["index"]
+    weights = mapping["weights"]
+
+    for start in range(0, target.size, chunk_size):
+        stop = min(start + chunk_size, target.size)
+        values = flat[index[start:stop]].astype(dtype, copy=False)
+        if weights is None:
+            out[target[start:stop]] = values[:, 0]
+            continue
+        valid = np.isfinite(values)
+        this_weights = np.where(valid, weights[start:stop], 0.0)
+        weight_sum = this_weights.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = (np.where(valid, values, 0.0)*this_weights).sum(axis=1) \
+                     / weight_sum
+        result[weight_sum <= 0.0] = fill_value
+        out[target[start:stop]] = result
+
+    return out.reshape(mapping["grid_shape"])
+
+# ------------------------------------------------------------------------------
+def resample_variables(mapping, variables, nprocs=1, **kwargs):
+    """ applies one mapping to a dictionary of swath variables """
+    if nprocs == 1:
+        return {name: apply_mapping(mapping, data, **kwargs) \
+                for name, data in variables.items()}
+
+    with ThreadPoolExecutor(max_workers=nprocs) as executor:
+        futures = {name: executor.submit(apply_mapping, mapping, data, **kwargs) \
+                   for name, data in variables.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+# ------------------------------------------------------------------------------
+def resample_product(product_dir, variables, grid, method='nearest', \
+                     coords=("geo_coordinates.nc", "longitude", "latitude"), \
+                     cache_dir=None, nprocs=1):
+    """ resamples variables of a Sentinel-3 product directory to a grid
+
+        input:
+        product_dir : path to the .SEN3 directory (or to a single netCDF file
+                      for SLSTR L2P, where coordinates and data share a file)
+        variables   : list of (file name, variable name) tuples
+        grid        : grid definition from define_grid
+        coords      : (file name, lon variable, lat variable); for SLSTR L2P
+                      use (None, 'lon', 'lat')
+
+        output:
+        dictionary of gridded variables, keyed by variable name
+    """
+    import netCDF4 as nc
+
+    def _path(file_name):
+        if file_name is None:
+            return product_dir
+        return os.path.join(product_dir, file_name)
+
+    with nc.Dataset(_path(coords[0]), 'r') as nc_fid:
+        lon = np.ma.filled(np.squeeze(nc_fid.variables[coords[1]][:]) \
+                           .astype(np.float64), np.nan)
+        lat = np.ma.filled(np.squeeze(nc_fid.variables[coords[2]][:]) \
+                           .astype(np.float64), np.nan)
+
+    mapping = get_mapping(lon, lat, grid, method=method, \
+                          cache_dir=cache_dir, nprocs=nprocs)
+    del lon, lat
+
+    gridded = {}
+    for file_name, var_name in variables:
+        with nc.Dataset(_path(file_name), 'r') as nc_fid:
+            data = np.squeeze(nc_fid.variables[var_name][:])
+        gridded[var_name] = apply_mapping(mapping, data)
+
+    return gridded
+
+# ------------------------------------------------------------------------------
+def bin_to_grid(lon, lat, values, grid, sums=None, counts=None):
+    """ accumulates finite values into grid cell sums and counts
+
+        intended for chunked processing: call once per chunk, passing the
+        sums/counts returned by the previous call, then use binned_mean.
+    """
+    shape = grid_shape(grid)
+    if sums is None:
+        sums = np.zeros(shape, dtype=np.float64)
+    if counts is None:
+        counts = np.zeros(shape, dtype=np.int64)
+
+    lon_min, _, lat_min, _ = grid["extent"]
+    lon = np.asarray(lon, dtype=np.float64).ravel()
+    lat = np.asarray(lat, dtype=np.float64).ravel()
+    if np.ma.isMaskedArray(values):
+        values = np.ma.filled(values.astype(np.float64), np.nan)
+    values = np.asarray(values, dtype=np.float64).ravel()
+
+    with np.errstate(invalid='ignore'):
+        cols = np.floor((lon - lon_min) / grid["resolution"])
+        rows = np.floor((lat - lat_min) / grid["resolution"])
+        valid = np.isfinite(values) & (cols >= 0) & (cols < shape[1]) \
+                & (rows >= 0) & (rows < shape[0])
+    cells = rows[valid].astype(np.int64) * shape[1] + cols[valid].astype(np.int64)
+
+    size = shape[0] * shape[1]
+    sums += np.bincount(cells, weights=values[valid], minlength=size).reshape(shape)
+    counts += np.bincount(cells, minlength=size).reshape(shape)
+    return sums, counts
+
+# ------------------------------------------------------------------------------
+def binned_mean(sums, counts, dtype=np.float32):
+    """ converts accumulated sums/counts into a mean grid (NaN where empty) """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (sums / counts).astype(dtype)
@@ -0,0 +1,223 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Streaming batch processor for SLSTR L2P (GHRSST) SST files.
+
+Applies the processing chain of 21_SLSTR_spatial_interrogation.ipynb to every
+matching file of a directory tree instead of only nc_files[0]:
+
+    1. quality_level threshold (default: keep quality_level 5, as the notebook)
+    2. l2p_flags masking with the shared flag logic
+    3. SSES bias correction (SST + sses_bias, as the notebook)
+    4. split into dual view (D2/D3) and nadir only (N2/N3R/N3) retrievals
+
+Files are read in row chunks, so a worker never holds more than one chunk of
+each variable; statistics and binned grids are accumulated chunk by chunk.
+Files are processed in a process pool.
+
+Usage:
+
+    python -m eumetsat_marine.slstr_sst -r <SLSTR_test_data> -o <output dir>
+"""
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from eumetsat_marine import readers
+from eumetsat_marine.flags import flag_bits, read_flag_meanings
+from eumetsat_marine.statistics import RunningStats, QuantileSketch, write_table
+from eumetsat_marine.resample import define_grid, bin_to_grid, binned_mean
+
+DEFAULT_FILE_FILTER = '*SLSTR*.nc'
+DEFAULT_CHUNK_ROWS = 256
+DEFAULT_MIN_QUALITY = 5
+DEFAULT_RESOLUTION = 0.05
+DEFAULT_PERCENTILES = [5, 50, 95]
+
+# sst_algorithm_type values: 0 none, 1 N2, 2 N3R, 3 N3, 4 D2, 5 D3
+NADIR_ALGORITHMS = (1, 2, 3)
+DUAL_ALGORITHMS = (4, 5)
+
+SST_SUBSETS = ('all', 'dual', 'nadir')
+
+# ------------------------------------------------------------------------------
+def find_files(root_dir, file_filter=DEFAULT_FILE_FILTER):
+    """ finds matching L2P files below root_dir """
+    return readers.find_files(root_dir, file_filter)
+
+# ------------------------------------------------------------------------------
+def file_grid(nc_fid, resolution):
+    """ defines a grid covering a L2P file from its geospatial attributes """
+    lon_min = np.floor(float(nc_fid.geospatial_lon_min) / resolution) * resolution
+    lon_max = np.ceil(float(nc_fid.geospatial_lon_max) / resolution) * resolution
+    lat_min = np.floor(float(nc_fid.geospatial_lat_min) / resolution) * resolution
+    lat_max = np.ceil(float(nc_fid.geospatial_lat_max) / resolution) * resolution
+    return define_grid(lon_min, lon_max, lat_min, lat_max, resolution)
+
+# ------------------------------------------------------------------------------
+def process_file(nc_file, min_quality=DEFAULT_MIN_QUALITY, flags_we_want=(), \
+                 bias_correct=True, chunk_rows=DEFAULT_CHUNK_ROWS, \
+                 grid=None, resolution=DEFAULT_RESOLUTION, out_dir=None):
+    """ processes one L2P file chunk by chunk
+
+        output:
+        dictionary with the file name, RunningStats and QuantileSketch per SST
+        subset ('all', 'dual', 'nadir') and, if out_dir is set, the name of
+        the gridded netCDF file written there.
+    """
+    import netCDF4 as nc
+
+    stats = {subset: RunningStats() for subset in SST_SUBSETS}
+    sketches = {subset: QuantileSketch() for subset in SST_SUBSETS}
+    sums = {subset: None for subset in SST_SUBSETS}
+    counts = {subset: None for subset in SST_SUBSETS}
+
+    with nc.Dataset(nc_file, 'r') as nc_fid:
+        if grid is None and out_dir is not None:
+            grid = file_grid(nc_fid, resolution)
+
+        variables = nc_fid.variables
+        variables['l2p_flags'].set_auto_mask(False)
+        flag_names, flag_vals = read_flag_meanings(variables['l2p_flags'])
+        bits = flag_bits(flags_we_want, flag_names, flag_vals, flag_type='SST')
+        nrows = variables['lat'].shape[-2]
+
+        for row1 in range(0, nrows, chunk_rows):
+            row2 = min(row1 + chunk_rows, nrows)
+
+            sst = readers.read_rows(variables['sea_surface_temperature'], row1, row2, np.float32)
+            quality = readers.read_rows(variables['quality_level'], row1, row2, np.float32)
+            sst[~(quality >= min_quality)] = np.nan
+            if flags_we_want:
+                sst[(readers.read_rows(variables['l2p_flags'], row1, row2, dtype=None) & bits) > 0] = np.nan
+            if bias_correct:
+                sst += readers.read_rows(variables['sses_bias'], row1, row2, np.float32)
+
+            algorithm = readers.read_rows(variables['sst_algorithm_type'], row1, row2, np.float32)
+            subsets = {"all": sst,
+                       "dual": np.where(np.isin(algorithm, DUAL_ALGORITHMS), sst, np.nan),
+                       "nadir": np.where(np.isin(algorithm, NADIR_ALGORITHMS), sst, np.nan)}
+
+            if grid is not None:
+                lon = readers.read_rows(variables['lon'], row1, row2, np.float64)
+                lat = readers.read_rows(variables['lat'], row1, row2, np.float64)
+
+            for subset, values in subsets.items():
+                stats[subset].update(values)
+                sketches[subset].update(values)
+                if grid is not None:
+                    sums[subset], counts[subset] = bin_to_grid(lon, lat, values, \
+                        grid, sums=sums[subset], counts=counts[subset])
+
+    result = {"file": os.path.basename(nc_file), "stats": stats, \
+              "sketches": sketches, "gridded_file": None}
+
+    if out_dir is not None:
+        result["gridded_file"] = write_grid(os.path.join(out_dir, \
+            os.path.splitext(os.path.basename(nc_file))[0] + '_gridded.nc'), \
+            grid, sums, counts)
+
+    return result
+
+# ------------------------------------------------------------------------------
+def write_grid(out_file, grid, sums, counts):
+    """ writes binned mean SST grids and their pixel counts to netCDF """
+    import netCDF4 as nc
+
+    with nc.Dataset(out_file, 'w') as out_fid:
+        out_fid.createDimension('lat', len(grid["lat"]))
+        out_fid.createDimension('lon', len(grid["lon"]))
+        out_fid.createVariable('lat', 'f8', ('lat',))[:] = grid["lat"]
+        out_fid.createVariable('lon', 'f8', ('lon',))[:] = grid["lon"]
+        for subset in SST_SUBSETS:
+            sst = out_fid.createVariable('sst_' + subset, 'f4', ('lat', 'lon'), \
+                  zlib=True, fill_value=np.float32(np.nan))
+            sst.units = 'kelvin'
+            sst[:] = binned_mean(sums[subset], counts[subset])
+            out_fid.createVariable('count_' + subset, 'i4', ('lat', 'lon'), \
+                                   zlib=True)[:] = counts[subset]
+    return out_file
+
+# ------------------------------------------------------------------------------
+def summary_row(name, stats, sketches, percentiles=DEFAULT_PERCENTILES):
+    """ converts per subset accumulators into one row of a statistics table """
+    row = {"file": name}
+    for subset in SST_SUBSETS:
+        row.update(stats[subset].as_dict(prefix='sst_' + subset + '_'))
+        for percentile, value in zip(percentiles, \
+                                     sketches[subset].percentile(percentiles)):
+            row['sst_' + subset + '_p%i' % percentile] = value
+    return row
+
+# ------------------------------------------------------------------------------
+def process_archive(root_dir, out_dir, file_filter=DEFAULT_FILE_FILTER, \
+                    min_quality=DEFAULT_MIN_QUALITY, flags_we_want=(), \
+                    resolution=DEFAULT_RESOLUTION, chunk_rows=DEFAULT_CHUNK_ROWS, \
+                    nprocs=None):
+    """ streams all matching L2P files through the pipeline in parallel
+
+        writes one gridded netCDF per file and slstr_sst_statistics.csv (one
+        row per file, plus an 'ALL' row merging every file) to out_dir.
+    """
+    nc_files = find_files(root_dir, file_filter=file_filter)
+    print("Found %i files" % len(nc_files))
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    rows = []
+    total_stats = {subset: RunningStats() for subset in SST_SUBSETS}
+    total_sketches = {subset: QuantileSketch() for subset in SST_SUBSETS}
+    with ProcessPoolExecutor(max_workers=nprocs) as executor:
+        futures = {executor.submit(process_file, nc_file, min_quality=min_quality, \
+                   flags_we_want=flags_we_want, chunk_rows=chunk_rows, \
+                   resolution=resolution, out_dir=out_dir): nc_file \
+                   for nc_file in nc_files}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as error:
+                print("Failed: " + futures[future] + " (" + str(error) + ")")
+                continue
+            print("Processed: " + result["file"])
+            rows.append(summary_row(result["file"], result["stats"], result["sketches"]))
+            for subset in SST_SUBSETS:
+                total_stats[subset].merge(result["stats"][subset])
+                total_sketches[subset].merge(result["sketches"][subset])
+
+    rows = sorted(rows, key=lambda row: row["file"])
+    rows.append(summary_row("ALL", total_stats, total_sketches))
+    write_table(rows, os.path.join(out_dir, 'slstr_sst_statistics.csv'))
+    return rows
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Batch SLSTR L2P SST processor")
+    parser.add_argument("-r", "--root_dir", type=str, required=True, \
+                        help="root directory to search for L2P files")
+    parser.add_argument("-o", "--out_dir", type=str, default=".", \
+                        help="output directory")
+    parser.add_argument("-f", "--file_filter", type=str, \
+                        default=DEFAULT_FILE_FILTER, help="file name filter")
+    parser.add_argument("-q", "--min_quality", type=int, \
+                        default=DEFAULT_MIN_QUALITY, help="minimum quality_level")
+    parser.add_argument("--flags", type=str, default="", \
+                        help="comma separated l2p_flags to mask (e.g. land,ice)")
+    parser.add_argument("--resolution", type=float, \
+                        default=DEFAULT_RESOLUTION, help="grid resolution (degrees)")
+    parser.add_argument("-n", "--nprocs", type=int, default=None, \
+                        help="number of worker processes")
+    args = parser.parse_args()
+
+    flags_we_want = [flag for flag in args.flags.split(',') if flag != '']
+    process_archive(args.root_dir, args.out_dir, file_filter=args.file_filter, \
+                    min_quality=args.min_quality, flags_we_want=flags_we_want, \
+                    resolution=args.resolution, nprocs=args.nprocs)
+
+if __name__ == "__main__":
+    main()
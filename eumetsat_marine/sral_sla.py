@@ -0,0 +1,216 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Along-track SRAL sea level anomaly (SLA) and absolute dynamic topography (ADT).
+
+Multi-track version of 31_SRAL_SLAs.ipynb. For each SR_2_WAT product only the
+variables needed are read, the surface type mask is computed once, and
+
+    SLA = alt - range - mean_sea_surface - sum(sign * correction)
+    ADT = SLA + mean_dynamic_topography
+
+is accumulated in place into a single buffer instead of a chain of
+intermediate arrays. The correction set is a list of (variable, sign) pairs;
+DEFAULT_CORRECTIONS reproduces the notebook. Only ocean points are kept and
+all tracks of a cycle are written to one compact along-track netCDF file.
+
+Usage:
+
+    python -m eumetsat_marine.sral_sla -r <SRAL_test_data> -o sral_sla.nc
+"""
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from eumetsat_marine import readers
+
+DEFAULT_PRODUCT_FILTER = '*SR_2_WAT*.SEN3'
+DEFAULT_FILE = 'standard_measurement.nc'
+
+# (variable, sign): each correction is subtracted as sign * correction
+DEFAULT_CORRECTIONS = [('iono_cor_alt_01_ku', 1),
+                       ('mod_dry_tropo_cor_meas_altitude_01', 1),
+                       ('rad_wet_tropo_cor_01_ku', 1),
+                       ('ocean_tide_sol1_01', 1),
+                       ('solid_earth_tide_01', -1),
+                       ('pole_tide_01', -1),
+                       ('sea_state_bias_01_ku', 1),
+                       ('hf_fluct_cor_01', 1),
+                       ('inv_bar_cor_01', 1)]
+
+# geophysical variables copied along with SLA/ADT
+DEFAULT_EXTRA_VARIABLES = ['swh_ocean_01_ku', 'sig0_ocean_01_ku', 'wind_speed_alt_01_ku']
+
+SRAL_VARIABLES = {"time": "time_01", "lat": "lat_01", "lon": "lon_01",
+                  "alt": "alt_01", "range": "range_ocean_01_ku",
+                  "mss": "mean_sea_surf_sol1_01", "mdt": "mean_dyn_topo_01",
+                  "surface_type": "surf_type_01"}
+
+# ------------------------------------------------------------------------------
+def _read(nc_variables, name, index=None):
+    """ reads a (scaled) 1 Hz variable as float64, fill values as NaN """
+    data = nc_variables[name][:]
+    if index is not None:
+        data = data[index]
+    return np.ma.filled(np.ma.asarray(data, dtype=np.float64), np.nan)
+
+# ------------------------------------------------------------------------------
+def track_info(product_dir):
+    """ cycle and relative orbit (pass) numbers from a product name """
+    name = os.path.basename(os.path.normpath(product_dir))
+    try:
+        return int(name[69:72]), int(name[73:76])
+    except ValueError:
+        return -1, -1
+
+# ------------------------------------------------------------------------------
+def compute_track(product_dir, corrections=DEFAULT_CORRECTIONS, \
+                  extra_variables=DEFAULT_EXTRA_VARIABLES, input_file=DEFAULT_FILE):
+    """ SLA and ADT of the ocean points of one SR_2_WAT product
+
+        output:
+        dictionary of along-track arrays (time, lat, lon, sla, adt and the
+        extra variables) plus the product name, cycle and pass numbers
+    """
+    import netCDF4 as nc
+
+    with nc.Dataset(os.path.join(product_dir, input_file), 'r') as nc_fid:
+        variables = nc_fid.variables
+
+        # surface mask computed once; everything after is read for ocean only
+        ocean = np.flatnonzero(np.ma.filled(variables[SRAL_VARIABLES["surface_type"]][:], 1) == 0)
+
+        sla = _read(variables, SRAL_VARIABLES["alt"], ocean)
+        sla -= _read(variables, SRAL_VARIABLES["range"], ocean)
+        sla -= _read(variables, SRAL_VARIABLES["mss"], ocean)
+        for name, sign in corrections:
+            if sign >= 0:
+                sla -= _read(variables, name, ocean)
+            else:
+                sla += _read(variables, name, ocean)
+
+        track = {"time": _read(variables, SRAL_VARIABLES["time"], ocean),
+                 "lat": _read(variables, SRAL_VARIABLES["lat"], ocean),
+                 "lon": _read(variables, SRAL_VARIABLES["lon"], ocean),
+                 "sla": sla,
+                 "adt": sla + _read(variables, SRAL_VARIABLES["mdt"], ocean)}
+        for name in extra_variables:
+            track[name] = _read(variables, name, ocean)
+        time_units = getattr(variables[SRAL_VARIABLES["time"]], 'units', '')
+
+    cycle, pass_number = track_info(product_dir)
+    track.update({"product": os.path.basename(os.path.normpath(product_dir)),
+                  "cycle": cycle, "pass": pass_number, "time_units": time_units})
+    return track
+
+# ------------------------------------------------------------------------------
+def write_tracks(out_file, tracks, extra_variables=DEFAULT_EXTRA_VARIABLES, \
+                 corrections=DEFAULT_CORRECTIONS):
+    """ writes tracks as one ragged along-track netCDF file
+
+        points of track i are track_start[i]:track_start[i]+track_count[i]
+    """
+    import netCDF4 as nc
+
+    counts = np.array([len(track["sla"]) for track in tracks], dtype=np.int32)
+    starts = np.r_[0, np.cumsum(counts)[:-1]].astype(np.int32)
+
+    with nc.Dataset(out_file, 'w') as out_fid:
+        out_fid.corrections = ' '.join(('-' if sign >= 0 else '+') + name \
+                                       for name, sign in corrections)
+        out_fid.createDimension('points', int(counts.sum()))
+        out_fid.createDimension('tracks', len(tracks))
+
+        out_fid.createVariable('product', str, ('tracks',))[:] = \
+            np.array([track["product"] for track in tracks], dtype=object)
+        for name, values in (('cycle', [track["cycle"] for track in tracks]),
+                             ('pass', [track["pass"] for track in tracks]),
+                             ('track_start', starts), ('track_count', counts)):
+            out_fid.createVariable(name, 'i4', ('tracks',))[:] = values
+
+        time = out_fid.createVariable('time', 'f8', ('points',), zlib=True)
+        if tracks:
+            time.units = tracks[0]["time_units"]
+        time[:] = np.concatenate([track["time"] for track in tracks]) if tracks else []
+
+        for name in ['lat', 'lon']:
+            out_fid.createVariable(name, 'f8', ('points',), zlib=True)[:] = \
+                np.concatenate([track[name] for track in tracks]) if tracks else []
+        for name in ['sla', 'adt'] + list(extra_variables):
+            variable = out_fid.createVariable(name, 'f4', ('points',), zlib=True, \
+                                              fill_value=np.float32(np.nan))
+            variable[:] = np.concatenate([track[name] for track in tracks]) if tracks else []
+    return out_file
+
+# ------------------------------------------------------------------------------
+def process_cycle(root_dir, out_file, product_filter=DEFAULT_PRODUCT_FILTER, \
+                  corrections=DEFAULT_CORRECTIONS, extra_variables=DEFAULT_EXTRA_VARIABLES, \
+                  input_file=DEFAULT_FILE, nprocs=None):
+    """ computes SLA/ADT for all SR_2_WAT products below root_dir in parallel """
+    products = readers.find_products(root_dir, product_filter=product_filter)
+    print("Found %i products" % len(products))
+
+    tracks = []
+    with ProcessPoolExecutor(max_workers=nprocs) as executor:
+        futures = [executor.submit(compute_track, product, corrections=corrections, \
+                   extra_variables=extra_variables, input_file=input_file) \
+                   for product in products]
+        for product, future in zip(products, futures):
+            try:
+                tracks.append(future.result())
+            except Exception as error:
+                print("Failed: " + product + " (" + str(error) + ")")
+                continue
+            print("Processed: " + tracks[-1]["product"])
+
+    tracks = sorted(tracks, key=lambda track: (track["cycle"], track["pass"], track["product"]))
+    return write_tracks(out_file, tracks, extra_variables=extra_variables, \
+                        corrections=corrections)
+
+# ------------------------------------------------------------------------------
+def parse_corrections(text):
+    """ parses a correction set such as "iono_cor_alt_01_ku,+pole_tide_01"
+
+        corrections are subtracted, a leading '+' adds them instead
+    """
+    corrections = []
+    for item in text.split(','):
+        item = item.strip()
+        if item.startswith('+'):
+            corrections.append((item[1:], -1))
+        elif item != '':
+            corrections.append((item, 1))
+    return corrections
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Along-track SRAL SLA/ADT processor")
+    parser.add_argument("-r", "--root_dir", type=str, required=True, \
+                        help="root directory to search for SR_2_WAT products")
+    parser.add_argument("-o", "--out_file", type=str, default="sral_sla.nc", \
+                        help="output netCDF file")
+    parser.add_argument("-f", "--product_filter", type=str, \
+                        default=DEFAULT_PRODUCT_FILTER, help="product name filter")
+    parser.add_argument("-i", "--input_file", type=str, default=DEFAULT_FILE, \
+                        help="measurement file inside each product")
+    parser.add_argument("-c", "--corrections", type=str, default=None, \
+                        help="comma separated corrections (leading '+' to add)")
+    parser.add_argument("-n", "--nprocs", type=int, default=None, \
+                        help="number of worker processes")
+    args = parser.parse_args()
+
+    corrections = DEFAULT_CORRECTIONS
+    if args.corrections is not None:
+        corrections = parse_corrections(args.corrections)
+    process_cycle(args.root_dir, args.out_file, product_filter=args.product_filter, \
+                  corrections=corrections, input_file=args.input_file, \
+                  nprocs=args.nprocs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Streaming statistics for chunked processing of large (multi-granule) fields.
+
+RunningStats accumulates count/mean/variance/min/max one chunk at a time and
+QuantileSketch keeps a t-digest style summary for approximate percentiles.
+Both can be merged, so per-granule results computed in separate processes
+combine into archive-wide statistics without revisiting the data.
+
+The *_limits functions use them to derive colour scale and outlier limits
+from full orbits or multi-file stacks. Instead of the notebook pattern
+
+    SST_plot = SST.copy()
+    vmin = np.nanmean(SST_plot) - 3*np.nanstd(SST_plot)
+    vmax = np.nanmean(SST_plot) + 3*np.nanstd(SST_plot)
+    SST_plot[SST_plot < vmin] = np.nan
+    SST_plot[SST_plot > vmax] = np.nan
+
+use
+
+    vmin, vmax = std_limits(SST, nstd=3)
+    plt.pcolormesh(LON, LAT, SST, vmin=vmin, vmax=vmax, cmap=clip_colormap('jet'))
+
+which reads the field one chunk at a time and hides out of range values in
+the colour map rather than in a copy of the data.
+"""
+import csv
+import numpy as np
+
+DEFAULT_COMPRESSION = 500
+DEFAULT_BUFFER_SIZE = 100000
+DEFAULT_CHUNK_ROWS = 512
+
+# ------------------------------------------------------------------------------
+def _finite_values(values):
+    """ returns the finite values of an array (or masked array) as float64 """
+    if np.ma.isMaskedArray(values):
+        values = values.compressed()
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return values[np.isfinite(values)]
+
+# ------------------------------------------------------------------------------
+class RunningStats:
+    """ Streaming count, mean, variance, min and max (Welford/Chan) """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        """ adds the finite values of a chunk """
+        values = _finite_values(values)
+        if values.size == 0:
+            return self
+        chunk_mean = values.mean()
+        self._combine(values.size, chunk_mean, \
+                      np.square(values - chunk_mean).sum(), \
+                      values.min(), values.max())
+        return self
+
+    def merge(self, other):
+        """ merges another RunningStats into this one """
+        if other.count > 0:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _combine(self, count, mean, m2, vmin, vmax):
+        """ parallel variance combination of two partial results """
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + m2 + delta**2 * self.count * count / total
+        self.count = total
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+
+    @property
+    def variance(self):
+        """ population variance (as np.nanvar) """
+        if self.count == 0:
+            return np.nan
+        return self.m2 / self.count
+
+    @property
+    def std(self):
+        """ population standard deviation (as np.nanstd) """
+        return np.sqrt(self.variance)
+
+    def as_dict(self, prefix=''):
+        """ summary dictionary, e.g. for a row of a statistics table """
+        empty = self.count == 0
+        return {prefix + "count": self.count,
+                prefix + "mean": np.nan if empty else self.mean,
+                prefix + "std": self.std,
+                prefix + "min": np.nan if empty else self.min,
+                prefix + "max": np.nan if empty else self.max}
+
+# ------------------------------------------------------------------------------
+class QuantileSketch:
+    """ Mergeable approximate quantiles (t-digest style merging digest)
+
+        values are buffered and periodically compressed into weighted
+        centroids. The centroid size limit follows the arcsine scale function,
+        so centroids are small near the tails and the extreme percentiles stay
+        accurate while memory is bounded by roughly the compression parameter.
+    """
+    def __init__(self, compression=DEFAULT_COMPRESSION, \
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer = []
+        self._buffered = 0
+
+    def update(self, values):
+        """ adds the finite values of a chunk """
+        values = _finite_values(values)
+        if values.size == 0:
+            return self
+        self._buffer.append((values, np.ones(values.size)))
+        self._add_count(values.size, values.min(), values.max())
+        return self
+
+    def merge(self, other):
+        """ merges another sketch into this one """
+        other._compress()
+        if other.count > 0:
+            self._buffer.append((other.means, other.weights))
+            self._add_count(other.count, other.min, other.max)
+        return self
+
+    def _add_count(self, count, vmin, vmax):
+        """ bookkeeping of the buffer and the total """
+        self.count = self.count + count
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+        self._buffered = self._buffered + count
+        if self._buffered > self.buffer_size:
+            self._compress()
+
+    def _compress(self):
+        """ merges the buffer into the centroids """
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means] + [item[0] for item in self._buffer])
+        weights = np.concatenate([self.weights] + [item[1] for item in self._buffer])
+        self._buffer = []
+        self._buffered = 0
+
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+
+        # arcsine scale function: k(q) = delta/(2 pi) * asin(2q - 1)
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        q_centre = (cumulative - 0.5 * weights) / total
+        k_scale = self.compression / (2.0 * np.pi) \
+                  * np.arcsin(np.clip(2.0 * q_centre - 1.0, -1.0, 1.0))
+        bucket = np.floor(k_scale)
+
+        # sorted, so buckets are contiguous runs
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        """ approximate quantile(s), q in [0, 1] (as np.nanquantile) """
+        self._compress()
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        centres = np.cumsum(self.weights) - 0.5 * self.weights
+        positions = np.r_[0.0, centres, self.count]
+        values = np.r_[self.min, self.means, self.max]
+        return np.interp(np.asarray(q) * self.count, positions, values)
+
+    def percentile(self, p):
+        """ approximate percentile(s), p in [0, 100] (as np.nanpercentile) """
+        return self.quantile(np.asarray(p) / 100.0)
+
+# ------------------------------------------------------------------------------
+def write_table(rows, filename):
+    """ writes a list of row dictionaries as csv """
+    if not rows:
+        return
+    with open(filename, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+# ------------------------------------------------------------------------------
+def iter_chunks(arrays, mask=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """ yields (chunk, mask chunk) row blocks of one or several arrays
+
+        arrays can be a numpy/masked array, an xarray DataArray or a netCDF4
+        variable (only the rows of each chunk are read), or a list of these
+        for multi-file stacks. mask (True = exclude) follows the same layout.
+        numpy chunks are views: nothing is copied until a chunk is used.
+    """
+    if not isinstance(arrays, (list, tuple)):
+        arrays = [arrays]
+        mask = [mask]
+    elif mask is None:
+        mask = [None] * len(arrays)
+
+    for array, this_mask in zip(arrays, mask):
+        nrows = array.shape[0] if len(array.shape) > 0 else 1
+        for row1 in range(0, nrows, chunk_rows):
+            chunk = array[row1:row1 + chunk_rows] if len(array.shape) > 0 else array
+            mask_chunk = None
+            if this_mask is not None:
+                mask_chunk = np.asarray(this_mask[row1:row1 + chunk_rows], dtype=bool)
+            yield chunk, mask_chunk
+
+# ------------------------------------------------------------------------------
+def _chunk_values(chunk, mask_chunk, absolute=False):
+    """ unmasked values of a chunk (a copy of at most one chunk) """
+    chunk = np.ma.filled(np.ma.asarray(chunk, dtype=np.float64), np.nan) \
+            if np.ma.isMaskedArray(chunk) else np.asarray(chunk, dtype=np.float64)
+    if mask_chunk is not None:
+        chunk = chunk[~mask_chunk]
+    if absolute:
+        chunk = np.abs(chunk)
+    return chunk
+
+# ------------------------------------------------------------------------------
+def streaming_stats(arrays, mask=None, chunk_rows=DEFAULT_CHUNK_ROWS, \
+                    quantiles=False, absolute=False):
+    """ single pass RunningStats (and optionally a QuantileSketch) of arrays
+
+        NaN and masked values are ignored, as with np.nanmean/np.nanstd.
+    """
+    stats = RunningStats()
+    sketch = QuantileSketch() if quantiles else None
+    for chunk, mask_chunk in iter_chunks(arrays, mask=mask, chunk_rows=chunk_rows):
+        values = _chunk_values(chunk, mask_chunk, absolute=absolute)
+        stats.update(values)
+        if sketch is not None:
+            sketch.update(values)
+    return stats, sketch
+
+# ------------------------------------------------------------------------------
+def std_limits(arrays, nstd=3.0, mask=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """ mean -/+ nstd standard deviations, in a single pass """
+    stats, _ = streaming_stats(arrays, mask=mask, chunk_rows=chunk_rows)
+    return stats.mean - nstd * stats.std, stats.mean + nstd * stats.std
+
+# ------------------------------------------------------------------------------
+def percentile_limits(arrays, percentiles=(2, 98), mask=None, \
+                      chunk_rows=DEFAULT_CHUNK_ROWS):
+    """ approximate lower/upper percentiles, in a single pass """
+    _, sketch = streaming_stats(arrays, mask=mask, chunk_rows=chunk_rows, \
+                                quantiles=True)
+    return tuple(sketch.percentile(list(percentiles)))
+
+# ------------------------------------------------------------------------------
+def symmetric_limit(arrays, percentile=95, mask=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """ approximate percentile of the absolute values (anomaly colour scales),
+        equivalent to np.percentile(np.abs(x[np.isfinite(x)]), percentile)
+    """
+    _, sketch = streaming_stats(arrays, mask=mask, chunk_rows=chunk_rows, \
+                                quantiles=True, absolute=True)
+    return float(sketch.percentile(percentile))
+
+# ------------------------------------------------------------------------------
+def clip_colormap(cmap):
+    """ copy of a matplotlib colour map that draws values outside vmin/vmax
+        (and NaNs) as transparent, replacing the NaN-ing of a data copy
+    """
+    import matplotlib
+    if isinstance(cmap, str):
+        cmap = matplotlib.colormaps[cmap] if hasattr(matplotlib, 'colormaps') \
+               else matplotlib.cm.get_cmap(cmap)
+    cmap = cmap.copy()
+    cmap.set_under('none')
+    cmap.set_over('none')
+    cmap.set_bad('none')
+    return cmap
@@ -0,0 +1,191 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Tie-point grid interpolation of the OLCI / SLSTR geometry and meteo fields.
+
+OLCI sun/view angles (tie_geometries.nc: SZA, SAA, OZA, OAA) and meteo
+(tie_meteo.nc) are given every ac_subsampling_factor columns (64) and
+al_subsampling_factor rows (1) of the image grid. They are upsampled here
+with bilinear interpolation, only over the requested window (row1, row2,
+col1, col2) and only from the tie points around it, so a granule can be
+processed in row blocks. Azimuths are interpolated as unit vectors, so the
+0/360 degree wrap is handled. Trailing dimensions (e.g. pressure levels,
+wind vectors) are interpolated as well.
+
+SLSTR tie points (geometry_tn.nc, met_tx.nc) are on a regular x/y grid
+(cartesian_tx.nc); slstr_tie_indices gives the fractional tie point row
+and column of the image pixels from their x/y (cartesian_in.nc, ...).
+
+Typical use (TOA reflectance of OLCI band 8 over a window):
+
+    sza = read_tie_variable(L1_DIR, 'tie_geometries.nc', 'SZA', window)
+    rho = toa_reflectance(L1_DIR, 8, window, sza=sza)
+"""
+import os
+import numpy as np
+
+# azimuth variables (interpolated as unit vectors)
+ANGULAR_VARIABLES = ['SAA', 'OAA', 'solar_azimuth_tn', 'sat_azimuth_tn', \
+                     'solar_azimuth_to', 'sat_azimuth_to']
+
+# ------------------------------------------------------------------------------
+def tie_coordinates(start, stop, factor, ntie):
+    """ tie point indices (i0) and weights (of i0 + 1) of image rows/columns start:stop
+
+        image pixel k lies at tie position k / factor.
+    """
+    position = np.arange(start, stop, dtype=np.float64) / factor
+    index = np.clip(np.floor(position).astype(np.intp), 0, max(ntie - 2, 0))
+    weight = np.clip(position - index, 0.0, 1.0) if ntie > 1 else np.zeros_like(position)
+    return index, weight
+
+# ------------------------------------------------------------------------------
+def _expand(weight, ndim, axis):
+    """ reshapes 1-D weights to broadcast along axis of an ndim array """
+    shape = [1] * ndim
+    shape[axis] = weight.size
+    return weight.reshape(shape)
+
+# ------------------------------------------------------------------------------
+def bilinear(tie, rows, cols):
+    """ bilinear interpolation of a tie point array at fractional positions
+
+        input:
+        tie  : (tie rows, tie columns, ...) array
+        rows : (index, weight) of the output rows, 1-D, or 2-D (per pixel)
+        cols : (index, weight) of the output columns, same dimensions as rows
+
+        1-D positions (regular grids) are interpolated separably, columns
+        first, so the cost is about two multiply-adds per output value.
+    """
+    row_index, row_weight = rows
+    col_index, col_weight = cols
+    if row_index.ndim == 1:
+        ntie_cols = tie.shape[1]
+        col_next = np.minimum(col_index + 1, ntie_cols - 1)
+        weight = _expand(col_weight, tie.ndim, 1)
+        across = tie[:, col_index] * (1.0 - weight) + tie[:, col_next] * weight
+        row_next = np.minimum(row_index + 1, tie.shape[0] - 1)
+        weight = _expand(row_weight, tie.ndim, 0)
+        return across[row_index] * (1.0 - weight) + across[row_next] * weight
+
+    row_next = np.minimum(row_index + 1, tie.shape[0] - 1)
+    col_next = np.minimum(col_index + 1, tie.shape[1] - 1)
+    extra = (slice(None),) * 2 + (np.newaxis,) * (tie.ndim - 2)
+    row_weight, col_weight = row_weight[extra], col_weight[extra]
+    return (tie[row_index, col_index] * (1.0 - col_weight) \
+            + tie[row_index, col_next] * col_weight) * (1.0 - row_weight) \
+           + (tie[row_next, col_index] * (1.0 - col_weight) \
+              + tie[row_next, col_next] * col_weight) * row_weight
+
+# ------------------------------------------------------------------------------
+def interpolate(tie, rows, cols, angular=False):
+    """ bilinear interpolation, azimuths (degrees) through their unit vectors """
+    if not angular:
+        return bilinear(tie, rows, cols)
+    radians = np.deg2rad(tie)
+    east = bilinear(np.sin(radians), rows, cols)
+    north = bilinear(np.cos(radians), rows, cols)
+    azimuth = np.rad2deg(np.arctan2(east, north))
+    # keep the 0..360 convention of the input (-180..180 otherwise); np.mod
+    # of -0.0 or a tiny negative angle gives 360.0
+    if np.nanmin(tie) >= 0.0:
+        azimuth = np.mod(azimuth, 360.0)
+        azimuth[azimuth >= 360.0] -= 360.0
+    return azimuth
+
+# ------------------------------------------------------------------------------
+def subsampling_factors(nc_fid):
+    """ (along track, across track) subsampling factors of an OLCI tie file """
+    return int(nc_fid.getncattr('al_subsampling_factor')), \
+           int(nc_fid.getncattr('ac_subsampling_factor'))
+
+# ------------------------------------------------------------------------------
+def read_tie_variable(product_dir, file_name, name, window, factors=None, \
+                      dtype=np.float32):
+    """ interpolates an OLCI tie point variable over an image window
+
+        input:
+        window  : (row1, row2, col1, col2) on the image grid
+        factors : (along track, across track) subsampling factors, default
+                  from the file attributes
+
+        output:
+        (row2 - row1, col2 - col1, ...) array; only the tie rows covering the
+        window are read
+    """
+    import netCDF4 as nc
+
+    row1, row2, col1, col2 = window
+    with nc.Dataset(os.path.join(product_dir, file_name), 'r') as nc_fid:
+        if factors is None:
+            factors = subsampling_factors(nc_fid)
+        variable = nc_fid.variables[name]
+        ntie_rows, ntie_cols = variable.shape[:2]
+        rows = tie_coordinates(row1, row2, factors[0], ntie_rows)
+        cols = tie_coordinates(col1, col2, factors[1], ntie_cols)
+        # read only the tie rows needed by the window
+        tie_row1 = int(rows[0].min())
+        tie_row2 = min(int(rows[0].max()) + 2, ntie_rows)
+        tie = np.ma.filled(variable[tie_row1:tie_row2].astype(np.float64), np.nan)
+    rows = (rows[0] - tie_row1, rows[1])
+    angular = name in ANGULAR_VARIABLES
+    values = interpolate(tie, rows, cols, angular=angular).astype(dtype)
+    if angular and np.nanmin(tie) >= 0.0:
+        # azimuths just below 360 can round up to 360 in float32
+        values[values >= 360.0] -= 360.0
+    return values
+
+# ------------------------------------------------------------------------------
+def read_tie_variables(product_dir, file_name, names, window, factors=None, \
+                       dtype=np.float32):
+    """ interpolates several tie point variables of a file over a window """
+    return {name: read_tie_variable(product_dir, file_name, name, window, factors, dtype) \
+            for name in names}
+
+# ------------------------------------------------------------------------------
+def slstr_tie_indices(x_image, y_image, x_tie, y_tie):
+    """ fractional tie point (rows, cols) of SLSTR image pixels from their x/y
+
+        input:
+        x_image, y_image : image grid cartesian coordinates (e.g. x_in, y_in)
+        x_tie, y_tie     : tie point grid coordinates (x_tx, y_tx), regular
+
+        output:
+        (rows, cols) as (index, weight) pairs for bilinear / interpolate
+    """
+    x_step = x_tie[0, 1] - x_tie[0, 0]
+    y_step = y_tie[1, 0] - y_tie[0, 0]
+    result = []
+    for position, ntie in [((y_image - y_tie[0, 0]) / y_step, x_tie.shape[0]), \
+                           ((x_image - x_tie[0, 0]) / x_step, x_tie.shape[1])]:
+        index = np.clip(np.floor(position).astype(np.intp), 0, ntie - 2)
+        result.append((index, np.clip(position - index, 0.0, 1.0)))
+    return result[0], result[1]
+
+# ------------------------------------------------------------------------------
+def toa_reflectance(product_dir, band, window, sza=None, dtype=np.float32):
+    """ OLCI TOA reflectance pi L / (F0 cos(SZA)) of a band over a window
+
+        the solar flux F0 is taken per detector (instrument_data.nc) and the
+        sun zenith angle interpolated from the tie points, if not given.
+    """
+    import netCDF4 as nc
+
+    row1, row2, col1, col2 = window
+    if sza is None:
+        sza = read_tie_variable(product_dir, 'tie_geometries.nc', 'SZA', window)
+    name = 'Oa%02i_radiance' % band
+    with nc.Dataset(os.path.join(product_dir, name + '.nc'), 'r') as nc_fid:
+        radiance = np.ma.filled(nc_fid.variables[name][row1:row2, col1:col2] \
+                                .astype(dtype), np.nan)
+    with nc.Dataset(os.path.join(product_dir, 'instrument_data.nc'), 'r') as nc_fid:
+        detector = nc_fid.variables['detector_index'][row1:row2, col1:col2]
+        solar_flux = np.asarray(nc_fid.variables['solar_flux'][band - 1], dtype=dtype)
+    flux = np.where(np.ma.getmaskarray(detector), np.nan, \
+                    solar_flux[np.ma.filled(detector, 0).astype(np.intp)])
+    return (np.pi * radiance / (flux * np.cos(np.deg2rad(sza)))).astype(dtype)
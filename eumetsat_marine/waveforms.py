@@ -0,0 +1,271 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Streaming aggregation of 20 Hz SRAL and Jason-3 Ku band waveforms.
+
+Archive version of 33_SRAL_Waveforms.ipynb. Instead of loading whole waveform
+matrices and averaging fancy-indexed subsets, waveforms are read in row chunks,
+assigned to bins of a 20 Hz variable (SWH, sigma0 or surface class) and
+accumulated into per-bin mean/variance waveforms that are merged across tracks
+processed in parallel.
+
+Bin edges are either given or computed first as equal-count quantile edges
+from mergeable quantile sketches of the binning variable (which is small
+compared with the waveforms), so no finite-value copies are made.
+
+Usage:
+
+    python -m eumetsat_marine.waveforms -r <SRAL_test_data> -s sral -b swh -o waveforms.nc
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from eumetsat_marine import readers
+from eumetsat_marine.statistics import QuantileSketch
+
+DEFAULT_NBINS = 10
+DEFAULT_CHUNK_ROWS = 2000
+
+# files, waveform, sample index and binning variables of each mission
+SOURCES = {
+    "sral": {"pattern": "enhanced_measurement.nc",
+             "waveform": "waveform_20_ku", "samples": "echo_sample_ind",
+             "bins": {"swh": "swh_ocean_20_ku", "sig0": "sig0_ocean_20_ku",
+                      "class": "surf_class_20_ku"}},
+    "jason": {"pattern": "JA3_*.nc",
+              "waveform": "waveforms_20hz_ku", "samples": "wvf_ind",
+              "bins": {"swh": "swh_20hz_ku", "sig0": "sig0_20hz_ku",
+                       "class": "surface_type"}},
+    }
+
+# ------------------------------------------------------------------------------
+class WaveformStats:
+    """ Per-bin streaming mean and variance waveforms (Welford/Chan)
+
+        count, mean and m2 have shape (nbins, nsamples); NaN samples are
+        ignored, so each sample of each bin has its own count.
+    """
+    def __init__(self, nbins, nsamples):
+        self.count = np.zeros((nbins, nsamples), dtype=np.int64)
+        self.mean = np.zeros((nbins, nsamples), dtype=np.float64)
+        self.m2 = np.zeros((nbins, nsamples), dtype=np.float64)
+
+    def update(self, bins, waveforms):
+        """ adds waveforms (n, nsamples) with bin numbers bins (n,), -1 = skip """
+        for index in np.unique(bins[bins >= 0]):
+            chunk = waveforms[bins == index]
+            valid = np.isfinite(chunk)
+            count = valid.sum(axis=0)
+            chunk = np.where(valid, chunk, 0.0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.where(count > 0, chunk.sum(axis=0) / count, 0.0)
+            m2 = (np.where(valid, chunk - mean, 0.0)**2).sum(axis=0)
+            self._combine(index, count, mean, m2)
+        return self
+
+    def merge(self, other):
+        """ merges another WaveformStats into this one """
+        for index in range(self.count.shape[0]):
+            self._combine(index, other.count[index], other.mean[index], other.m2[index])
+        return self
+
+    def _combine(self, index, count, mean, m2):
+        """ parallel variance combination of bin index with a partial result """
+        total = self.count[index] + count
+        safe_total = np.maximum(total, 1)
+        delta = mean - self.mean[index]
+        self.mean[index] = self.mean[index] + delta * count / safe_total
+        self.m2[index] = self.m2[index] + m2 \
+                         + delta**2 * self.count[index] * count / safe_total
+        self.count[index] = total
+
+    @property
+    def average(self):
+        """ mean waveforms, NaN where a bin is empty """
+        return np.where(self.count > 0, self.mean, np.nan)
+
+    @property
+    def std(self):
+        """ population standard deviation waveforms """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 0, np.sqrt(self.m2 / self.count), np.nan)
+
+# ------------------------------------------------------------------------------
+def _read_rows(nc_variable, row1, row2, nrepeat=1, waveform=False):
+    """ reads rows of a variable flattened to 20 Hz records, fill values as NaN
+
+        1 Hz variables (e.g. Jason surface_type) are repeated nrepeat times,
+        waveforms are returned as (records, samples)
+    """
+    data = np.ma.filled(np.ma.asarray(nc_variable[row1:row2], dtype=np.float64), np.nan)
+    if waveform:
+        return data.reshape(-1, data.shape[-1])
+    if nrepeat > 1 and data.ndim == 1:
+        data = np.repeat(data, nrepeat)
+    return data.reshape(-1)
+
+# ------------------------------------------------------------------------------
+def bin_sketch(nc_file, source, bin_name, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """ quantile sketch of the binning variable of one track """
+    import netCDF4 as nc
+
+    sketch = QuantileSketch()
+    with nc.Dataset(nc_file, 'r') as nc_fid:
+        variable = nc_fid.variables[SOURCES[source]["bins"][bin_name]]
+        for row1 in range(0, variable.shape[0], chunk_rows):
+            sketch.update(_read_rows(variable, row1, row1 + chunk_rows))
+    return sketch
+
+# ------------------------------------------------------------------------------
+def quantile_edges(nc_files, source, bin_name, nbins=DEFAULT_NBINS, nprocs=None):
+    """ equal-count bin edges of the binning variable over all tracks """
+    sketch = QuantileSketch()
+    with ProcessPoolExecutor(max_workers=nprocs) as executor:
+        for track_sketch in executor.map(bin_sketch, nc_files, \
+                                         [source] * len(nc_files), \
+                                         [bin_name] * len(nc_files)):
+            sketch.merge(track_sketch)
+    return sketch.quantile(np.linspace(0.0, 1.0, nbins + 1))
+
+# ------------------------------------------------------------------------------
+def assign_bins(values, edges=None, categories=None):
+    """ bin number of each value, -1 outside the edges / categories """
+    if categories is not None:
+        bins = np.full(values.shape, -1, dtype=np.int64)
+        for index, category in enumerate(categories):
+            bins[values == category] = index
+        return bins
+    bins = np.searchsorted(edges, values, side='right') - 1
+    # the last edge is inclusive, so the maximum falls in the last bin
+    bins[values == edges[-1]] = len(edges) - 2
+    bins[~np.isfinite(values) | (bins < 0) | (bins > len(edges) - 2)] = -1
+    return bins
+
+# ------------------------------------------------------------------------------
+def aggregate_track(nc_file, source, bin_name, edges=None, categories=None, \
+                    chunk_rows=DEFAULT_CHUNK_ROWS):
+    """ per-bin waveform statistics of one track, read chunk by chunk """
+    import netCDF4 as nc
+
+    names = SOURCES[source]
+    nbins = len(categories) if categories is not None else len(edges) - 1
+    with nc.Dataset(nc_file, 'r') as nc_fid:
+        waveform = nc_fid.variables[names["waveform"]]
+        bin_variable = nc_fid.variables[names["bins"][bin_name]]
+        # number of 20 Hz records per row (20 for Jason, 1 for SRAL)
+        nrepeat = int(np.prod(waveform.shape[1:-1]))
+        stats = WaveformStats(nbins, waveform.shape[-1])
+
+        for row1 in range(0, waveform.shape[0], chunk_rows):
+            row2 = row1 + chunk_rows
+            values = _read_rows(bin_variable, row1, row2, nrepeat=nrepeat)
+            bins = assign_bins(values, edges=edges, categories=categories)
+            if np.any(bins >= 0):
+                stats.update(bins, _read_rows(waveform, row1, row2, waveform=True))
+    return stats
+
+# ------------------------------------------------------------------------------
+def aggregate(nc_files, source, bin_name, edges=None, categories=None, \
+              chunk_rows=DEFAULT_CHUNK_ROWS, nprocs=None):
+    """ merges the per-bin waveform statistics of all tracks, in parallel """
+    stats = None
+    with ProcessPoolExecutor(max_workers=nprocs) as executor:
+        futures = [executor.submit(aggregate_track, nc_file, source, bin_name, \
+                   edges=edges, categories=categories, chunk_rows=chunk_rows) \
+                   for nc_file in nc_files]
+        for nc_file, future in zip(nc_files, futures):
+            try:
+                track_stats = future.result()
+            except Exception as error:
+                print("Failed: " + nc_file + " (" + str(error) + ")")
+                continue
+            stats = track_stats if stats is None else stats.merge(track_stats)
+    return stats
+
+# ------------------------------------------------------------------------------
+def write_waveforms(out_file, stats, samples, edges=None, categories=None, bin_name=''):
+    """ writes per-bin mean/std waveforms and counts to netCDF """
+    import netCDF4 as nc
+
+    nbins, nsamples = stats.count.shape
+    with nc.Dataset(out_file, 'w') as out_fid:
+        out_fid.binning_variable = bin_name
+        out_fid.createDimension('bins', nbins)
+        out_fid.createDimension('samples', nsamples)
+        out_fid.createVariable('samples', 'f8', ('samples',))[:] = samples
+        if categories is not None:
+            out_fid.createVariable('bin_category', 'f8', ('bins',))[:] = categories
+        else:
+            out_fid.createDimension('edges', nbins + 1)
+            out_fid.createVariable('bin_edges', 'f8', ('edges',))[:] = edges
+        out_fid.createVariable('count', 'i8', ('bins', 'samples'))[:] = stats.count
+        out_fid.createVariable('mean', 'f8', ('bins', 'samples'), \
+                               fill_value=np.nan)[:] = stats.average
+        out_fid.createVariable('std', 'f8', ('bins', 'samples'), \
+                               fill_value=np.nan)[:] = stats.std
+    return out_file
+
+# ------------------------------------------------------------------------------
+def process_archive(root_dir, out_file, source='sral', bin_name='swh', \
+                    nbins=DEFAULT_NBINS, edges=None, categories=None, \
+                    chunk_rows=DEFAULT_CHUNK_ROWS, nprocs=None):
+    """ bins and averages all waveforms of an archive, writes out_file """
+    import netCDF4 as nc
+
+    nc_files = readers.find_files(root_dir, SOURCES[source]["pattern"])
+    print("Found %i files" % len(nc_files))
+    if not nc_files:
+        raise Exception("No " + source + " files found in " + root_dir)
+
+    if categories is None and edges is None:
+        edges = quantile_edges(nc_files, source, bin_name, nbins=nbins, nprocs=nprocs)
+        print("Bin edges: " + ', '.join('%.3f' % edge for edge in edges))
+
+    stats = aggregate(nc_files, source, bin_name, edges=edges, categories=categories, \
+                      chunk_rows=chunk_rows, nprocs=nprocs)
+    if stats is None:
+        raise Exception("No track could be processed")
+
+    with nc.Dataset(nc_files[0], 'r') as nc_fid:
+        samples = nc_fid.variables[SOURCES[source]["samples"]][:]
+    return write_waveforms(out_file, stats, samples, edges=edges, \
+                           categories=categories, bin_name=SOURCES[source]["bins"][bin_name])
+
+# ------------------------------------------------------------------------------
+def main():
+    """ command line interface """
+    parser = argparse.ArgumentParser(description="Streaming 20 Hz waveform aggregation")
+    parser.add_argument("-r", "--root_dir", type=str, required=True, \
+                        help="root directory to search for track files")
+    parser.add_argument("-o", "--out_file", type=str, default="waveforms.nc", \
+                        help="output netCDF file")
+    parser.add_argument("-s", "--source", type=str, default="sral", \
+                        choices=sorted(SOURCES), help="mission")
+    parser.add_argument("-b", "--bin_name", type=str, default="swh", \
+                        choices=["swh", "sig0", "class"], \
+                        help="binning variable (class: surface class 0 to nbins-1)")
+    parser.add_argument("--nbins", type=int, default=DEFAULT_NBINS, \
+                        help="number of equal-count bins")
+    parser.add_argument("--edges", type=str, default=None, \
+                        help="comma separated bin edges instead of quantile edges")
+    parser.add_argument("-n", "--nprocs", type=int, default=None, \
+                        help="number of worker processes")
+    args = parser.parse_args()
+
+    edges = None
+    categories = None
+    if args.edges is not None:
+        edges = np.array([float(edge) for edge in args.edges.split(',')])
+    elif args.bin_name == "class":
+        categories = list(range(args.nbins))
+    process_archive(args.root_dir, args.out_file, source=args.source, \
+                    bin_name=args.bin_name, nbins=args.nbins, edges=edges, \
+                    categories=categories, nprocs=args.nprocs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+#    Version:   1.0
+#    Date:      10/2026
+#    Credit:    This code was developed for EUMETSAT under contracts for the
+#               Copernicus programme.
+#    License:   This code is offered as open source and free-to-use in the
+#               public domain, with no warranty.
+"""
+Installs the shared processing package, so the notebooks and scripts can
+import it from any directory:
+
+    pip install -e .
+"""
+from setuptools import setup
+
+setup(name='eumetsat_marine',
+      version='1.0',
+      description='Shared processing tools for the EUMETSAT Sentinel-3 marine training code',
+      license='Public domain',
+      packages=['eumetsat_marine'],
+      python_requires='>=3.7',
+      install_requires=['numpy'],
+      extras_require={'netcdf': ['netCDF4'],
+                      'full': ['netCDF4', 'scipy', 'matplotlib', 'pandas', 'xarray', 'cartopy'],
+                      'test': ['pytest', 'pytest-benchmark', 'netCDF4', 'scipy']})
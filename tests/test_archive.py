@@ -0,0 +1,51 @@
+import fnmatch
+import os
+
+import pytest
+
+from eumetsat_marine import archive
+
+OLCI = 'S3A_OL_2_WFR____20180101T045629_20180101T045929_20180102T105453_0179_026_076_2700_MAR_O_NT_002.SEN3'
+SLSTR = 'S3B_SL_2_WST____20180102T101010_20180102T101310_20180103T120000_0179_026_076_2700_MAR_O_NT_003.SEN3'
+
+
+@pytest.fixture
+def archive_tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, 'CACHE_DIR', str(tmp_path / 'cache'))
+    root = tmp_path / 'archive'
+    for day, product, members in [('2018/01/01', OLCI, ['Oa01_reflectance.nc', 'chl_nn.nc']),
+                                  ('2018/01/02', SLSTR, ['L2P.nc'])]:
+        product_dir = root / day / product
+        product_dir.mkdir(parents=True)
+        for member in members + ['xfdumanifest.xml']:
+            (product_dir / member).write_text('x')
+    return str(root)
+
+
+def walk(root, pattern):
+    return sorted(os.path.join(path, name) for path, _, names in os.walk(root)
+                  for name in fnmatch.filter(names, pattern))
+
+
+def test_find_matches_os_walk(archive_tree):
+    for pattern in ['*reflectance*.nc', '*.nc', 'xfdumanifest.xml']:
+        assert archive.find(archive_tree, pattern) == walk(archive_tree, pattern)
+
+
+def test_find_keeps_archive_unchanged(archive_tree):
+    mtime = os.stat(archive_tree).st_mtime
+    archive.find(archive_tree, '*.nc')
+    assert os.listdir(archive_tree) == ['2018']
+    assert os.stat(archive_tree).st_mtime == mtime
+    counts = archive.scan(archive_tree, db_file=os.path.join(archive.CACHE_DIR, 'second.db'))
+    assert counts["listed"] > 0
+    counts = archive.scan(archive_tree, db_file=os.path.join(archive.CACHE_DIR, 'second.db'))
+    assert counts["listed"] == 0
+
+
+def test_product_queries(archive_tree, tmp_path):
+    db_file = str(tmp_path / 'archive.db')
+    archive.scan(archive_tree, db_file=db_file)
+    products = archive.query(db_file, products_only=True)
+    assert [os.path.basename(path) for path in products] == [OLCI, SLSTR]
+    assert archive.query(db_file, mission='S3B', start='2018-01-02') == products[1:]
@@ -0,0 +1,29 @@
+"""
+pytest-benchmark suite of the hot-path functions, on the synthetic swaths of
+eumetsat_marine.benchmark (shrunk to BENCHMARK_SCALE):
+
+    python -m pytest tests/test_benchmarks.py --benchmark-autosave
+    python -m pytest tests/test_benchmarks.py --benchmark-compare --benchmark-compare-fail=min:25%
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from eumetsat_marine.benchmark import cases
+
+BENCHMARK_SCALE = 0.1
+CASES = cases(BENCHMARK_SCALE)
+
+
+@pytest.mark.parametrize("name, sensor, shape, setup", CASES, ids=[case[0] for case in CASES])
+def test_hot_path(benchmark, name, sensor, shape, setup):
+    try:
+        function = setup()
+    except ImportError as error:
+        pytest.skip(str(error))
+    benchmark.group = sensor
+    benchmark.extra_info["shape"] = shape
+    try:
+        benchmark(function)
+    except ImportError as error:
+        pytest.skip(str(error))
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from eumetsat_marine.collocation import build_collocation, collocate_values
+from eumetsat_marine.geo import haversine
+
+
+def target_grid():
+    lon, lat = np.meshgrid(np.arange(0.0, 0.1, 0.01), np.arange(0.0, 0.1, 0.01))
+    values = np.arange(lon.size, dtype=np.float32).reshape(lon.shape)
+    values[0, 0] = np.nan
+    return lon, lat, values
+
+
+@pytest.mark.parametrize("source_lon", [
+    [5.0, 0.05, 0.02],          # no neighbour at the start
+    [0.05, 5.0, 0.02],          # in the middle
+    [0.05, 0.02, 5.0, 6.0],     # at the end (track leaving the swath)
+    [5.0, 6.0],                 # none at all
+])
+def test_radius_empty_rows(source_lon):
+    lon, lat, values = target_grid()
+    source_lon = np.array(source_lon)
+    source_lat = np.full(source_lon.shape, 0.05)
+    mapping = build_collocation(source_lon, source_lat, lon, lat, method='radius',
+                                radius=5000.0)
+    result = collocate_values(mapping, values)
+
+    assert result.shape == source_lon.shape
+    for i in range(source_lon.size):
+        near = haversine(lon, lat, source_lon[i], source_lat[i]) <= 5000.0
+        near &= np.isfinite(values)
+        if near.any():
+            assert result[i] == pytest.approx(values[near].mean(), rel=1e-5)
+        else:
+            assert np.isnan(result[i])
+
+
+def test_nearest():
+    lon, lat, values = target_grid()
+    mapping = build_collocation(np.array([0.031, 5.0]), np.array([0.049, 0.0]), lon, lat,
+                                max_distance=2000.0)
+    result = collocate_values(mapping, values)
+    assert result[0] == values[5, 3]
+    assert np.isnan(result[1])
@@ -0,0 +1,30 @@
+import os
+import sys
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_validator():
+    spec = importlib.util.spec_from_file_location( \
+        "config_validator", os.path.join(ROOT, "Configuration_testing", "config_validator.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_prewarm_without_cartopy(monkeypatch, capsys):
+    validator = load_validator()
+    # a None entry makes the import fail as if cartopy were not installed
+    for name in ('cartopy', 'cartopy.io', 'cartopy.io.shapereader'):
+        monkeypatch.setitem(sys.modules, name, None)
+
+    results = validator.validate(prewarm=['50m'], modules=(['os'], []), cache_file=None)
+
+    assert results['ok']
+    assert [(layer['resolution'], layer['name'], layer['path'], layer['error']) \
+            for layer in results['natural_earth']] == \
+           [('50m', 'land', None, 'cartopy not installed'), \
+            ('50m', 'coastline', None, 'cartopy not installed')]
+    output = capsys.readouterr().out
+    assert 'Natural Earth 50m land not available (cartopy not installed)' in output
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+nc = pytest.importorskip("netCDF4")
+
+from eumetsat_marine.crop import crop_product, footprint_window, in_box
+
+
+def write_grid_file(path, variables, shape):
+    with nc.Dataset(path, 'w') as nc_fid:
+        nc_fid.createDimension('rows', shape[0])
+        nc_fid.createDimension('columns', shape[1])
+        for name, values in variables.items():
+            nc_fid.createVariable(name, 'f8', ('rows', 'columns'))[:] = values
+
+
+def slstr_product(product_dir):
+    """ 1 km (_in) geolocation and band, 500 m (_an) band, all on rows/columns """
+    os.makedirs(product_dir)
+    rows, cols = np.mgrid[0:20, 0:15]
+    write_grid_file(os.path.join(product_dir, 'geodetic_in.nc'),
+                    {'longitude_in': 10.0 + 0.1 * cols, 'latitude_in': 40.0 + 0.1 * rows}, (20, 15))
+    write_grid_file(os.path.join(product_dir, 'S7_BT_in.nc'), {'S7_BT_in': rows * 100.0 + cols},
+                    (20, 15))
+    write_grid_file(os.path.join(product_dir, 'S1_radiance_an.nc'),
+                    {'S1_radiance_an': np.ones((40, 30))}, (40, 30))
+
+
+def test_in_box_antimeridian():
+    lon = np.array([179.5, -179.5, 0.0])
+    assert in_box(lon, np.zeros(3), (179.0, -1.0, -179.0, 1.0)).tolist() == [True, True, False]
+
+
+def test_crop_keeps_other_grids(tmp_path):
+    product_dir = str(tmp_path / 'S3A_SL_1_RBT____test.SEN3')
+    slstr_product(product_dir)
+    box = (10.5, 40.5, 10.8, 41.0)
+    window = footprint_window(os.path.join(product_dir, 'geodetic_in.nc'), box, margin=0.0,
+                              lon_name='longitude_in', lat_name='latitude_in')
+    assert window == (5, 11, 5, 9, (('rows', 20), ('columns', 15)))
+
+    sizes = crop_product(product_dir, box, margin=0.0, geo_file='geodetic_in.nc',
+                         lon_name='longitude_in', lat_name='latitude_in')
+    assert sizes is not None
+    with nc.Dataset(os.path.join(product_dir, 'S7_BT_in.nc')) as nc_fid:
+        bt = nc_fid.variables['S7_BT_in'][:]
+    rows, cols = np.mgrid[5:11, 5:9]
+    np.testing.assert_array_equal(bt, rows * 100.0 + cols)
+    # the 500 m file has the same dimension names but another size: unchanged
+    with nc.Dataset(os.path.join(product_dir, 'S1_radiance_an.nc')) as nc_fid:
+        assert nc_fid.variables['S1_radiance_an'].shape == (40, 30)
+
+
+def test_box_not_covered(tmp_path):
+    product_dir = str(tmp_path / 'S3A_SL_1_RBT____test.SEN3')
+    slstr_product(product_dir)
+    assert crop_product(product_dir, '50,0:51,1', geo_file='geodetic_in.nc',
+                        lon_name='longitude_in', lat_name='latitude_in') is None
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+zarr = pytest.importorskip("zarr")
+nc = pytest.importorskip("netCDF4")
+pytest.importorskip("scipy")
+
+from eumetsat_marine import datacube
+
+EXTENT = (10.0, 11.0, 40.0, 41.0)
+
+
+def write_l2p(root, start, lon0, lat0, sst):
+    """ small SLSTR L2P file, 20 x 20 pixels of 0.06 degrees from (lon0, lat0) """
+    name = start + '-MAR-L2P_GHRSST-SSTskin-SLSTRA-test.nc'
+    rows, cols = np.mgrid[0:20, 0:20]
+    with nc.Dataset(os.path.join(root, name), 'w') as nc_fid:
+        nc_fid.createDimension('time', 1)
+        nc_fid.createDimension('nj', 20)
+        nc_fid.createDimension('ni', 20)
+        nc_fid.createVariable('lon', 'f4', ('nj', 'ni'))[:] = lon0 + 0.06 * cols
+        nc_fid.createVariable('lat', 'f4', ('nj', 'ni'))[:] = lat0 + 0.06 * rows
+        nc_fid.createVariable('sea_surface_temperature', 'f4', ('time', 'nj', 'ni'))[:] = sst
+        nc_fid.createVariable('quality_level', 'i1', ('time', 'nj', 'ni'))[:] = 5
+    return name
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """ names of the files read by update_cube """
+    names = []
+    read_sst = datacube.read_sst
+
+    def recording_read_sst(nc_file):
+        names.append(os.path.basename(nc_file))
+        return read_sst(nc_file)
+    monkeypatch.setattr(datacube, 'read_sst', recording_read_sst)
+    return names
+
+
+def test_update_skips_recorded_products(tmp_path, reads):
+    root = tmp_path / 'L2P'
+    root.mkdir()
+    store = str(tmp_path / 'cube.zarr')
+    outside = write_l2p(str(root), '20200101000000', 100.0, -30.0, 280.0)
+    jan2 = write_l2p(str(root), '20200102000000', 9.9, 39.9, 282.0)
+
+    added = datacube.update_cube(store, str(root), sensor='sst', extent=EXTENT,
+                                 resolution=0.1, verbose=False)
+    assert added == 1
+    assert sorted(reads) == sorted([outside, jan2])
+    group = zarr.open_group(store, mode='r')
+    assert dict(group.attrs['products']) == {outside: None, jan2: 0}
+
+    # new products, older and newer than the cube content
+    jan3 = write_l2p(str(root), '20200103000000', 9.9, 39.9, 283.0)
+    jan1 = write_l2p(str(root), '20200101060000', 9.9, 39.9, 281.0)
+    del reads[:]
+    added = datacube.update_cube(store, str(root), sensor='sst', verbose=False)
+    assert added == 2
+    # recorded products, including the one outside the grid, are not read again
+    assert reads == [jan1, jan3]
+
+    group = zarr.open_group(store, mode='r')
+    assert dict(group.attrs['products']) == {outside: None, jan2: 0, jan1: 1, jan3: 2}
+    assert group['sea_surface_temperature'].shape == (3, 10, 10)
+    assert np.allclose(group['sea_surface_temperature'][:, 5, 5], [282.0, 281.0, 283.0])
+
+    times, values = datacube.read_timeseries(store, 'sea_surface_temperature', 10.55, 40.55)
+    assert times.astype(str).tolist() == ['2020-01-01T06:00:00', '2020-01-02T00:00:00',
+                                          '2020-01-03T00:00:00']
+    assert np.allclose(values, [281.0, 282.0, 283.0])
+
+    # nothing new
+    del reads[:]
+    assert datacube.update_cube(store, str(root), sensor='sst', verbose=False) == 0
+    assert reads == []
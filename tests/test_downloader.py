@@ -0,0 +1,187 @@
+import os
+import sys
+import time
+import importlib.util
+from datetime import datetime, timedelta
+
+import pytest
+
+for name in ("shapely", "lxml", "requests", "netCDF4"):
+    pytest.importorskip(name)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOWNLOADER_DIR = os.path.join(ROOT, "Python_Universal_Sentinel_Downloader")
+
+
+@pytest.fixture(scope="module")
+def usd():
+    # the script parses its command line on import
+    argv = sys.argv
+    sys.argv = ["Universal_Sentinel_Downloader.py"]
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "Universal_Sentinel_Downloader",
+            os.path.join(DOWNLOADER_DIR, "Universal_Sentinel_Downloader.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.argv = argv
+    return module
+
+
+def read_config(usd, footprint):
+    parser = usd.MyParser()
+    parser.read(os.path.join(DOWNLOADER_DIR, "Universal_Sentinel_Downloader_S3.ini"))
+    config = parser.as_dict()
+    config["download_options"]["footprint"] = footprint
+    return usd.parse_config(config, "user", "password")
+
+
+def polygon(west, south, east, north):
+    return "POLYGON((%s %s,%s %s,%s %s,%s %s,%s %s))" % (west, south, east, south, east, north,
+                                                        west, north, west, south)
+
+
+def test_antimeridian_footprint_overlap(usd):
+    config = read_config(usd, "170,-10:-170,10")
+    assert config["search"]["footprint"] == \
+        '"Intersects(POLYGON((170 -10,180 -10,180 10,170 10,170 -10)))" OR footprint:' \
+        '"Intersects(POLYGON((-180 -10,-170 -10,-170 10,-180 10,-180 -10)))"'
+    # the search box is 20 x 20 degrees, the product covers 6 x 10 of it
+    overlap = usd.check_overlap(config["search"]["footprint"], polygon(172, -5, 178, 5))
+    assert overlap == pytest.approx(15.0)
+    assert usd.check_overlap(config["search"]["footprint"], polygon(0, -5, 10, 5)) == 0.0
+
+
+def test_greenwich_footprint_overlap(usd):
+    config = read_config(usd, "-10,0:10,10")
+    assert config["search"]["footprint"].count("POLYGON") == 2
+    overlap = usd.check_overlap(config["search"]["footprint"], polygon(-5, 0, 5, 10))
+    assert overlap == pytest.approx(50.0)
+
+
+def entries(*names):
+    return [{"uuid": "uuid-" + name, "identifier": name} for name in names]
+
+
+def statuses(connection):
+    return dict(connection.execute("SELECT identifier, status FROM products"))
+
+
+def test_publish_is_idempotent(usd, tmp_path):
+    connection = usd.open_queue(str(tmp_path / "queue.sqlite"))
+    assert usd.publish(connection, entries("a", "b")) == 2
+    usd.complete(connection, "uuid-a", "done")
+    # re-publishing keeps the status of products already queued
+    assert usd.publish(connection, entries("a", "b", "c")) == 1
+    assert statuses(connection) == {"a": "done", "b": "queued", "c": "queued"}
+
+
+def test_lease_cycle(usd, tmp_path):
+    connection = usd.open_queue(str(tmp_path / "queue.sqlite"))
+    usd.publish(connection, entries("a", "b"))
+    assert usd.lease(connection, "w1", 600, 3)["identifier"] == "a"
+    assert usd.lease(connection, "w2", 600, 3)["identifier"] == "b"
+    assert usd.lease(connection, "w3", 600, 3) is None
+    usd.complete(connection, "uuid-a", "done")
+    usd.complete(connection, "uuid-b", "skipped")
+    assert usd.queue_counts(connection) == {"done": 1, "skipped": 1}
+
+
+def test_expired_lease_is_reissued(usd, tmp_path):
+    connection = usd.open_queue(str(tmp_path / "queue.sqlite"))
+    usd.publish(connection, entries("a"))
+    for worker in ("w1", "w2"):
+        assert usd.lease(connection, worker, 0, 3)["identifier"] == "a"
+        time.sleep(0.01)
+    assert connection.execute("SELECT worker, attempts FROM products").fetchone() == ("w2", 2)
+
+
+def test_expired_lease_attempts_cap(usd, tmp_path):
+    connection = usd.open_queue(str(tmp_path / "queue.sqlite"))
+    usd.publish(connection, entries("a"))
+    for _ in range(2):
+        assert usd.lease(connection, "crashing", 0, 2) is not None
+        time.sleep(0.01)
+    # the second crash used the last attempt
+    assert usd.lease(connection, "w", 0, 2) is None
+    assert statuses(connection) == {"a": "failed"}
+
+
+def test_failed_download_is_queued_again(usd, tmp_path):
+    connection = usd.open_queue(str(tmp_path / "queue.sqlite"))
+    usd.publish(connection, entries("a"))
+    for attempt in range(3):
+        entry = usd.lease(connection, "w", 600, 3)
+        assert entry["identifier"] == "a"
+        usd.complete(connection, entry["uuid"], "failed", 3)
+        assert statuses(connection) == {"a": "queued" if attempt < 2 else "failed"}
+    assert usd.lease(connection, "w", 600, 3) is None
+
+
+def test_manifest_thresholds(usd):
+    thresholds = usd.parse_manifest_thresholds("cloudyPixels<70, salineWaterPixels>10,")
+    assert thresholds == [("cloudyPixels", "<", 70.0), ("salineWaterPixels", ">", 10.0)]
+    with pytest.raises(Exception):
+        usd.parse_manifest_thresholds("cloudyPixels=70")
+
+
+@pytest.mark.parametrize("summary, status", [
+    ({"cloudyPixels": 40.0, "salineWaterPixels": 50.0}, "pass"),
+    ({"cloudyPixels": 80.0, "salineWaterPixels": 50.0}, "reject"),
+    ({"cloudyPixels": 40.0, "salineWaterPixels": 2.0}, "reject"),
+    ({"cloudyPixels": 68.0, "salineWaterPixels": 50.0}, "borderline"),
+    ({"cloudyPixels": 72.0, "salineWaterPixels": 50.0}, "borderline"),
+    ({"cloudyPixels": 40.0}, "borderline"),
+])
+def test_manifest_filter(usd, summary, status):
+    thresholds = [("cloudyPixels", "<", 70.0), ("salineWaterPixels", ">", 10.0)]
+    assert usd.manifest_filter(summary, thresholds, margin=5.0)[0] == status
+
+
+def test_parse_manifest_summary(usd, tmp_path):
+    xml_file = tmp_path / "xfdumanifest.xml"
+    xml_file.write_text(
+        '<xfdu xmlns:sentinel3="http://www.esa.int/safe/sentinel/sentinel-3/1.0">'
+        '<sentinel3:classificationSummary grid="1 km">'
+        '<sentinel3:cloudyPixels percentage="42.0"/></sentinel3:classificationSummary>'
+        '<sentinel3:classificationSummary grid="0.5 km">'
+        '<sentinel3:cloudyPixels percentage="45.5"/>'
+        '<sentinel3:salineWaterPixels percentage="55.0"/></sentinel3:classificationSummary>'
+        '</xfdu>')
+    assert usd.parse_manifest_summary(str(xml_file)) == \
+        {"cloudyPixels": 45.5, "salineWaterPixels": 55.0}
+
+
+def test_merge_windows(usd):
+    day = datetime(2020, 1, 1)
+    windows = [(day + timedelta(days=3), day + timedelta(days=4)),
+               (day, day + timedelta(days=1)),
+               (day + timedelta(hours=12), day + timedelta(days=2)),
+               (day + timedelta(days=2, milliseconds=1), day + timedelta(days=2, hours=1))]
+    assert usd.merge_windows(windows) == \
+        [(day, day + timedelta(days=2, hours=1)), (day + timedelta(days=3), day + timedelta(days=4))]
+
+
+def test_slice_window(usd):
+    start = datetime(2020, 1, 1)
+    end = datetime(2020, 1, 2, 23, 59, 59, 999000)
+    slices = usd.slice_window((start, end), 12)
+    assert len(slices) == 4
+    assert slices[0] == (start, datetime(2020, 1, 1, 11, 59, 59, 999000))
+    assert slices[-1][1] == end
+    # consecutive and non overlapping
+    for (_, end1), (start2, _) in zip(slices[:-1], slices[1:]):
+        assert start2 - end1 == timedelta(milliseconds=1)
+
+
+@pytest.mark.parametrize("box, spans", [
+    ((10, 0, 20, 5), [(10, 20)]),
+    ((-10, 0, 20, 5), [(-10, 0), (0, 20)]),
+    ((170, 0, -170, 5), [(170, 180), (-180, -170)]),
+    ((190, 0, 200, 5), [(-170, -160)]),
+    ((-20, 0, 200, 5), [(-20, 0), (0, 180), (-180, -160)]),
+])
+def test_plan_footprints(usd, box, spans):
+    assert usd.plan_footprints(*box) == \
+        ['"Intersects(%s)"' % polygon(west, box[1], east, box[3]) for west, east in spans]
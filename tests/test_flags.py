@@ -0,0 +1,28 @@
+import numpy as np
+
+from eumetsat_marine.flags import flag_bits, flag_data_fast, OLCI_L2_CHL_FLAGS
+
+NAMES = ['INVALID', 'WATER', 'CLOUD', 'LAND']
+VALUES = np.array([1, 2, 4, 8], dtype=np.uint64)
+
+
+def test_flag_bits_combines_wanted_flags():
+    assert flag_bits(['INVALID', 'CLOUD'], NAMES, VALUES) == 5
+    assert flag_bits(['INVALID', 'CLOUD'], NAMES, VALUES).dtype == np.uint64
+
+
+def test_missing_flag_is_ignored(capsys):
+    assert flag_bits(['CLOUD', 'SNOW_ICE'], NAMES, VALUES) == 4
+    assert 'SNOW_ICE not present' in capsys.readouterr().out
+
+
+def test_flag_data_fast():
+    data = np.array([[0, 1, 2], [4, 6, 8]], dtype=np.uint64)
+    mask = flag_data_fast(['INVALID', 'CLOUD'], NAMES, VALUES, data)
+    np.testing.assert_array_equal(mask, [[False, True, False], [True, True, False]])
+
+
+def test_flag_types():
+    values = np.array([1, 2], dtype=np.uint8)
+    assert flag_bits(['a', 'b'], ['a', 'b'], values, flag_type='SST').dtype == np.uint8
+    assert 'CLOUD' in OLCI_L2_CHL_FLAGS
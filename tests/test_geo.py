@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from eumetsat_marine.geo import lonlat_to_xyz, chord_length, arc_length, haversine, \
+                                spheric_dist, EARTH_RADIUS
+
+
+def test_lonlat_to_xyz():
+    xyz = lonlat_to_xyz(np.array([[0.0, 90.0]]), np.array([[0.0, 0.0]]))
+    assert xyz.shape == (1, 2, 3)
+    np.testing.assert_allclose(xyz[0, 0], [EARTH_RADIUS, 0.0, 0.0], atol=1e-6)
+    np.testing.assert_allclose(xyz[0, 1], [0.0, EARTH_RADIUS, 0.0], atol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(lonlat_to_xyz(10.0, 80.0)), EARTH_RADIUS)
+
+
+def test_chord_arc_round_trip():
+    distances = np.array([0.0, 1.0, 1000.0, 5e6, np.pi * EARTH_RADIUS])
+    np.testing.assert_allclose(arc_length(chord_length(distances)), distances, atol=1e-6)
+
+
+def test_haversine():
+    quarter = 0.5 * np.pi * EARTH_RADIUS
+    assert haversine(0.0, 0.0, 90.0, 0.0) == pytest.approx(quarter)
+    assert haversine(0.0, 0.0, 0.0, 90.0) == pytest.approx(quarter)
+    # short distances stay accurate
+    assert haversine(0.0, 0.0, 0.0, 1e-6) == pytest.approx(np.deg2rad(1e-6) * EARTH_RADIUS)
+
+
+def test_spheric_dist_modes():
+    assert spheric_dist(0.0, 0.0, 179.5, -179.5) == pytest.approx(haversine(0.0, 0.0, 1.0, 0.0))
+    local = spheric_dist(45.0, 45.01, 10.0, 10.01, mode="local")
+    assert local == pytest.approx(spheric_dist(45.0, 45.01, 10.0, 10.01), rel=1e-4)
+    with pytest.raises(Exception):
+        spheric_dist(0.0, 0.0, 0.0, 0.0, mode="flat")
@@ -0,0 +1,48 @@
+import json
+
+from eumetsat_marine.notebook_runner import run_notebook, parameter_grid
+
+
+def write_notebook(path, cells):
+    content = {"cells": [{"cell_type": "code", "source": cell, "metadata": {}, "outputs": []}
+                         for cell in cells],
+               "metadata": {}, "nbformat": 4, "nbformat_minor": 2}
+    path.write_text(json.dumps(content))
+    return str(path)
+
+
+def test_parameters_and_cache(tmp_path):
+    notebook = write_notebook(tmp_path / "nb.ipynb", [
+        "%matplotlib inline\nimport os",
+        "Location = 'India'\nif Location == 'India':\n    input_path = 'a'\nelse:\n    input_path = 'b'",
+        "values = [input_path] * 3",
+        "assert values == ['b'] * 3, values"])
+    for mode in ('run', 'cached'):
+        result = run_notebook(notebook, {"Location": 'Vietnam'}, str(tmp_path / "out"),
+                              cache_dir=str(tmp_path / "cache"))
+        assert result["status"] == 'ok'
+        assert dict((cell[0], cell[3]) for cell in result["timings"])[2] == mode
+
+
+def test_unassigned_parameter(tmp_path):
+    notebook = write_notebook(tmp_path / "nb.ipynb", ["Location = 'India'"])
+    result = run_notebook(notebook, {"Locaton": 'India'}, str(tmp_path / "out"))
+    assert result["status"].startswith('failed')
+
+
+def test_unpicklable_cell_not_cached(tmp_path):
+    notebook = write_notebook(tmp_path / "nb.ipynb", [
+        "import os",
+        "fh = open('x.txt', 'w')\nn = 3",
+        "fh.write('a' * n)\nfh.close()"])
+    for _ in range(2):
+        result = run_notebook(notebook, {}, str(tmp_path / "out"),
+                              cache_dir=str(tmp_path / "cache"))
+        assert result["status"] == 'ok'
+        assert all(timing[3] == 'run' for timing in result["timings"])
+
+
+def test_parameter_grid():
+    grid = parameter_grid(["Location=India,Vietnam", "lonmin=70.0,71"])
+    assert len(grid) == 4
+    assert grid[1] == {"Location": 'India', "lonmin": 71}
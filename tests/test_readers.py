@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+nc = pytest.importorskip("netCDF4")
+
+from eumetsat_marine.readers import find_files, find_products, read_rows, read_variables, \
+                                    read_flags, read_product
+
+PRODUCT = 'S3A_OL_2_WFR____20180101T045629_20180101T045929_20180102T105453_0179_026_076_2700_MAR_O_NT_002.SEN3'
+
+
+@pytest.fixture
+def product(tmp_path):
+    product_dir = tmp_path / '2018' / '01' / PRODUCT
+    product_dir.mkdir(parents=True)
+    with nc.Dataset(str(product_dir / 'chl_nn.nc'), 'w') as nc_fid:
+        nc_fid.createDimension('rows', 3)
+        nc_fid.createDimension('columns', 2)
+        variable = nc_fid.createVariable('CHL_NN', 'f4', ('rows', 'columns'),
+                                         fill_value=np.float32(-999.0))
+        variable[:] = np.ma.masked_equal([[1.0, 2.0], [-999.0, 4.0], [5.0, 6.0]], -999.0)
+    with nc.Dataset(str(product_dir / 'wqsf.nc'), 'w') as nc_fid:
+        nc_fid.createDimension('rows', 3)
+        nc_fid.createDimension('columns', 2)
+        variable = nc_fid.createVariable('WQSF', 'u8', ('rows', 'columns'))
+        variable[:] = np.arange(6, dtype=np.uint64).reshape(3, 2)
+        variable.flag_meanings = 'INVALID WATER CLOUD'
+        variable.flag_masks = np.array([1, 2, 4], dtype=np.uint64)
+    with nc.Dataset(str(tmp_path / '20180101-L2P_GHRSST-SSTskin-SLSTRA.nc'), 'w') as nc_fid:
+        nc_fid.createDimension('time', 1)
+        nc_fid.createDimension('nj', 2)
+        nc_fid.createDimension('ni', 2)
+        nc_fid.createVariable('sst', 'f4', ('time', 'nj', 'ni'))[:] = np.ones((1, 2, 2))
+    return str(tmp_path), str(product_dir)
+
+
+def test_find_files_and_products(product):
+    root, product_dir = product
+    assert find_products(root) == [product_dir]
+    assert find_files(root, '*.nc') == sorted([os.path.join(product_dir, 'chl_nn.nc'),
+                                               os.path.join(product_dir, 'wqsf.nc'),
+                                               os.path.join(root, '20180101-L2P_GHRSST-'
+                                                            'SSTskin-SLSTRA.nc')])
+    assert find_files(root, ['*chl*', '*SLSTR*']) == find_files(root, '*chl*') \
+        + find_files(root, '*SLSTR*')
+
+
+def test_read_rows_fill_values(product):
+    _, product_dir = product
+    with nc.Dataset(os.path.join(product_dir, 'chl_nn.nc')) as nc_fid:
+        rows = read_rows(nc_fid.variables['CHL_NN'], 1, 3)
+    assert rows.dtype == np.float32
+    np.testing.assert_array_equal(rows, [[np.nan, 4.0], [5.0, 6.0]])
+
+
+def test_read_rows_drops_time(product):
+    root, _ = product
+    data = read_variables(os.path.join(root, '20180101-L2P_GHRSST-SSTskin-SLSTRA.nc'), ['sst'])
+    assert data['sst'].shape == (2, 2)
+
+
+def test_read_flags_and_product(product):
+    _, product_dir = product
+    flags, names, values = read_flags(os.path.join(product_dir, 'wqsf.nc'), 'WQSF')
+    assert flags.dtype == np.uint64
+    assert names == ['INVALID', 'WATER', 'CLOUD']
+    np.testing.assert_array_equal(values, [1, 2, 4])
+    data = read_product(product_dir, {'chl_nn.nc': ['CHL_NN']}, dtype=np.float64)
+    assert data['CHL_NN'].dtype == np.float64
+    assert np.isnan(data['CHL_NN'][1, 0])
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from eumetsat_marine.statistics import RunningStats, QuantileSketch, streaming_stats, \
+                                       std_limits, percentile_limits, symmetric_limit
+
+
+@pytest.fixture
+def values():
+    random = np.random.default_rng(0)
+    data = random.normal(1.0, 2.0, (300, 200))
+    data[random.random(data.shape) < 0.2] = np.nan
+    return data
+
+
+def test_running_stats_match_numpy(values):
+    stats, _ = streaming_stats(values, chunk_rows=37)
+    assert stats.count == np.isfinite(values).sum()
+    assert stats.mean == pytest.approx(np.nanmean(values))
+    assert stats.std == pytest.approx(np.nanstd(values))
+    assert stats.min == np.nanmin(values)
+    assert stats.max == np.nanmax(values)
+
+
+def test_running_stats_merge(values):
+    merged = RunningStats().update(values[:100]).merge(RunningStats().update(values[100:]))
+    assert merged.mean == pytest.approx(np.nanmean(values))
+    assert merged.variance == pytest.approx(np.nanvar(values))
+
+
+def test_empty_stats():
+    stats = RunningStats().update(np.full(5, np.nan))
+    assert stats.count == 0
+    assert np.isnan(stats.as_dict()["mean"])
+    assert np.isnan(QuantileSketch().quantile(0.5))
+
+
+def test_quantile_sketch(values):
+    sketch = QuantileSketch(buffer_size=1000)
+    for chunk in np.array_split(values, 7):
+        sketch.update(chunk)
+    finite = values[np.isfinite(values)]
+    for q in (0.02, 0.5, 0.98):
+        assert sketch.quantile(q) == pytest.approx(np.quantile(finite, q), abs=0.02)
+
+
+def test_mask_and_masked_arrays(values):
+    mask = values > 2.0
+    stats, _ = streaming_stats(values, mask=mask)
+    assert stats.mean == pytest.approx(np.nanmean(np.where(mask, np.nan, values)))
+    masked = np.ma.masked_invalid(values)
+    assert streaming_stats(masked)[0].mean == pytest.approx(np.nanmean(values))
+
+
+def test_limits(values):
+    low, high = std_limits(values, nstd=2.0)
+    assert low == pytest.approx(np.nanmean(values) - 2.0 * np.nanstd(values))
+    assert high == pytest.approx(np.nanmean(values) + 2.0 * np.nanstd(values))
+    low, high = percentile_limits(values)
+    assert low == pytest.approx(np.nanpercentile(values, 2), abs=0.05)
+    assert high == pytest.approx(np.nanpercentile(values, 98), abs=0.05)
+    assert symmetric_limit(values) == pytest.approx(
+        np.nanpercentile(np.abs(values), 95), abs=0.05)
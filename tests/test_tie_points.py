@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+from eumetsat_marine.tie_points import tie_coordinates, bilinear, interpolate, \
+    slstr_tie_indices
+
+
+def test_separable_bilinear():
+    tie = np.array([[0.0, 4.0], [8.0, 12.0]])
+    rows = tie_coordinates(0, 3, 2, 2)
+    cols = tie_coordinates(0, 3, 2, 2)
+    expected = [[0.0, 2.0, 4.0], [4.0, 6.0, 8.0], [8.0, 10.0, 12.0]]
+    assert np.allclose(interpolate(tie, rows, cols), expected)
+
+
+def test_separable_bilinear_trailing_dimension():
+    tie = np.stack([np.array([[0.0, 4.0], [8.0, 12.0]]), np.full((2, 2), 5.0)], axis=-1)
+    out = bilinear(tie, tie_coordinates(0, 3, 2, 2), tie_coordinates(0, 3, 2, 2))
+    assert out.shape == (3, 3, 2)
+    assert out[1, 1].tolist() == [6.0, 5.0]
+
+
+def test_azimuth_wrap():
+    tie = np.array([[350.0, 10.0]])
+    azimuth = interpolate(tie, tie_coordinates(0, 1, 1, 1), tie_coordinates(0, 5, 4, 2),
+                          angular=True)
+    assert azimuth.shape == (1, 5)
+    assert azimuth[0, 2] == 0.0
+    assert np.all((azimuth >= 0.0) & (azimuth < 360.0))
+    assert np.allclose(azimuth[0, [0, 4]], [350.0, 10.0])
+    assert 350.0 < azimuth[0, 1] < 360.0 and 0.0 < azimuth[0, 3] < 10.0
+
+
+def test_azimuth_signed_convention():
+    tie = np.array([[-170.0, 170.0]])
+    azimuth = interpolate(tie, tie_coordinates(0, 1, 1, 1), tie_coordinates(0, 3, 2, 2),
+                          angular=True)
+    assert np.allclose(azimuth[0, [0, 2]], [-170.0, 170.0])
+    assert abs(azimuth[0, 1]) == pytest.approx(180.0)
+
+
+def write_tie_file(path, ntie_rows, ntie_cols, factors):
+    nc = pytest.importorskip("netCDF4")
+    rows, cols = np.mgrid[0:ntie_rows, 0:ntie_cols]
+    with nc.Dataset(path, 'w') as nc_fid:
+        nc_fid.al_subsampling_factor = factors[0]
+        nc_fid.ac_subsampling_factor = factors[1]
+        nc_fid.createDimension('tie_rows', ntie_rows)
+        nc_fid.createDimension('tie_columns', ntie_cols)
+        # linear in the image grid: 2 * row + 0.5 * column
+        sza = nc_fid.createVariable('SZA', 'f8', ('tie_rows', 'tie_columns'))
+        sza[:] = 2.0 * rows * factors[0] + 0.5 * cols * factors[1]
+        saa = nc_fid.createVariable('SAA', 'f8', ('tie_rows', 'tie_columns'))
+        saa[:] = np.where(cols % 2 == 0, 350.0, 10.0)
+
+
+def test_read_tie_variable_window(tmp_path):
+    from eumetsat_marine.tie_points import read_tie_variable
+
+    write_tie_file(str(tmp_path / 'tie_geometries.nc'), 10, 3, (1, 4))
+    window = (3, 7, 2, 7)
+    sza = read_tie_variable(str(tmp_path), 'tie_geometries.nc', 'SZA', window)
+    rows, cols = np.mgrid[3:7, 2:7]
+    assert sza.dtype == np.float32
+    assert np.allclose(sza, 2.0 * rows + 0.5 * cols)
+    # a window gives the same values as the full grid
+    full = read_tie_variable(str(tmp_path), 'tie_geometries.nc', 'SZA', (0, 10, 0, 9))
+    assert np.array_equal(sza, full[3:7, 2:7])
+
+    saa = read_tie_variable(str(tmp_path), 'tie_geometries.nc', 'SAA', (0, 10, 0, 9))
+    assert np.all((saa >= 0.0) & (saa < 360.0))
+    assert np.all(saa[:, 2] == 0.0)
+
+
+def test_slstr_tie_indices_linear_field():
+    # 16 km tie grid, image pixels anywhere inside it
+    y_tie, x_tie = np.mgrid[0:5, 0:6] * 16000.0
+    x_tie = x_tie - 40000.0
+    field = 3.0 * x_tie + 2.0 * y_tie
+    rng = np.random.default_rng(0)
+    x_image = rng.uniform(-40000.0, 40000.0, (7, 9))
+    y_image = rng.uniform(0.0, 64000.0, (7, 9))
+
+    rows, cols = slstr_tie_indices(x_image, y_image, x_tie, y_tie)
+    assert np.allclose(bilinear(field, rows, cols), 3.0 * x_image + 2.0 * y_image)